@@ -0,0 +1,119 @@
+"""
+JWT authentication that does not read the users table on every request.
+
+Tokens issued by RoleClaimsTokenSerializer carry the user's role,
+manager_id, is_active and username as claims, so a request.user can be
+rebuilt from the token alone (a TokenUser). Claims can go stale when an
+account changes; accounts.signals therefore stores the new state in the
+cache whenever username, role, manager or active status change, and that
+cached state wins over the token's claims for as long as a refresh token
+could live.
+Refreshing rebuilds the claims from the user's row
+(accounts.blacklist.TokenRefreshSerializer), so they never outlive a
+refresh either. Tokens without claims fall back to a database read whose
+result is cached for JWT_USER_CACHE_TIMEOUT seconds.
+
+That revocation only holds if every worker reads the same cache, so claims
+are trusted only with JWT_TRUST_CLAIMS, on by default when CACHE_SHARED.
+Otherwise (e.g. the per-process LocMemCache) each request reads the user
+from the database, as simplejwt does.
+"""
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.serializers import TokenObtainPairSerializer
+from rest_framework_simplejwt.settings import api_settings
+
+from .models import TokenUser
+
+CLAIMS = ("username", "role", "manager_id", "is_active")
+
+
+def user_state(user):
+    return {claim: getattr(user, claim) for claim in CLAIMS}
+
+
+def _state_key(user_id):
+    return f"auth:user_state:{user_id}"
+
+
+def remember_state(user_id, state, timeout=None):
+    """
+    Record the current state of an account (``None`` once deleted) so
+    tokens issued before the change are judged against it.
+    """
+    if timeout is None:
+        timeout = int(api_settings.REFRESH_TOKEN_LIFETIME.total_seconds())
+    cache.set(_state_key(user_id), state if state is not None else {"deleted": True}, timeout)
+
+
+class RoleClaimsTokenSerializer(TokenObtainPairSerializer):
+    """
+    Adds role, manager_id, is_active and username claims to issued tokens.
+    Refreshing rebuilds them (accounts.blacklist.TokenRefreshSerializer).
+    """
+
+    @classmethod
+    def get_token(cls, user):
+        token = super().get_token(user)
+        for claim, value in user_state(user).items():
+            token[claim] = value
+        return token
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    def get_user(self, validated_token):
+        if not settings.JWT_TRUST_CLAIMS:
+            return super().get_user(validated_token)
+        user_id = self._user_id(validated_token)
+        state = cache.get(_state_key(user_id)) or self._claims(validated_token)
+        if state is None:
+            # Token issued before claims existed: one read, then cached.
+            user = super().get_user(validated_token)
+            remember_state(user.pk, user_state(user), settings.JWT_USER_CACHE_TIMEOUT)
+            return user
+        return self._token_user(user_id, state)
+
+    async def aauthenticate(self, request):
+        """
+        authenticate() for async views (tasks.async_views), reading the
+        cache, and the users table for tokens without claims, without
+        blocking the event loop.
+        """
+        header = self.get_header(request)
+        if header is None:
+            return None
+        raw_token = self.get_raw_token(header)
+        if raw_token is None:
+            return None
+        validated_token = self.get_validated_token(raw_token)
+        if not settings.JWT_TRUST_CLAIMS:
+            return await sync_to_async(self.get_user)(validated_token), validated_token
+
+        user_id = self._user_id(validated_token)
+        state = await cache.aget(_state_key(user_id)) or self._claims(validated_token)
+        if state is None:
+            return await sync_to_async(self.get_user)(validated_token), validated_token
+        return self._token_user(user_id, state), validated_token
+
+    def _user_id(self, validated_token):
+        try:
+            return validated_token[api_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken(_("Token contained no recognizable user identification"))
+
+    def _claims(self, validated_token):
+        if all(claim in validated_token for claim in CLAIMS):
+            return {claim: validated_token[claim] for claim in CLAIMS}
+        return None
+
+    def _token_user(self, user_id, state):
+        if state.get("deleted"):
+            raise AuthenticationFailed(_("User not found"), code="user_not_found")
+        if api_settings.CHECK_USER_IS_ACTIVE and not state["is_active"]:
+            raise AuthenticationFailed(_("User is inactive"), code="user_inactive")
+        return TokenUser.from_state(user_id, state)
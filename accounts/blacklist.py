@@ -0,0 +1,143 @@
+"""
+Cache-backed membership checks for the refresh-token blacklist.
+
+Every blacklisted JTI is also written to the cache until the token expires,
+so a blacklisted token is rejected without touching the database. Whether a
+cache *miss* can be trusted depends on the deployment:
+
+- JWT_BLACKLIST_CACHE_AUTHORITATIVE = True (default with a shared cache): a
+  miss means "not blacklisted" and refresh/verify never read the blacklist
+  table. Needs a shared cache (Redis, Memcached) that does not evict these
+  keys.
+- JWT_BLACKLIST_CACHE_AUTHORITATIVE = False (default with the per-process
+  LocMemCache): a miss falls back to the indexed lookup in
+  token_blacklist_blacklistedtoken, and a "not blacklisted" answer is then
+  cached for JWT_BLACKLIST_MISS_CACHE_TIMEOUT seconds (0 by default with a
+  per-process cache, where blacklisting could not clear it in every worker).
+
+Blacklisting claims the cache key with ``cache.add``, so two concurrent
+refreshes of the same token cannot both succeed on a shared cache.
+Rows added outside these serializers (e.g. in the Django admin) reach the
+cache through accounts.signals. Expired rows are removed by
+``manage.py compact_token_blacklist``.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.utils import timezone
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed, ValidationError
+from rest_framework_simplejwt import serializers, tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+from rest_framework_simplejwt.utils import datetime_from_epoch
+
+from .authentication import user_state
+
+
+def _key(jti):
+    return f"auth:blacklisted:{jti}"
+
+
+def _miss_key(jti):
+    return f"auth:not-blacklisted:{jti}"
+
+
+def _ttl(expires_at):
+    return max(int((expires_at - timezone.now()).total_seconds()), 1)
+
+
+def remember_blacklisted(jti, expires_at):
+    cache.set(_key(jti), True, _ttl(expires_at))
+    cache.delete(_miss_key(jti))
+
+
+def is_blacklisted(jti):
+    if settings.JWT_BLACKLIST_CACHE_AUTHORITATIVE:
+        return bool(cache.get(_key(jti)))
+    cached = cache.get_many([_key(jti), _miss_key(jti)])
+    if cached.get(_key(jti)):
+        return True
+    if cached.get(_miss_key(jti)):
+        return False
+    row = (
+        BlacklistedToken.objects.filter(token__jti=jti)
+        .values_list("token__expires_at", flat=True)
+        .first()
+    )
+    if row is None:
+        if settings.JWT_BLACKLIST_MISS_CACHE_TIMEOUT:
+            cache.set(_miss_key(jti), True, settings.JWT_BLACKLIST_MISS_CACHE_TIMEOUT)
+        return False
+    remember_blacklisted(jti, row)
+    return True
+
+
+class RefreshToken(tokens.RefreshToken):
+    """
+    Refresh token whose blacklist checks go to the cache first.
+    """
+
+    def check_blacklist(self):
+        if is_blacklisted(self.payload[api_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist(self):
+        jti = self.payload[api_settings.JTI_CLAIM]
+        expires_at = datetime_from_epoch(self.payload["exp"])
+        # Atomic on shared caches: a replayed token loses the race here.
+        if not cache.add(_key(jti), True, _ttl(expires_at)):
+            raise TokenError(_("Token is blacklisted"))
+        cache.delete(_miss_key(jti))
+        try:
+            return super().blacklist()
+        except Exception:
+            cache.delete(_key(jti))
+            raise
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    """
+    simplejwt's refresh, except the new access token and the rotated
+    refresh token get claims rebuilt from the user's current row instead
+    of copies of the old token's: a demoted or deactivated account cannot
+    keep its old role by refreshing.
+    """
+
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs["refresh"])
+        user_id = refresh.payload.get(api_settings.USER_ID_CLAIM)
+        user = get_user_model().objects.filter(**{api_settings.USER_ID_FIELD: user_id}).first()
+        if user is None or not api_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages["no_active_account"], "no_active_account")
+
+        if api_settings.ROTATE_REFRESH_TOKENS and api_settings.BLACKLIST_AFTER_ROTATION:
+            refresh.blacklist()
+        for claim, value in user_state(user).items():
+            refresh[claim] = value
+        data = {"access": str(refresh.access_token)}
+
+        if api_settings.ROTATE_REFRESH_TOKENS:
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand()
+            data["refresh"] = str(refresh)
+        return data
+
+
+class TokenBlacklistSerializer(serializers.TokenBlacklistSerializer):
+    token_class = RefreshToken
+
+
+class TokenVerifySerializer(serializers.TokenVerifySerializer):
+    def validate(self, attrs):
+        token = tokens.UntypedToken(attrs["token"])
+        if api_settings.BLACKLIST_AFTER_ROTATION and is_blacklisted(
+            token.get(api_settings.JTI_CLAIM)
+        ):
+            raise ValidationError(_("Token is blacklisted"))
+        return {}
@@ -0,0 +1,45 @@
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from accounts.models import EmailOTP, OutboundEmail
+
+
+class Command(BaseCommand):
+    help = (
+        "Delete expired (and therefore also used or exhausted) one-time "
+        "passcodes, and outbox emails that were sent or given up on, in "
+        "small batches, so no long lock is ever held."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--keep-hours", type=float, default=24,
+                            help="Keep codes that expired, and emails queued, less than this many hours ago.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+        parser.add_argument("--sleep", type=float, default=0.0,
+                            help="Seconds to pause between batches.")
+
+    def handle(self, *args, **options):
+        cutoff = timezone.now() - timedelta(hours=options["keep_hours"])
+        otps = self.purge(EmailOTP.objects.filter(expires_at__lt=cutoff).order_by("expires_at"), options)
+        emails = self.purge(
+            OutboundEmail.objects.filter(
+                status__in=[OutboundEmail.Status.SENT, OutboundEmail.Status.FAILED],
+                created_at__lt=cutoff,
+            ).order_by("pk"),
+            options,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Deleted {otps} expired OTPs and {emails} outbox emails."))
+
+    def purge(self, queryset, options):
+        deleted = 0
+        while True:
+            ids = list(queryset.values_list("pk", flat=True)[:options["batch_size"]])
+            if not ids:
+                break
+            deleted += queryset.model.objects.filter(pk__in=ids).delete()[0]
+            if options["sleep"]:
+                time.sleep(options["sleep"])
+        return deleted
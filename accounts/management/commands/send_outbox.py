@@ -0,0 +1,36 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from accounts import outbox
+
+
+class Command(BaseCommand):
+    help = (
+        "Deliver queued outbox emails with a thread pool, retrying failures "
+        "with exponential backoff. Use --loop to run as a long-lived worker."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--threads", type=int, default=settings.OUTBOX_THREADS)
+        parser.add_argument("--batch-size", type=int, default=100)
+        parser.add_argument("--loop", action="store_true", help="Keep polling instead of exiting when idle.")
+        parser.add_argument("--interval", type=float, default=2.0, help="Seconds between polls when idle.")
+
+    def handle(self, *args, **options):
+        total_sent = total_failed = 0
+        with ThreadPoolExecutor(max_workers=options["threads"], thread_name_prefix="outbox") as pool:
+            while True:
+                sent, failed = outbox.process_batch(pool, options["batch_size"])
+                total_sent += sent
+                total_failed += failed
+                if sent or failed:
+                    self.stdout.write(f"Sent {sent}, failed {failed}")
+                    continue
+                if not options["loop"]:
+                    break
+                time.sleep(options["interval"])
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {total_sent} sent, {total_failed} failed."))
@@ -0,0 +1,41 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0003_emailotp"),
+        ("auth", "0012_alter_user_first_name_max_length"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="customuser",
+            name="manager",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                limit_choices_to={"role": "ADMIN"},
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="managed_users",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                fields=["manager", "role"], name="user_manager_role_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="customuser",
+            index=models.Index(
+                fields=["role", "username"], name="user_role_username_idx"
+            ),
+        ),
+    ]
@@ -0,0 +1,34 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:40
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0005_outboundemail"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="emailotp",
+            name="user",
+            field=models.ForeignKey(
+                db_index=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="emailotp",
+            index=models.Index(
+                fields=["user", "code", "created_at"], name="otp_user_code_created_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="emailotp",
+            index=models.Index(fields=["expires_at"], name="otp_expires_idx"),
+        ),
+    ]
@@ -0,0 +1,27 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:41
+
+import django.contrib.auth.models
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("accounts", "0006_emailotp_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="TokenUser",
+            fields=[],
+            options={
+                "proxy": True,
+                "indexes": [],
+                "constraints": [],
+            },
+            bases=("accounts.customuser",),
+            managers=[
+                ("objects", django.contrib.auth.models.UserManager()),
+            ],
+        ),
+    ]
@@ -0,0 +1,21 @@
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+    """
+    Index simplejwt's OutstandingToken.expires_at, which
+    compact_token_blacklist seeks on. The model belongs to a third-party
+    app, hence raw SQL rather than AddIndex.
+    """
+
+    dependencies = [
+        ("accounts", "0007_tokenuser"),
+        ("token_blacklist", "0013_alter_blacklistedtoken_options_and_more"),
+    ]
+
+    operations = [
+        migrations.RunSQL(
+            "CREATE INDEX outstanding_expires_idx ON token_blacklist_outstandingtoken (expires_at)",
+            "DROP INDEX outstanding_expires_idx",
+        ),
+    ]
@@ -21,8 +21,33 @@ class CustomUser(AbstractUser):
         on_delete=models.SET_NULL,
         related_name="managed_users",
         limit_choices_to={"role": "ADMIN"},
+        db_index=False,  # covered by the (manager, role) index
     )
 
+    class Meta(AbstractUser.Meta):
+        indexes = [
+            # "Users managed by this Admin" (task scoping, admin panel lists).
+            models.Index(fields=["manager", "role"], name="user_manager_role_idx"),
+            # Role filters and role-scoped listings ordered by username.
+            models.Index(fields=["role", "username"], name="user_role_username_idx"),
+        ]
+
+    # Columns whose before/after values are published through
+    # accounts.signals.user_changed (scope caches, counters, auth caches).
+    TRACKED_FIELDS = ("username", "role", "manager_id", "is_active")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked_state = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS and value is not models.DEFERRED
+        }
+        return instance
+
+    def tracked_state(self):
+        return {name: getattr(self, name) for name in self.TRACKED_FIELDS}
 
     def is_superadmin(self):
         return self.role == self.Roles.SUPERADMIN
@@ -36,26 +61,130 @@ class CustomUser(AbstractUser):
     def __str__(self):
         return f"{self.username} ({self.get_role_display()})"
 
+class TokenUser(CustomUser):
+    """
+    A CustomUser rebuilt from JWT claims (see accounts.authentication)
+    without touching the database. It is never persisted: it only carries
+    the fields the API reads (id, username, role, manager_id, is_active).
+    """
+
+    class Meta:
+        proxy = True
+
+    @classmethod
+    def from_state(cls, user_id, state):
+        user = cls(
+            # simplejwt stores the id claim as a string.
+            id=cls._meta.pk.to_python(user_id),
+            username=state.get("username", ""),
+            role=state["role"],
+            manager_id=state["manager_id"],
+            is_active=state["is_active"],
+        )
+        user._state.adding = False
+        user._state.db = "default"
+        return user
+
+    def save(self, *args, **kwargs):
+        raise TypeError("TokenUser is built from a token and cannot be saved.")
+
+    def delete(self, *args, **kwargs):
+        raise TypeError("TokenUser is built from a token and cannot be deleted.")
+
+
 class EmailOTP(models.Model):
-    user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE)
+    MAX_ATTEMPTS = 5
+
+    user = models.ForeignKey(
+        settings.AUTH_USER_MODEL,
+        on_delete=models.CASCADE,
+        db_index=False,  # covered by the (user, code, created_at) index
+    )
     code = models.CharField(max_length=6)
     created_at = models.DateTimeField(auto_now_add=True)
     expires_at = models.DateTimeField()
     used_at = models.DateTimeField(null=True, blank=True)
     attempts = models.PositiveIntegerField(default=0)
 
+    class Meta:
+        indexes = [
+            # Code lookup during verification.
+            models.Index(fields=["user", "code", "created_at"], name="otp_user_code_created_idx"),
+            # Batched purge of expired codes.
+            models.Index(fields=["expires_at"], name="otp_expires_idx"),
+        ]
+
     @classmethod
     def create_for_user(cls, user, lifetime_minutes=10):
+        now = timezone.now()
+        # Drop this user's dead codes while we are here; purge_otps handles
+        # users who never come back.
+        cls.objects.filter(user=user, expires_at__lt=now).delete()
         code = f"{random.randint(100000, 999999)}"  # 6-digit OTP
         return cls.objects.create(
             user=user,
             code=code,
-            expires_at=timezone.now() + timedelta(minutes=lifetime_minutes),
+            expires_at=now + timedelta(minutes=lifetime_minutes),
         )
 
+    @classmethod
+    def live_for(cls, user, now=None):
+        now = now or timezone.now()
+        return cls.objects.filter(
+            user=user,
+            used_at__isnull=True,
+            expires_at__gt=now,
+            attempts__lt=cls.MAX_ATTEMPTS,
+        )
+
+    @classmethod
+    def consume(cls, user, code):
+        """
+        Atomically mark a live matching code as used. Returns True for
+        exactly one caller even under concurrent submissions; otherwise
+        counts a failed attempt against the user's live codes.
+        """
+        now = timezone.now()
+        live = cls.live_for(user, now)
+        if live.filter(code=code).update(used_at=now, attempts=models.F("attempts") + 1):
+            return True
+        live.update(attempts=models.F("attempts") + 1)
+        return False
+
     def is_valid(self):
         return (
             self.used_at is None
             and timezone.now() < self.expires_at
-            and self.attempts < 5
+            and self.attempts < self.MAX_ATTEMPTS
         )
+
+
+class OutboundEmail(models.Model):
+    """
+    Transactional email queued in the request transaction and delivered
+    asynchronously by accounts.outbox (see ``manage.py send_outbox``).
+    """
+    class Status(models.TextChoices):
+        PENDING = "PENDING", "Pending"
+        SENT = "SENT", "Sent"
+        FAILED = "FAILED", "Failed"
+
+    to_email = models.EmailField()
+    subject = models.CharField(max_length=255)
+    html_content = models.TextField()
+    status = models.CharField(max_length=10, choices=Status.choices, default=Status.PENDING)
+    attempts = models.PositiveIntegerField(default=0)
+    next_attempt_at = models.DateTimeField(default=timezone.now)
+    # Not worth delivering after this (e.g. the OTP inside has expired).
+    discard_after = models.DateTimeField(null=True, blank=True)
+    last_error = models.TextField(blank=True)
+    created_at = models.DateTimeField(auto_now_add=True)
+    sent_at = models.DateTimeField(null=True, blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["status", "next_attempt_at"], name="outbox_due_idx"),
+        ]
+
+    def __str__(self):
+        return f"{self.subject} -> {self.to_email} ({self.get_status_display()})"
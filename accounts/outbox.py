@@ -0,0 +1,308 @@
+"""
+Transactional email outbox.
+
+Views call ``enqueue()`` inside their transaction; rows are delivered
+afterwards by a pool of threads, either right after commit (in-process
+dispatch) or by ``manage.py send_outbox``. Both paths claim rows the same
+way, so a message is never sent twice concurrently, and failures are retried
+with exponential backoff until ``OUTBOX_MAX_ATTEMPTS``.
+
+The sender is pluggable through ``settings.OUTBOX_SENDER``:
+BrevoSender in production, LocMemSender for tests and local development.
+Async views pass their event loop to ``enqueue()``; their messages are then
+delivered by a task on that loop through the sender's ``asend()``.
+"""
+import asyncio
+import contextvars
+import logging
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.db import close_old_connections, connection, transaction
+from django.utils import timezone
+from django.utils.module_loading import import_string
+
+from .models import OutboundEmail
+
+logger = logging.getLogger(__name__)
+
+# How long a claimed row is hidden from other workers while being sent.
+CLAIM_LEASE = timedelta(minutes=2)
+
+
+# ------------------------------
+# Senders
+# ------------------------------
+
+class BrevoSender:
+    """
+    Sends through the Brevo transactional API, reusing one API client (and
+    its pooled HTTPS connections) for every message in the process.
+    """
+
+    def __init__(self):
+        self._api = None
+        self._lock = threading.Lock()
+
+    def _get_api(self):
+        if self._api is None:
+            with self._lock:
+                if self._api is None:
+                    import sib_api_v3_sdk
+
+                    configuration = sib_api_v3_sdk.Configuration()
+                    configuration.api_key["api-key"] = settings.BREVO_API_KEY
+                    configuration.connection_pool_maxsize = settings.OUTBOX_THREADS
+                    self._api = sib_api_v3_sdk.TransactionalEmailsApi(
+                        sib_api_v3_sdk.ApiClient(configuration)
+                    )
+        return self._api
+
+    def send(self, message):
+        import sib_api_v3_sdk
+
+        self._get_api().send_transac_email(
+            sib_api_v3_sdk.SendSmtpEmail(
+                to=[{"email": message.to_email}],
+                subject=message.subject,
+                html_content=message.html_content,
+                sender={"email": settings.DEFAULT_FROM_EMAIL},
+            )
+        )
+
+    async def asend(self, message):
+        """
+        send() on a worker thread, so the event loop keeps serving while the
+        SDK waits for Brevo.
+        """
+        await sync_to_async(self.send, thread_sensitive=False)(message)
+
+
+class LocMemSender:
+    """
+    Keeps the last ``keep`` messages in memory instead of sending them
+    (tests, local dev).
+    """
+
+    keep = 1000
+
+    def __init__(self):
+        self.sent = deque(maxlen=self.keep)
+
+    def send(self, message):
+        self.sent.append(message)
+
+    async def asend(self, message):
+        self.sent.append(message)
+
+
+# OUTBOX_SENDER path -> its sender, one per process.
+_senders = {}
+_sender_lock = threading.Lock()
+
+
+def get_sender():
+    path = settings.OUTBOX_SENDER
+    if path not in _senders:
+        with _sender_lock:
+            if path not in _senders:
+                _senders[path] = import_string(path)()
+    return _senders[path]
+
+
+# ------------------------------
+# Queueing
+# ------------------------------
+
+def enqueue(to_email, subject, html_content, discard_after=None, loop=None):
+    """
+    Queue an email. Call inside the transaction that produced it; nothing is
+    sent unless that transaction commits. ``loop``: the event loop of the
+    async view queueing it, which then delivers it.
+    """
+    message = OutboundEmail.objects.create(
+        to_email=to_email,
+        subject=subject,
+        html_content=html_content,
+        discard_after=discard_after,
+    )
+    if settings.OUTBOX_DISPATCH_ON_COMMIT:
+        if loop is None:
+            transaction.on_commit(lambda: _executor().submit(_dispatch, [message.pk]))
+        else:
+            # A fresh context: delivery is not part of the request (nor of
+            # the sync thread this commit runs on).
+            transaction.on_commit(
+                lambda: loop.call_soon_threadsafe(_schedule, [message.pk], context=contextvars.Context())
+            )
+    return message
+
+
+# ------------------------------
+# Delivery
+# ------------------------------
+
+def claim(limit, ids=None):
+    """
+    Lease up to ``limit`` due messages to this worker and return them.
+    """
+    now = timezone.now()
+    due = OutboundEmail.objects.filter(
+        status=OutboundEmail.Status.PENDING, next_attempt_at__lte=now
+    )
+    if ids is not None:
+        due = due.filter(pk__in=ids)
+    skip_locked = connection.features.has_select_for_update_skip_locked
+    with transaction.atomic():
+        batch = list(
+            due.select_for_update(skip_locked=skip_locked).order_by("next_attempt_at")[:limit]
+        )
+        if batch:
+            OutboundEmail.objects.filter(pk__in=[m.pk for m in batch]).update(
+                next_attempt_at=now + CLAIM_LEASE
+            )
+    return batch
+
+
+def retry_delay(attempts):
+    base = settings.OUTBOX_RETRY_BASE_SECONDS * 2 ** (attempts - 1)
+    return timedelta(seconds=min(base, 3600) * random.uniform(0.8, 1.2))
+
+
+def _discarded(message):
+    """
+    Fields marking ``message`` failed if it is past discard_after, else None.
+    """
+    if message.discard_after and timezone.now() > message.discard_after:
+        return {
+            "status": OutboundEmail.Status.FAILED, "html_content": "",
+            "last_error": "Discarded: past discard_after.",
+        }
+    return None
+
+
+def _outcome(message, exc=None):
+    """
+    Fields recording one send attempt; ``exc`` is the failure, if any. A
+    message that is done with (sent or given up) loses its body, which may
+    hold a one-time code.
+    """
+    attempts = message.attempts + 1
+    if exc is None:
+        return {
+            "status": OutboundEmail.Status.SENT, "attempts": attempts, "html_content": "",
+            "sent_at": timezone.now(), "last_error": "",
+        }
+    logger.warning("Outbox email %s failed (attempt %s): %s", message.pk, attempts, exc)
+    if attempts >= settings.OUTBOX_MAX_ATTEMPTS:
+        update = {"status": OutboundEmail.Status.FAILED, "html_content": ""}
+    else:
+        update = {"next_attempt_at": timezone.now() + retry_delay(attempts)}
+    return {"attempts": attempts, "last_error": str(exc)[:2000], **update}
+
+
+def deliver(message):
+    """
+    Send one claimed message and record the outcome. Returns True on success.
+    """
+    update = _discarded(message)
+    if update is None:
+        try:
+            get_sender().send(message)
+        except Exception as exc:  # any sender failure is retried
+            update = _outcome(message, exc)
+        else:
+            update = _outcome(message)
+    OutboundEmail.objects.filter(pk=message.pk).update(**update)
+    return update.get("status") == OutboundEmail.Status.SENT
+
+
+async def adeliver(message):
+    """
+    deliver() for the event loop, through the sender's ``asend()`` (or its
+    ``send()`` on a worker thread when it has none).
+    """
+    update = _discarded(message)
+    if update is None:
+        sender = get_sender()
+        send = getattr(sender, "asend", None) or sync_to_async(sender.send, thread_sensitive=False)
+        try:
+            await send(message)
+        except Exception as exc:  # any sender failure is retried
+            update = _outcome(message, exc)
+        else:
+            update = _outcome(message)
+    await OutboundEmail.objects.filter(pk=message.pk).aupdate(**update)
+    return update.get("status") == OutboundEmail.Status.SENT
+
+
+def _deliver_in_thread(message):
+    close_old_connections()
+    try:
+        return deliver(message)
+    finally:
+        close_old_connections()
+
+
+def process_batch(executor, limit, ids=None):
+    """
+    Claim one batch and send it concurrently. Returns (sent, failed).
+    """
+    batch = claim(limit, ids=ids)
+    results = list(executor.map(_deliver_in_thread, batch))
+    sent = sum(results)
+    return sent, len(results) - sent
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _executor():
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = ThreadPoolExecutor(
+                    max_workers=settings.OUTBOX_THREADS, thread_name_prefix="outbox"
+                )
+    return _pool
+
+
+# Delivery tasks on event loops; referenced until done so they are not
+# garbage-collected mid-send.
+_tasks = set()
+
+
+def _schedule(ids):
+    task = asyncio.get_running_loop().create_task(_adispatch(ids))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+async def _adispatch(ids):
+    try:
+        for message in await sync_to_async(claim)(len(ids), ids=ids):
+            await adeliver(message)
+    except Exception:
+        # The row stays PENDING; send_outbox will pick it up.
+        logger.exception("In-process outbox dispatch failed")
+
+
+def _dispatch(ids):
+    # Already running on a pool thread: send inline rather than fanning out
+    # to the same pool again.
+    close_old_connections()
+    try:
+        for message in claim(len(ids), ids=ids):
+            deliver(message)
+    except Exception:
+        # The row stays PENDING; send_outbox will pick it up.
+        logger.exception("In-process outbox dispatch failed")
+    finally:
+        close_old_connections()
@@ -0,0 +1,58 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken
+
+from .authentication import remember_state, user_state
+from .blacklist import remember_blacklisted
+from .models import CustomUser
+
+# Sent after a user is created, saved or deleted with the
+# CustomUser.tracked_state() dicts from before and after the write
+# (``before`` is None for new users, ``after`` is None for deleted ones).
+user_changed = Signal()
+
+
+@receiver(pre_save, sender=CustomUser)
+def _load_missing_state(sender, instance, raw=False, **kwargs):
+    # Instances built by hand, or loaded with tracked fields deferred, need
+    # their previous state fetched before it is overwritten.
+    if raw or instance._state.adding:
+        return
+    state = getattr(instance, "_tracked_state", None)
+    if state is not None and len(state) == len(sender.TRACKED_FIELDS):
+        return
+    row = CustomUser.objects.filter(pk=instance.pk).values(*CustomUser.TRACKED_FIELDS).first()
+    instance._tracked_state = row
+
+
+@receiver(post_save, sender=CustomUser)
+def _user_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else instance._tracked_state
+    after = instance.tracked_state()
+    user_changed.send(sender=CustomUser, instance=instance, before=before, after=after)
+    instance._tracked_state = after
+
+
+@receiver(post_delete, sender=CustomUser)
+def _user_deleted(sender, instance, **kwargs):
+    before = getattr(instance, "_tracked_state", None) or instance.tracked_state()
+    user_changed.send(sender=CustomUser, instance=instance, before=before, after=None)
+
+
+@receiver(user_changed)
+def _refresh_token_state(sender, instance, before, after, **kwargs):
+    # Tokens carry username/role/manager/active claims; publish changes so
+    # those claims are overridden until every older token has expired.
+    if after is None:
+        remember_state(instance.pk, None)
+    elif before is not None and before != after:
+        remember_state(instance.pk, user_state(instance))
+
+
+@receiver(post_save, sender=BlacklistedToken)
+def _cache_blacklisted(sender, instance, created, raw=False, **kwargs):
+    # Covers tokens blacklisted outside accounts.blacklist (e.g. the admin).
+    if created and not raw:
+        remember_blacklisted(instance.token.jti, instance.token.expires_at)
@@ -1,3 +1,447 @@
-from django.test import TestCase
+import io
+import threading
+from datetime import timedelta
+from unittest import mock, skipUnless
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.utils import timezone
+from django.urls import reverse
+from rest_framework.test import APIClient
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import AccessToken
+
+from accounts import outbox
+from accounts.authentication import CachedJWTAuthentication, RoleClaimsTokenSerializer
+from accounts.blacklist import RefreshToken, is_blacklisted
+from accounts.models import CustomUser, EmailOTP, OutboundEmail
+from tasks.models import Task
+from task_manager_project.testing import (
+    ADMIN, ANONYMOUS, PASSWORD, SUPERADMIN, USER, QueryBudgetTestCase, route_names,
+)
+
+
+class AccountsQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Maximum queries per request for the auth, OTP and admins routes.
+    """
+
+    BUDGETED = (
+        "auth_login", "auth_refresh", "auth_verify", "auth_logout", "token_obtain_pair", "token_refresh",
+        "otp_request", "otp_request_async", "otp_verify", "admins-list", "admins-detail",
+    )
+
+    def test_every_route_is_budgeted(self):
+        # "api-root" is the DRF router's index of links (and its name is
+        # shared with the tasks router).
+        routes = (route_names("accounts.urls") - {"api-root"}) | {
+            name for name in route_names() if name.startswith(("auth_", "token_"))
+        }
+        self.assertRoutesBudgeted(routes, self.BUDGETED)
+
+    def test_login(self):
+        for route in ("auth_login", "token_obtain_pair"):
+            self.assertQueryBudget(
+                {ANONYMOUS: 2}, "post", route,
+                data=lambda d: {"username": d.user.username, "password": PASSWORD},
+            )
+
+    def test_refresh(self):
+        for route in ("auth_refresh", "token_refresh"):
+            self.assertQueryBudget(
+                {ANONYMOUS: 13}, "post", route, data=lambda d: {"refresh": str(RefreshToken.for_user(d.user))}
+            )
+
+    def test_verify(self):
+        self.assertQueryBudget(
+            {ANONYMOUS: 1}, "post", "auth_verify",
+            data=lambda d: {"token": str(RefreshToken.for_user(d.user).access_token)},
+        )
+
+    def test_logout(self):
+        self.assertQueryBudget(
+            {ANONYMOUS: 7}, "post", "auth_logout", data=lambda d: {"refresh": str(RefreshToken.for_user(d.user))}
+        )
+
+    def test_otp_request(self):
+        self.assertQueryBudget({ANONYMOUS: 0}, "get", "otp_request")
+        self.assertQueryBudget(
+            {ANONYMOUS: 8}, "post", "otp_request", data=lambda d: {"email": d.user.email}, status=302
+        )
+
+    def test_otp_request_async(self):
+        self.assertQueryBudget({ANONYMOUS: 0}, "get", "otp_request_async")
+        self.assertQueryBudget(
+            {ANONYMOUS: 6}, "post", "otp_request_async", data=lambda d: {"email": d.user.email}, status=302
+        )
+
+    def test_otp_verify(self):
+        self.assertQueryBudget({ANONYMOUS: 0}, "get", "otp_verify")
+        self.assertQueryBudget(
+            {ANONYMOUS: 10}, "post", "otp_verify",
+            data=lambda d: {"email": d.user.email, "code": EmailOTP.create_for_user(d.user).code}, status=302,
+        )
+
+    def test_admins_list(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2, ANONYMOUS: 0}, "get", "admins-list",
+            status={SUPERADMIN: 200, ADMIN: 200, USER: 200, ANONYMOUS: 401},
+        )
+
+    def test_admins_detail(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "admins-detail", args=lambda d: [d.admin.pk]
+        )
+
+
+class AdminsApiTests(TestCase):
+    def test_admins_list_is_not_paginated(self):
+        CustomUser.objects.create_user("admin", role="ADMIN")
+        client = APIClient()
+        client.force_authenticate(CustomUser.objects.create_user("boss", role="SUPERADMIN"))
+        response = client.get(reverse("admins-list"))
+        self.assertEqual([admin["username"] for admin in response.json()], ["admin", "boss"])
+
+
+class JwtClaimsTests(TestCase):
+    """
+    Role, manager and active claims never outlive a change to the account:
+    not through the cache, and not by refreshing.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.boss = CustomUser.objects.create_user("boss", role="SUPERADMIN", is_superuser=True)
+        self.user = CustomUser.objects.create_user("worker", role="USER")
+        self.other = CustomUser.objects.create_user("other", role="USER")
+        self.own_task = Task.objects.create(title="Mine", assigned_to=self.user)
+        Task.objects.create(title="Theirs", assigned_to=self.other)
+        self.refresh = RoleClaimsTokenSerializer.get_token(self.boss)
+
+    def api(self, access):
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client
+
+    def listed(self, access):
+        response = self.api(access).get(reverse("tasks-list"))
+        self.assertEqual(response.status_code, 200)
+        return {task["title"] for task in response.json()["results"]}
+
+    def demote(self):
+        self.boss.role = "USER"
+        self.boss.is_superuser = False
+        self.boss.save()
+
+    def test_refresh_rebuilds_claims_from_the_database(self):
+        self.demote()
+        cache.clear()  # as in a fresh worker
+        for route in ("auth_refresh", "token_refresh"):
+            response = APIClient().post(reverse(route), {"refresh": str(self.refresh)})
+            self.assertEqual(response.status_code, 200)
+            self.assertEqual(AccessToken(response.json()["access"])["role"], "USER")
+            self.assertEqual(RefreshToken(response.json()["refresh"])["role"], "USER")
+            self.refresh = response.json()["refresh"]
+            for trust in (True, False):
+                with self.subTest(route=route, trust=trust), override_settings(JWT_TRUST_CLAIMS=trust):
+                    self.assertEqual(self.listed(response.json()["access"]), set())
+
+    def test_refresh_rejects_deactivated_and_deleted_users(self):
+        self.boss.is_active = False
+        self.boss.save()
+        cache.clear()
+        response = APIClient().post(reverse("auth_refresh"), {"refresh": str(self.refresh)})
+        self.assertEqual(response.status_code, 401)
+
+        refresh = RoleClaimsTokenSerializer.get_token(self.user)
+        self.user.delete()
+        response = APIClient().post(reverse("auth_refresh"), {"refresh": str(refresh)})
+        self.assertEqual(response.status_code, 401)
+
+    def test_demotion_revokes_an_issued_access_token(self):
+        access = str(self.refresh.access_token)
+        self.assertEqual(self.listed(access), {"Mine", "Theirs"})
+        self.demote()
+        with override_settings(JWT_TRUST_CLAIMS=True):
+            self.assertEqual(self.listed(access), set())  # the cached state wins
+        cache.clear()
+        with override_settings(JWT_TRUST_CLAIMS=False):
+            self.assertEqual(self.listed(access), set())  # read from the database
+
+    def test_deactivation_revokes_an_issued_access_token(self):
+        access = str(self.refresh.access_token)
+        self.boss.is_active = False
+        self.boss.save()
+        for trust in (True, False):
+            with self.subTest(trust=trust), override_settings(JWT_TRUST_CLAIMS=trust):
+                response = self.api(access).get(reverse("tasks-list"))
+                self.assertEqual(response.status_code, 401)
+
+    def test_rename_reaches_an_issued_access_token(self):
+        token = AccessToken(str(self.refresh.access_token))
+        self.boss.username = "chief"
+        self.boss.save()
+        with override_settings(JWT_TRUST_CLAIMS=True):
+            self.assertEqual(CachedJWTAuthentication().get_user(token).username, "chief")
+
+    def test_user_retrieves_own_task(self):
+        access = str(RoleClaimsTokenSerializer.get_token(self.user).access_token)
+        for trust in (True, False):
+            with self.subTest(trust=trust), override_settings(JWT_TRUST_CLAIMS=trust):
+                response = self.api(access).get(reverse("tasks-detail", args=[self.own_task.pk]))
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(response.json()["id"], self.own_task.pk)
+
+
+class BlacklistTests(TestCase):
+    """
+    Blacklist checks answer from the cache where that is safe, and a
+    blacklisted refresh token is never accepted again.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.user = CustomUser.objects.create_user("worker", role="USER")
+        self.token = RefreshToken.for_user(self.user)
+        self.jti = self.token["jti"]
+
+    @override_settings(JWT_BLACKLIST_CACHE_AUTHORITATIVE=True)
+    def test_authoritative_cache_never_reads_the_table(self):
+        with self.assertNumQueries(0):
+            self.assertFalse(is_blacklisted(self.jti))
+        self.token.blacklist()
+        with self.assertNumQueries(0):
+            self.assertTrue(is_blacklisted(self.jti))
+
+    @override_settings(JWT_BLACKLIST_CACHE_AUTHORITATIVE=False, JWT_BLACKLIST_MISS_CACHE_TIMEOUT=60)
+    def test_misses_are_cached_until_blacklisted(self):
+        with self.assertNumQueries(1):
+            self.assertFalse(is_blacklisted(self.jti))
+        with self.assertNumQueries(0):
+            self.assertFalse(is_blacklisted(self.jti))
+        self.token.blacklist()
+        with self.assertNumQueries(0):
+            self.assertTrue(is_blacklisted(self.jti))
+
+    @override_settings(JWT_BLACKLIST_CACHE_AUTHORITATIVE=False, JWT_BLACKLIST_MISS_CACHE_TIMEOUT=60)
+    def test_rows_added_elsewhere_clear_cached_misses(self):
+        self.assertFalse(is_blacklisted(self.jti))
+        # As from the Django admin: the row reaches the cache by signal.
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=self.jti))
+        with self.assertNumQueries(0):
+            self.assertTrue(is_blacklisted(self.jti))
+
+    @override_settings(JWT_BLACKLIST_CACHE_AUTHORITATIVE=False, JWT_BLACKLIST_MISS_CACHE_TIMEOUT=0)
+    def test_uncached_misses_read_the_table(self):
+        for _ in range(2):
+            with self.assertNumQueries(1):
+                self.assertFalse(is_blacklisted(self.jti))
+        BlacklistedToken.objects.create(token=OutstandingToken.objects.get(jti=self.jti))
+        cache.clear()  # another worker's cache never saw it
+        self.assertTrue(is_blacklisted(self.jti))
+
+    def test_rotated_refresh_token_is_rejected(self):
+        client = APIClient()
+        first = client.post(reverse("auth_refresh"), {"refresh": str(self.token)})
+        self.assertEqual(first.status_code, 200)
+        replay = client.post(reverse("auth_refresh"), {"refresh": str(self.token)})
+        self.assertEqual(replay.status_code, 401)
+
+    def test_compact_token_blacklist_deletes_expired_tokens(self):
+        expired = RefreshToken.for_user(self.user)
+        expired.blacklist()
+        OutstandingToken.objects.filter(jti=expired["jti"]).update(
+            expires_at=timezone.now() - timedelta(hours=1)
+        )
+        call_command("compact_token_blacklist", stdout=io.StringIO())
+        self.assertEqual(list(OutstandingToken.objects.values_list("jti", flat=True)), [self.jti])
+        self.assertFalse(BlacklistedToken.objects.exists())
+        with connection.cursor() as cursor:
+            constraints = connection.introspection.get_constraints(cursor, "token_blacklist_outstandingtoken")
+        self.assertEqual(constraints["outstanding_expires_idx"]["columns"], ["expires_at"])
+
+
+class EmailOTPTests(TestCase):
+    """
+    Codes are single use and stop working after MAX_ATTEMPTS tries.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("user", email="user@example.com", role="USER")
+        self.otp = EmailOTP.create_for_user(self.user)
+
+    def wrong(self):
+        return "000000" if self.otp.code != "000000" else "111111"
+
+    def test_single_use(self):
+        self.assertTrue(EmailOTP.consume(self.user, self.otp.code))
+        self.assertFalse(EmailOTP.consume(self.user, self.otp.code))
+        self.otp.refresh_from_db()
+        self.assertIsNotNone(self.otp.used_at)
+        self.assertFalse(self.otp.is_valid())
+
+    def test_failed_attempts_lock_out_the_code(self):
+        other = CustomUser.objects.create_user("other", email="other@example.com", role="USER")
+        theirs = EmailOTP.create_for_user(other)
+        for attempt in range(1, EmailOTP.MAX_ATTEMPTS + 1):
+            self.assertFalse(EmailOTP.consume(self.user, self.wrong()))
+            self.otp.refresh_from_db()
+            self.assertEqual(self.otp.attempts, attempt)
+        self.assertFalse(self.otp.is_valid())
+        self.assertFalse(EmailOTP.consume(self.user, self.otp.code))
+        self.otp.refresh_from_db()
+        self.assertEqual((self.otp.attempts, self.otp.used_at), (EmailOTP.MAX_ATTEMPTS, None))
+        # Another user's codes are not charged for these attempts.
+        theirs.refresh_from_db()
+        self.assertEqual(theirs.attempts, 0)
+        self.assertTrue(EmailOTP.consume(other, theirs.code))
+
+    def test_attempts_below_the_limit_still_allow_the_right_code(self):
+        for _ in range(EmailOTP.MAX_ATTEMPTS - 1):
+            EmailOTP.consume(self.user, self.wrong())
+        self.assertTrue(EmailOTP.consume(self.user, self.otp.code))
+
+    def test_expired_code(self):
+        EmailOTP.objects.filter(pk=self.otp.pk).update(expires_at=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(EmailOTP.consume(self.user, self.otp.code))
+        response = self.client.post(reverse("otp_verify"), {"email": self.user.email, "code": self.otp.code})
+        self.assertContains(response, "OTP has expired")
+
+    def test_verify_view_logs_in_once(self):
+        data = {"email": self.user.email, "code": self.otp.code}
+        self.assertEqual(self.client.post(reverse("otp_verify"), data).status_code, 302)
+        self.client.logout()
+        response = self.client.post(reverse("otp_verify"), data)
+        self.assertContains(response, "Invalid OTP code")
+        self.assertNotIn("_auth_user_id", self.client.session)
+
+
+@override_settings(OUTBOX_DISPATCH_ON_COMMIT=False, OUTBOX_RETRY_BASE_SECONDS=10, OUTBOX_MAX_ATTEMPTS=3)
+class OutboxTests(TestCase):
+    """
+    Claiming, retries and cleanup of queued email, sent through
+    LocMemSender.
+    """
+
+    def setUp(self):
+        self.sender = outbox.get_sender()
+        self.sender.sent.clear()
+
+    def queue(self, **kwargs):
+        return outbox.enqueue("someone@example.com", "Your code", "<p>123456</p>", **kwargs)
+
+    def failing(self):
+        return mock.patch.object(self.sender, "send", side_effect=RuntimeError("Brevo is down"))
+
+    def test_tests_never_reach_brevo(self):
+        self.assertIsInstance(self.sender, outbox.LocMemSender)
+        self.assertIsNot(outbox.LocMemSender().sent, self.sender.sent)
+
+    def test_claim_leases_due_rows_once(self):
+        first, second, third = (self.queue() for _ in range(3))
+        before = timezone.now()
+
+        self.assertEqual([m.pk for m in outbox.claim(2)], [first.pk, second.pk])
+        leased = OutboundEmail.objects.get(pk=first.pk)
+        self.assertGreaterEqual(leased.next_attempt_at, before + outbox.CLAIM_LEASE)
+        self.assertEqual([m.pk for m in outbox.claim(10)], [third.pk])
+        self.assertEqual(outbox.claim(10), [])
+
+    def test_claim_skips_locked_rows_where_supported(self):
+        self.queue()
+        select_for_update = QuerySet.select_for_update
+        for supported in (True, False):
+            with self.subTest(supported=supported), \
+                    mock.patch.object(connection.features, "has_select_for_update_skip_locked", supported), \
+                    mock.patch.object(QuerySet, "select_for_update", autospec=True,
+                                      side_effect=select_for_update) as locking:
+                outbox.claim(10)
+            self.assertEqual(locking.call_args.kwargs, {"skip_locked": supported})
+
+    def test_sent_message_loses_its_body(self):
+        message = self.queue()
+        self.assertTrue(outbox.deliver(message))
+
+        self.assertEqual([m.pk for m in self.sender.sent], [message.pk])
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundEmail.Status.SENT)
+        self.assertEqual((message.attempts, message.html_content), (1, ""))
+
+    def test_failures_back_off_exponentially(self):
+        message = self.queue()
+        for attempts, delay in ((1, 10), (2, 20)):
+            before = timezone.now()
+            with self.failing(), self.assertLogs("accounts.outbox", "WARNING"):
+                self.assertFalse(outbox.deliver(message))
+            message.refresh_from_db()
+            self.assertEqual(message.status, OutboundEmail.Status.PENDING)
+            self.assertEqual((message.attempts, message.last_error), (attempts, "Brevo is down"))
+            wait = (message.next_attempt_at - before).total_seconds()
+            self.assertTrue(delay * 0.8 <= wait <= delay * 1.2 + 1, wait)
+        self.assertEqual(message.html_content, "<p>123456</p>")
+
+    def test_gives_up_after_max_attempts(self):
+        message = self.queue()
+        with self.failing(), self.assertLogs("accounts.outbox", "WARNING"):
+            for _ in range(3):
+                outbox.deliver(message)
+                message.refresh_from_db()
+        self.assertEqual(message.status, OutboundEmail.Status.FAILED)
+        self.assertEqual((message.attempts, message.html_content), (3, ""))
+        self.assertEqual(outbox.claim(10), [])
+
+    def test_discards_messages_past_discard_after(self):
+        message = self.queue(discard_after=timezone.now() - timedelta(seconds=1))
+        self.assertFalse(outbox.deliver(message))
+
+        self.assertEqual(len(self.sender.sent), 0)
+        message.refresh_from_db()
+        self.assertEqual(message.status, OutboundEmail.Status.FAILED)
+        self.assertEqual((message.attempts, message.html_content), (0, ""))
+
+    def test_purge_otps_deletes_finished_emails(self):
+        old = timezone.now() - timedelta(days=2)
+        done = {status: self.queue() for status in OutboundEmail.Status.values}
+        for status, message in done.items():
+            OutboundEmail.objects.filter(pk=message.pk).update(status=status, created_at=old)
+        recent = self.queue()
+        OutboundEmail.objects.filter(pk=recent.pk).update(status=OutboundEmail.Status.SENT)
+
+        call_command("purge_otps", stdout=io.StringIO())
+        self.assertEqual(
+            set(OutboundEmail.objects.values_list("pk", flat=True)),
+            {done[OutboundEmail.Status.PENDING].pk, recent.pk},
+        )
+
+
+@skipUnless(connection.features.has_select_for_update_skip_locked, "needs SKIP LOCKED")
+@override_settings(OUTBOX_DISPATCH_ON_COMMIT=False)
+class OutboxConcurrencyTests(TransactionTestCase):
+    """
+    A row another worker holds locked is left to it, not waited for.
+    """
+
+    def test_claim_skips_rows_locked_elsewhere(self):
+        held, free = (outbox.enqueue("someone@example.com", "Code", "<p>1</p>") for _ in range(2))
+        locked, release = threading.Event(), threading.Event()
+
+        def other_worker():
+            try:
+                with transaction.atomic():
+                    list(OutboundEmail.objects.select_for_update().filter(pk=held.pk))
+                    locked.set()
+                    release.wait(10)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=other_worker)
+        thread.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            self.assertEqual([m.pk for m in outbox.claim(10)], [free.pk])
+        finally:
+            release.set()
+            thread.join()
@@ -1,6 +1,6 @@
 from rest_framework.routers import DefaultRouter
 from django.urls import path
-from .views import AdminViewSet, otp_request_view, otp_verify_view
+from .views import AdminViewSet, otp_request_async_view, otp_request_view, otp_verify_view
 
 # DRF Router for AdminViewSet
 router = DefaultRouter()
@@ -10,6 +10,8 @@ router.register(r"admins", AdminViewSet, basename="admins")
 urlpatterns = [
     # Email OTP endpoints
     path("auth/otp/request/", otp_request_view, name="otp_request"),
+    # Same form for ASGI servers (async view, email sent from the event loop)
+    path("auth/otp/request/async/", otp_request_async_view, name="otp_request_async"),
     path("auth/otp/verify/", otp_verify_view, name="otp_verify"),
 ]
 
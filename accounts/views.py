@@ -1,4 +1,9 @@
+import asyncio
+
+from asgiref.sync import sync_to_async
 from rest_framework import viewsets, permissions
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from task_manager_project.fieldsets import FIELDSET_PARAMETERS, SparseFieldsetMixin
 from .models import CustomUser
 from .serializers import UserSerializer
 from django.contrib.auth import get_user_model, login
@@ -8,21 +13,27 @@ from django.utils import timezone
 from django.views.decorators.http import require_http_methods
 from django.http import JsonResponse
 from django.conf import settings
+from django.db import transaction
 from .models import EmailOTP
-import sib_api_v3_sdk
-from sib_api_v3_sdk.rest import ApiException
-import os
+from . import outbox
 from django.contrib import messages
 
-class AdminViewSet(viewsets.ReadOnlyModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=FIELDSET_PARAMETERS),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
+)
+class AdminViewSet(SparseFieldsetMixin, viewsets.ReadOnlyModelViewSet):
     """
-    Simple API to list Admins and SuperAdmins
+    Simple API to list Admins and SuperAdmins (supports ?fields= / ?omit=)
     """
+    queryset = CustomUser.objects.all()
     serializer_class = UserSerializer
     permission_classes = [permissions.IsAuthenticated]
+    # Reads may come from a replica (task_manager_project.replicas).
+    replica_actions = ("list", "retrieve")
 
     def get_queryset(self):
-        return CustomUser.objects.filter(role__in=["ADMIN", "SUPERADMIN"])
+        return super().get_queryset().filter(role__in=["ADMIN", "SUPERADMIN"])
 
 
 User = get_user_model()
@@ -30,9 +41,9 @@ User = get_user_model()
 @require_http_methods(["GET", "POST"])
 def otp_request_view(request):
     """
-    Handles OTP email sending via Brevo REST API.
+    Handles OTP email sending via the email outbox.
     GET: shows email form
-    POST: generates OTP and sends via Brevo
+    POST: generates OTP and queues its email
     """
     if request.method == "GET":
         return render(request, "accounts/otp_request.html")
@@ -51,40 +62,59 @@ def otp_request_view(request):
 
     # We have exactly one user
     user = users.first()
+    issue_otp(user, email)
 
-    # Create OTP record
-    otp = EmailOTP.create_for_user(user, lifetime_minutes=10)
-
-    # ---------------- Brevo SDK Integration ----------------
-    configuration = sib_api_v3_sdk.Configuration()
-    BREVO_API_KEY = os.environ.get("BREVO_API_KEY")
-    configuration.api_key['api-key'] = BREVO_API_KEY
-
-    api_instance = sib_api_v3_sdk.TransactionalEmailsApi(sib_api_v3_sdk.ApiClient(configuration))
+    messages.success(request, "A one-time passcode has been sent to your email.")
+    return redirect("otp_verify")  # Go to verify page
 
-    subject = "Your One-Time Passcode"
-    html_content = f"""
-    <p>Hello,</p>
-    <p>Your one-time passcode is: <strong>{otp.code}</strong></p>
-    <p>This code will expire in 10 minutes.</p>
+@require_http_methods(["GET", "POST"])
+async def otp_request_async_view(request):
     """
+    otp_request_view for ASGI servers: the account lookup uses the async
+    ORM and the email is sent after the response by a task on the event
+    loop (see accounts.outbox), so a slow email provider never delays it.
+    """
+    # Templates read request.user; resolve it here rather than lazily.
+    request.user = await request.auser()
+    if request.method == "GET":
+        return render(request, "accounts/otp_request.html")
 
-    send_smtp_email = sib_api_v3_sdk.SendSmtpEmail(
-        to=[{"email": email}],
-        subject=subject,
-        html_content=html_content,
-        sender={"email": os.getenv("DEFAULT_FROM_EMAIL", "no-reply@yourdomain.com")}
-    )
+    email = (request.POST.get("email") or "").strip().lower()
 
-    try:
-        api_instance.send_transac_email(send_smtp_email)
-    except ApiException as e:
-        messages.error(request, "Error sending email. Please try again later.")
+    # One query tells none, one and several accounts apart.
+    users = [
+        user async for user in User.objects.filter(email__iexact=email, is_active=True).order_by("pk")[:2]
+    ]
+    if not users:
+        messages.error(request, "No account found with this email. Please create an account first.")
         return render(request, "accounts/otp_request.html")
-    # --------------------------------------------------------
+
+    if len(users) > 1:
+        messages.error(request, "Multiple accounts found with this email. Please contact support or use a different email.")
+        return render(request, "accounts/otp_request.html")
+
+    await sync_to_async(issue_otp)(users[0], email, loop=asyncio.get_running_loop())
 
     messages.success(request, "A one-time passcode has been sent to your email.")
-    return redirect("otp_verify")  # Go to verify page
+    return redirect("otp_verify")
+
+def issue_otp(user, email, loop=None):
+    """
+    Create an OTP for ``user`` and queue its email in one transaction.
+    ``loop``: the calling async view's event loop (see outbox.enqueue).
+    """
+    subject = "Your One-Time Passcode"
+    with transaction.atomic():
+        # Create OTP record and queue its email together; delivery happens
+        # outside the request (see accounts.outbox).
+        otp = EmailOTP.create_for_user(user, lifetime_minutes=10)
+        html_content = (
+            "<p>Hello,</p>"
+            f"<p>Your one-time passcode is: <strong>{otp.code}</strong></p>"
+            "<p>This code will expire in 10 minutes.</p>"
+        )
+        outbox.enqueue(email, subject, html_content, discard_after=otp.expires_at, loop=loop)
+    return otp
 
 @require_http_methods(["GET", "POST"])
 def otp_verify_view(request):
@@ -105,16 +135,16 @@ def otp_verify_view(request):
         messages.error(request, "Invalid email or OTP.")
         return render(request, "accounts/otp_verify.html")
 
-    # Look up OTP record
-    otp_record = EmailOTP.objects.filter(user=user, code=code).order_by("-created_at").first()
-
-    if not otp_record:
-        messages.error(request, "Invalid OTP code.")
-        return render(request, "accounts/otp_verify.html")
-
-    # Check expiration
-    if otp_record.expires_at < timezone.now():
-        messages.error(request, "OTP has expired. Please request a new one.")
+    # Consume the OTP with a single conditional UPDATE (single use, bounded
+    # attempts); only the failure path needs another look at the table.
+    if not EmailOTP.consume(user, code):
+        expired = EmailOTP.objects.filter(
+            user=user, code=code, used_at__isnull=True, expires_at__lte=timezone.now()
+        ).exists()
+        if expired:
+            messages.error(request, "OTP has expired. Please request a new one.")
+        else:
+            messages.error(request, "Invalid OTP code.")
         return render(request, "accounts/otp_verify.html")
 
     # OTP is valid → log user in
@@ -0,0 +1,195 @@
+"""
+Incrementally maintained dashboard counters.
+
+Receivers in admin_panel.signals translate user/task changes into deltas
+which are applied here with ``UPDATE ... SET value = value + n``. The
+dashboard then reads every number it needs in one indexed query.
+
+Every task write changes a global status counter inside its transaction,
+so each counter is sharded: a worker thread always updates its own shard
+row, and concurrent writers only wait on each other when they share a
+shard. Readers sum the shards.
+"""
+import os
+import threading
+from collections import Counter
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Q, Sum
+
+from tasks.models import Task
+from .models import DashboardCounter
+
+USER_ROLE = DashboardCounter.USER_ROLE
+TASK_STATUS = DashboardCounter.TASK_STATUS
+TEAM_STATUS = DashboardCounter.TEAM_STATUS
+
+
+def writer_shard():
+    """
+    The shard this process and thread write to: fixed per writer, so its
+    rows exist after its first write and concurrent writers spread out.
+    """
+    return hash((os.getpid(), threading.get_ident())) % settings.DASHBOARD_COUNTER_SHARDS
+
+
+def apply(deltas):
+    """
+    Add each ``{(kind, ref, name): delta}`` to this writer's shard of its
+    counter, creating rows on first use.
+    """
+    deltas = {key: delta for key, delta in deltas.items() if delta}
+    if not deltas:
+        return
+    shard = writer_shard()
+    with transaction.atomic():
+        for (kind, ref, name), delta in sorted(deltas.items()):
+            counter = DashboardCounter.objects.filter(kind=kind, ref=ref, name=name, shard=shard)
+            if counter.update(value=F("value") + delta):
+                continue
+            try:
+                with transaction.atomic():
+                    DashboardCounter.objects.create(kind=kind, ref=ref, name=name, shard=shard, value=delta)
+            except IntegrityError:
+                # Another writer created the row first.
+                counter.update(value=F("value") + delta)
+
+
+def task_deltas(changes):
+    """
+    Deltas for a list of ``(before, after)`` Task.tracked_state() pairs.
+    Edits that keep status and assignee unchanged cost nothing.
+    """
+    relevant = [
+        (before, after)
+        for before, after in changes
+        if before is None
+        or after is None
+        or before["status"] != after["status"]
+        or before["assigned_to_id"] != after["assigned_to_id"]
+    ]
+    if not relevant:
+        return {}
+
+    assignees = {
+        state["assigned_to_id"]
+        for pair in relevant
+        for state in pair
+        if state is not None
+    }
+    managers = dict(
+        get_user_model().objects.filter(pk__in=assignees).values_list("id", "manager_id")
+    )
+
+    deltas = Counter()
+    for before, after in relevant:
+        for state, sign in ((before, -1), (after, 1)):
+            if state is None:
+                continue
+            deltas[(TASK_STATUS, 0, state["status"])] += sign
+            manager_id = managers.get(state["assigned_to_id"])
+            if manager_id:
+                deltas[(TEAM_STATUS, manager_id, state["status"])] += sign
+    return deltas
+
+
+def user_deltas(user, before, after):
+    """
+    Deltas for one user write. Moving a user to another Admin moves their
+    tasks between the two teams' counters.
+    """
+    deltas = Counter()
+    if before is not None:
+        deltas[(USER_ROLE, 0, before["role"])] -= 1
+    if after is not None:
+        deltas[(USER_ROLE, 0, after["role"])] += 1
+
+    old_manager = before["manager_id"] if before else None
+    new_manager = after["manager_id"] if after else None
+    if old_manager != new_manager and after is not None and before is not None:
+        per_status = (
+            Task.objects.filter(assigned_to=user)
+            .values_list("status")
+            .annotate(n=Count("id"))
+            .order_by()
+        )
+        for status, n in per_status:
+            if old_manager:
+                deltas[(TEAM_STATUS, old_manager, status)] -= n
+            if new_manager:
+                deltas[(TEAM_STATUS, new_manager, status)] += n
+    return deltas
+
+
+def forget_team(admin_id):
+    # A deleted Admin's users lose their manager through a bulk SET NULL
+    # that sends no signals; their team counters simply go away.
+    DashboardCounter.objects.filter(kind=TEAM_STATUS, ref=admin_id).delete()
+
+
+def compute_all():
+    """
+    Exact counts straight from the source tables, for reconciliation.
+    """
+    User = get_user_model()
+    counts = {}
+    for role, n in User.objects.values_list("role").annotate(n=Count("id")).order_by():
+        counts[(USER_ROLE, 0, role)] = n
+    for status, n in Task.objects.values_list("status").annotate(n=Count("id")).order_by():
+        counts[(TASK_STATUS, 0, status)] = n
+    team = (
+        Task.objects.filter(assigned_to__manager__isnull=False)
+        .values_list("assigned_to__manager", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for manager_id, status, n in team:
+        counts[(TEAM_STATUS, manager_id, status)] = n
+    return counts
+
+
+def total(kind, ref=0, names=None):
+    """
+    Sum of the counters of one kind (optionally only some names), over
+    every shard.
+    """
+    counters = DashboardCounter.objects.filter(kind=kind, ref=ref)
+    if names is not None:
+        counters = counters.filter(name__in=names)
+    return counters.aggregate(total=Sum("value"))["total"] or 0
+
+
+def read(user):
+    """
+    Everything the dashboard shows for ``user``, in one query:
+    global role/status counts plus the per-Admin team counts visible to them.
+    """
+    scope = Q(kind__in=[USER_ROLE, TASK_STATUS])
+    if user.is_superadmin():
+        scope |= Q(kind=TEAM_STATUS)
+    elif user.is_admin():
+        scope |= Q(kind=TEAM_STATUS, ref=user.id)
+
+    roles, statuses, teams = Counter(), Counter(), {}
+    for kind, ref, name, value in DashboardCounter.objects.filter(scope).values_list(
+        "kind", "ref", "name", "value"
+    ):
+        if kind == USER_ROLE:
+            roles[name] += value
+        elif kind == TASK_STATUS:
+            statuses[name] += value
+        else:
+            teams.setdefault(ref, Counter())[name] += value
+    return roles, statuses, teams
+
+
+def stored():
+    """
+    Current value of every counter, summed over its shards.
+    """
+    values = Counter()
+    for kind, ref, name, value in DashboardCounter.objects.values_list("kind", "ref", "name", "value"):
+        values[(kind, ref, name)] += value
+    return values
@@ -0,0 +1,63 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from admin_panel import counters
+from admin_panel.models import DashboardCounter
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute dashboard counters from the users and tasks tables and "
+        "fix any drift. Safe to run periodically (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Lock the counters so concurrent increments wait for the rebuild.
+            stored = {}
+            for c in DashboardCounter.objects.select_for_update():
+                stored.setdefault((c.kind, c.ref, c.name), {})[c.shard] = c
+            exact = counters.compute_all()
+
+            drift = []
+            for key in stored.keys() | exact.keys():
+                have = sum(c.value for c in stored.get(key, {}).values())
+                want = exact.get(key, 0)
+                if have != want:
+                    drift.append((key, have, want))
+
+            for (kind, ref, name), have, want in sorted(drift):
+                self.stdout.write(f"{kind}:{ref}:{name} {have} -> {want}")
+
+            if options["dry_run"]:
+                self.stdout.write(f"{len(drift)} counters drifted (dry run).")
+                return
+
+            DashboardCounter.objects.exclude(
+                pk__in=[c.pk for key, shards in stored.items() if key in exact for c in shards.values()]
+            ).delete()
+            # A drifted counter is rewritten onto shard 0. Every shard row is
+            # created up front so increments never take the insert path.
+            drifted = {key for key, have, want in drift}
+            missing = []
+            for key, value in exact.items():
+                kind, ref, name = key
+                shards = stored.get(key, {})
+                for shard in range(settings.DASHBOARD_COUNTER_SHARDS):
+                    want = (value if shard == 0 else 0) if key in drifted else None
+                    if shard not in shards:
+                        missing.append(DashboardCounter(kind=kind, ref=ref, name=name, shard=shard, value=want or 0))
+                    elif want is not None and shards[shard].value != want:
+                        shards[shard].value = want
+                        shards[shard].save(update_fields=["value"])
+                if key in drifted:
+                    DashboardCounter.objects.filter(
+                        kind=kind, ref=ref, name=name, shard__gte=settings.DASHBOARD_COUNTER_SHARDS
+                    ).update(value=0)
+            DashboardCounter.objects.bulk_create(missing)
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled; {len(drift)} counters corrected."))
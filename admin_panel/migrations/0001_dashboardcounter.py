@@ -0,0 +1,64 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:38
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def backfill_counters(apps, schema_editor):
+    CustomUser = apps.get_model("accounts", "CustomUser")
+    Task = apps.get_model("tasks", "Task")
+    DashboardCounter = apps.get_model("admin_panel", "DashboardCounter")
+
+    rows = []
+    for role, n in CustomUser.objects.values_list("role").annotate(n=Count("id")).order_by():
+        rows.append(DashboardCounter(kind="user_role", ref=0, name=role, value=n))
+    for status, n in Task.objects.values_list("status").annotate(n=Count("id")).order_by():
+        rows.append(DashboardCounter(kind="task_status", ref=0, name=status, value=n))
+    team = (
+        Task.objects.filter(assigned_to__manager__isnull=False)
+        .values_list("assigned_to__manager", "status")
+        .annotate(n=Count("id"))
+        .order_by()
+    )
+    for manager_id, status, n in team:
+        rows.append(DashboardCounter(kind="team_status", ref=manager_id, name=status, value=n))
+    DashboardCounter.objects.bulk_create(rows)
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        ("accounts", "0004_customuser_indexes"),
+        ("tasks", "0003_task_indexes"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="DashboardCounter",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("kind", models.CharField(max_length=20)),
+                ("ref", models.BigIntegerField(default=0)),
+                ("name", models.CharField(max_length=20)),
+                ("value", models.BigIntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("kind", "ref", "name"), name="dashboard_counter_key"
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("admin_panel", "0001_dashboardcounter"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="dashboardcounter",
+            name="dashboard_counter_key",
+        ),
+        migrations.AddField(
+            model_name="dashboardcounter",
+            name="shard",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name="dashboardcounter",
+            constraint=models.UniqueConstraint(
+                fields=("kind", "ref", "name", "shard"), name="dashboard_counter_key"
+            ),
+        ),
+    ]
@@ -1,3 +1,32 @@
 from django.db import models
 
-# Create your models here.
+
+class DashboardCounter(models.Model):
+    """
+    Pre-aggregated counts for the dashboard, kept current by
+    admin_panel.counters and rebuilt by ``manage.py reconcile_counters``.
+
+    kind="user_role",   ref=0,          name=<role>    -> users with that role
+    kind="task_status", ref=0,          name=<status>  -> tasks in that status
+    kind="team_status", ref=<admin id>, name=<status>  -> tasks of that Admin's users
+
+    Each counter is split over DASHBOARD_COUNTER_SHARDS rows (``shard``) so
+    concurrent writers update different rows; its value is their sum.
+    """
+    USER_ROLE = "user_role"
+    TASK_STATUS = "task_status"
+    TEAM_STATUS = "team_status"
+
+    kind = models.CharField(max_length=20)
+    ref = models.BigIntegerField(default=0)
+    name = models.CharField(max_length=20)
+    shard = models.PositiveSmallIntegerField(default=0)
+    value = models.BigIntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(fields=["kind", "ref", "name", "shard"], name="dashboard_counter_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.kind}:{self.ref}:{self.name}#{self.shard} = {self.value}"
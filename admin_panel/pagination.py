@@ -0,0 +1,59 @@
+"""
+Page-number pagination for the admin panel HTML lists without COUNT(*).
+
+Totals come from the caller: the dashboard counters when they describe the
+list exactly, otherwise a count cached per user and query string for
+PANEL_COUNT_CACHE_TIMEOUT seconds. Pages past MAX_PAGES are not served, so
+the OFFSET of any page stays bounded; deeper rows are reached by filtering.
+"""
+import hashlib
+
+from django.conf import settings
+from django.core.cache import cache
+from django.core.paginator import Paginator
+from django.utils.functional import cached_property
+
+PER_PAGE = 50
+MAX_PAGES = 200
+
+
+class CountedPaginator(Paginator):
+    """
+    Paginator that trusts a total supplied up front instead of counting.
+    """
+
+    def __init__(self, object_list, per_page, count, **kwargs):
+        super().__init__(object_list, per_page, **kwargs)
+        self._known_count = count
+
+    @cached_property
+    def count(self):
+        return self._known_count
+
+
+def cached_count(request, queryset):
+    """
+    COUNT(*) of ``queryset``, remembered per user and filter combination.
+    """
+    params = sorted((k, v) for k, v in request.GET.lists() if k != "page")
+    digest = hashlib.sha1(repr((request.path, params)).encode()).hexdigest()
+    key = f"panel_count:{request.user.pk}:{digest}"
+    count = cache.get(key)
+    if count is None:
+        count = queryset.count()
+        cache.set(key, count, settings.PANEL_COUNT_CACHE_TIMEOUT)
+    return count
+
+
+def paginate(request, queryset, count=None, per_page=PER_PAGE):
+    """
+    Return the requested page of ``queryset``. ``count`` is the list total
+    if the caller knows it; otherwise a cached count is used.
+    """
+    if count is None:
+        count = cached_count(request, queryset)
+    paginator = CountedPaginator(queryset, per_page, min(count, per_page * MAX_PAGES))
+    page = paginator.get_page(request.GET.get("page"))
+    page.total = count
+    page.truncated = count > paginator.count
+    return page
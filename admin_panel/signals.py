@@ -0,0 +1,17 @@
+from django.dispatch import receiver
+
+from accounts.signals import user_changed
+from tasks.signals import tasks_changed
+from . import counters
+
+
+@receiver(tasks_changed)
+def _count_tasks(sender, changes, **kwargs):
+    counters.apply(counters.task_deltas(changes))
+
+
+@receiver(user_changed)
+def _count_users(sender, instance, before, after, **kwargs):
+    counters.apply(counters.user_deltas(instance, before, after))
+    if after is None and before["role"] == "ADMIN":
+        counters.forget_team(instance.pk)
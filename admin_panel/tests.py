@@ -1,3 +1,231 @@
-from django.test import TestCase
+from io import StringIO
+from itertools import cycle
+from unittest import mock
 
-# Create your tests here.
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from accounts.models import CustomUser
+from admin_panel import counters
+from admin_panel.models import DashboardCounter
+from tasks.models import Task
+
+from task_manager_project.testing import (
+    ADMIN, ANONYMOUS, PASSWORD, SUPERADMIN, USER, QueryBudgetTestCase, route_names,
+)
+
+
+class AdminPanelQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Maximum queries per page for the admin panel, the Django admin, the API
+    docs and the metrics endpoint, per role (session-authenticated).
+    """
+
+    api = False
+
+    BUDGETED = (
+        "admin_panel:dashboard", "admin_panel:login", "admin_panel:logout", "admin_panel:admins_list",
+        "admin_panel:create_admin", "admin_panel:tasks_list", "admin_panel:create_task",
+        "admin_panel:task_report", "admin_panel:list_users", "admin_panel:create_user",
+        "admin_panel:assign_user_to_admin",
+        "admin:index", "admin:tasks_task_changelist", "admin:tasks_task_change",
+        "admin:accounts_customuser_changelist", "admin:accounts_customuser_change",
+        "schema", "swagger-ui", "redoc", "metrics",
+    )
+
+    def test_every_route_is_budgeted(self):
+        # Of the Django admin, only the pages listing or editing this
+        # project's models are budgeted.
+        routes = route_names("admin_panel.urls", "admin_panel") | {"schema", "swagger-ui", "redoc", "metrics"} | {
+            f"admin:{model}_{page}"
+            for model in ("tasks_task", "accounts_customuser")
+            for page in ("changelist", "change")
+        }
+        self.assertRoutesBudgeted(routes, self.BUDGETED)
+
+    # ------------------------------
+    # Admin panel
+    # ------------------------------
+
+    def test_dashboard(self):
+        # Users and anonymous visitors are sent to the login page.
+        self.assertQueryBudget(
+            {SUPERADMIN: 4, ADMIN: 4, USER: 2, ANONYMOUS: 0}, "get", "admin_panel:dashboard",
+            status={SUPERADMIN: 200, ADMIN: 200, USER: 302, ANONYMOUS: 302},
+        )
+
+    def test_login(self):
+        self.assertQueryBudget({ANONYMOUS: 0}, "get", "admin_panel:login")
+        self.assertQueryBudget(
+            {ANONYMOUS: 9}, "post", "admin_panel:login",
+            data=lambda d: {"username": d.admin.username, "password": PASSWORD}, status=302,
+        )
+
+    def test_logout(self):
+        self.assertQueryBudget({SUPERADMIN: 4, ADMIN: 4, USER: 4}, "get", "admin_panel:logout", status=302)
+
+    def test_admins_list(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 4, ADMIN: 4, USER: 2}, "get", "admin_panel:admins_list",
+            status={SUPERADMIN: 200, ADMIN: 200, USER: 302},
+        )
+
+    def test_create_admin(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2}, "get", "admin_panel:create_admin", status={SUPERADMIN: 200, ADMIN: 302}
+        )
+        self.assertQueryBudget(
+            {SUPERADMIN: 7}, "post", "admin_panel:create_admin",
+            data={
+                "username": "new_admin", "email": "new_admin@example.com", "first_name": "New",
+                "last_name": "Admin", "role": "ADMIN", "password": "New-admin-123!",
+            },
+            status=302,
+        )
+
+    def test_tasks_list(self):
+        self.assertQueryBudget({SUPERADMIN: 4, ADMIN: 4, USER: 4}, "get", "admin_panel:tasks_list")
+
+    def test_tasks_list_filtered(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 4, ADMIN: 4, USER: 4}, "get", "admin_panel:tasks_list", query="?status=TODO&page=2"
+        )
+
+    def test_tasks_list_search(self):
+        self.assertQueryBudget({SUPERADMIN: 4, ADMIN: 4, USER: 4}, "get", "admin_panel:tasks_list", query="?q=task")
+
+    def test_create_task(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 3, ADMIN: 3, USER: 2}, "get", "admin_panel:create_task",
+            status={SUPERADMIN: 200, ADMIN: 200, USER: 302},
+        )
+        self.assertQueryBudget(
+            {SUPERADMIN: 10, ADMIN: 10}, "post", "admin_panel:create_task",
+            data=lambda d: {"title": "From the panel", "assigned_to": d.user.pk, "status": "TODO"}, status=302,
+        )
+
+    def test_task_report(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 3, ADMIN: 4, USER: 3}, "get", "admin_panel:task_report", args=lambda d: [d.completed.pk]
+        )
+
+    def test_list_users(self):
+        self.assertQueryBudget({SUPERADMIN: 4, ADMIN: 4, USER: 2}, "get", "admin_panel:list_users")
+
+    def test_create_user(self):
+        # Only SuperAdmins create accounts; the others are redirected.
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "admin_panel:create_user",
+            status={SUPERADMIN: 200, ADMIN: 302, USER: 302},
+        )
+        self.assertQueryBudget(
+            {SUPERADMIN: 7, ADMIN: 2}, "post", "admin_panel:create_user",
+            data={
+                "username": "new_user", "email": "new_user@example.com", "first_name": "New",
+                "last_name": "User", "password1": "New-user-123!", "password2": "New-user-123!",
+            },
+            status=302,
+        )
+
+    def test_assign_user_to_admin(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 4, ADMIN: 2, USER: 2}, "get", "admin_panel:assign_user_to_admin",
+            args=lambda d: [d.user.pk], status={SUPERADMIN: 200, ADMIN: 302, USER: 302},
+        )
+        # Moving a user re-files their hours rollups: one UPDATE per bucket
+        # of their history (a single day here).
+        self.assertQueryBudget(
+            {SUPERADMIN: 22}, "post", "admin_panel:assign_user_to_admin",
+            args=lambda d: [d.user.pk], data=lambda d: {"manager": d.other_admin.pk}, status=302,
+        )
+
+    # ------------------------------
+    # Django admin, API docs and metrics
+    # ------------------------------
+
+    def test_django_admin(self):
+        self.assertQueryBudget({SUPERADMIN: 5}, "get", "admin:index")
+        for model in ("tasks_task", "accounts_customuser"):
+            self.assertQueryBudget({SUPERADMIN: 7}, "get", f"admin:{model}_changelist")
+
+    def test_django_admin_change(self):
+        self.assertQueryBudget({SUPERADMIN: 8}, "get", "admin:tasks_task_change", args=lambda d: [d.task.pk])
+        self.assertQueryBudget(
+            {SUPERADMIN: 10}, "get", "admin:accounts_customuser_change", args=lambda d: [d.user.pk]
+        )
+
+    def test_api_docs_and_metrics(self):
+        for route in ("schema", "swagger-ui", "redoc"):
+            self.assertQueryBudget({ANONYMOUS: 0}, "get", route)
+        with override_settings(METRICS_ENABLED=True, METRICS_TOKEN="scrape"):
+            self.assertQueryBudget({ANONYMOUS: 0}, "get", "metrics", HTTP_AUTHORIZATION="Bearer scrape")
+
+
+class ListUsersTests(TestCase):
+    def test_admin_total_counts_only_listed_users(self):
+        admin = CustomUser.objects.create_user("admin", role="ADMIN")
+        CustomUser.objects.create_user("user", role="USER", manager=admin)
+        # Promoted after being assigned: still managed, but not a USER.
+        CustomUser.objects.create_user("promoted", role="ADMIN", manager=admin)
+        self.client.force_login(admin)
+        page = self.client.get(reverse("admin_panel:list_users")).context["page_obj"]
+        self.assertEqual([user.username for user in page], ["user"])
+        self.assertEqual(page.total, 1)
+
+
+@override_settings(DASHBOARD_COUNTER_SHARDS=4)
+class CounterTests(TestCase):
+    """
+    The incrementally maintained counters agree with reconcile_counters
+    after every kind of write, however the writes spread over shards.
+    """
+
+    def setUp(self):
+        patcher = mock.patch.object(counters, "writer_shard", side_effect=cycle(range(4)))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def assertReconciled(self):
+        stored = {key: value for key, value in counters.stored().items() if value}
+        self.assertEqual(stored, counters.compute_all())
+        out = StringIO()
+        call_command("reconcile_counters", "--dry-run", stdout=out)
+        self.assertIn("0 counters drifted", out.getvalue())
+
+    def test_task_writes(self):
+        admin = CustomUser.objects.create_user("admin", role="ADMIN")
+        other = CustomUser.objects.create_user("other", role="ADMIN")
+        user = CustomUser.objects.create_user("user", role="USER", manager=admin)
+        peer = CustomUser.objects.create_user("peer", role="USER", manager=other)
+        tasks = [Task.objects.create(title=f"t{i}", assigned_to=user, created_by=admin) for i in range(3)]
+        self.assertReconciled()
+        self.assertEqual(DashboardCounter.objects.filter(kind=counters.TASK_STATUS).count(), 3)
+
+        tasks[0].status = Task.Status.IN_PROGRESS
+        tasks[0].save()
+        self.assertReconciled()
+        tasks[1].assigned_to = peer
+        tasks[1].save()
+        self.assertReconciled()
+        tasks[2].delete()
+        self.assertReconciled()
+
+        user.manager = other
+        user.save()
+        self.assertReconciled()
+        other.delete()
+        self.assertReconciled()
+
+    def test_reconcile_fills_every_shard(self):
+        user = CustomUser.objects.create_user("user", role="USER")
+        Task.objects.create(title="t", assigned_to=user)
+        DashboardCounter.objects.filter(kind=counters.TASK_STATUS).update(value=5)
+        call_command("reconcile_counters", stdout=StringIO())
+        rows = DashboardCounter.objects.filter(kind=counters.TASK_STATUS, name=Task.Status.TODO)
+        self.assertEqual(sorted(rows.values_list("shard", "value")), [(0, 1), (1, 0), (2, 0), (3, 0)])
+
+        # With every shard present, increments never insert.
+        Task.objects.create(title="u", assigned_to=user)
+        self.assertEqual(rows.count(), 4)
+        self.assertReconciled()
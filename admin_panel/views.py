@@ -3,9 +3,64 @@ from django.contrib.auth.forms import AuthenticationForm
 from django.contrib.auth import login, logout
 from django.contrib import messages
 from django.contrib.auth.decorators import login_required
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
 from accounts.models import CustomUser
 from .forms import CreateAdminForm, TaskForm, AssignUserForm, CreateUserForm
 from tasks.models import Task
+from tasks.scope import TaskScope
+from tasks.filters import (
+    DEFAULT_ORDERING, ORDERINGS, TaskFilterError, apply_task_filters, parse_task_filters, parse_task_ordering,
+)
+from tasks.search import search
+from task_manager_project.replicas import replica_reads
+from . import counters
+from .pagination import paginate
+
+# ------------------------------
+# Helpers
+# ------------------------------
+
+def with_task_counts(users):
+    """
+    Annotate total_tasks and open_tasks per user as correlated subqueries,
+    evaluated only for the rows of the page being rendered.
+    """
+    def count(tasks):
+        return Coalesce(Subquery(
+            tasks.order_by().values("assigned_to").annotate(n=Count("id")).values("n")
+        ), 0)
+
+    assigned = Task.objects.filter(assigned_to=OuterRef("pk"))
+    return users.annotate(
+        total_tasks=count(assigned),
+        open_tasks=count(assigned.filter(status__in=[Task.Status.TODO, Task.Status.IN_PROGRESS])),
+    )
+
+
+def scoped_tasks(scope, filters, ordering):
+    """
+    The tasks list of a TaskScope, narrowed by tasks.filters and sorted (also
+    EXPLAINed by ``manage.py bench_task_scopes``).
+    """
+    tasks = scope.filter_assigned(
+        Task.objects.select_related("assigned_to").defer("completion_report")
+    )
+    return apply_task_filters(tasks, filters).order_by(*ordering)
+
+
+def scoped_users(user):
+    """
+    The users list ``user`` may see, with manager names and task counts,
+    sorted (also EXPLAINed by ``manage.py bench_task_scopes``).
+    """
+    if user.is_superadmin():
+        users = CustomUser.objects.filter(role="USER")
+    elif user.is_admin():
+        users = CustomUser.objects.filter(role="USER", manager=user)
+    else:
+        users = CustomUser.objects.none()
+    return with_task_counts(users.select_related("manager")).order_by("username", "id")
 
 # ------------------------------
 # Decorators
@@ -54,25 +109,48 @@ def logout_view(request):
 # Dashboard
 # ------------------------------
 
+@replica_reads
 @staff_required
 def dashboard(request):
+    # One indexed read of the materialized counters (see admin_panel.counters).
+    roles, statuses, teams = counters.read(request.user)
     counts = {
-        "total_admins": CustomUser.objects.filter(role="ADMIN").count(),
-        "total_superadmins": CustomUser.objects.filter(role="SUPERADMIN").count(),
-        "total_users": CustomUser.objects.filter(role="USER").count(),
-        "total_tasks": Task.objects.count(),
+        "total_admins": roles["ADMIN"],
+        "total_superadmins": roles["SUPERADMIN"],
+        "total_users": roles["USER"],
+        "total_tasks": sum(statuses.values()),
     }
-    return render(request, "admin_panel/dashboard.html", {"counts": counts})
+    by_status = [(label, statuses[value]) for value, label in Task.Status.choices]
+
+    team_rows = []
+    if teams:
+        names = dict(CustomUser.objects.filter(pk__in=teams).values_list("id", "username"))
+        for admin_id, team in sorted(teams.items(), key=lambda item: names.get(item[0], "")):
+            team_rows.append({
+                "admin": names.get(admin_id, f"#{admin_id}"),
+                "statuses": [team[value] for value, _ in Task.Status.choices],
+                "total": sum(team.values()),
+            })
+
+    return render(request, "admin_panel/dashboard.html", {
+        "counts": counts,
+        "by_status": by_status,
+        "status_labels": [label for _, label in Task.Status.choices],
+        "team_rows": team_rows,
+    })
 
 # ------------------------------
 # Admins Management
 # ------------------------------
 
+@replica_reads
 @staff_required
 def admins_list(request):
-    # Show only ADMIN or SUPERADMIN roles
-    admins = CustomUser.objects.filter(role__in=["ADMIN", "SUPERADMIN"])
-    return render(request, "admin_panel/admins_list.html", {"admins": admins})
+    # Show only ADMIN or SUPERADMIN roles, one page at a time
+    roles = ["ADMIN", "SUPERADMIN"]
+    admins = CustomUser.objects.filter(role__in=roles).order_by("username", "id")
+    page = paginate(request, admins, counters.total(counters.USER_ROLE, names=roles))
+    return render(request, "admin_panel/admins_list.html", {"admins": page, "page_obj": page})
 
 @staff_required
 @superadmin_required
@@ -94,24 +172,39 @@ def create_admin(request):
 # Tasks Management
 # ------------------------------
 
+@replica_reads
 @login_required
 def tasks_list(request):
-    user = request.user
-    status_filter = request.GET.get("status")  # ① Capture ?status=
-
-    # ② Get base queryset depending on user role
-    if user.is_superadmin():
-        tasks = Task.objects.select_related("assigned_to").all()
-    elif user.is_admin():
-        tasks = Task.objects.select_related("assigned_to").filter(assigned_to__manager=user)
-    else:
-        tasks = Task.objects.select_related("assigned_to").filter(assigned_to=user)
-
-    # ③ Apply filter if ?status= present
-    if status_filter:
-        tasks = tasks.filter(status=status_filter)
-
-    return render(request, "admin_panel/tasks_list.html", {"tasks": tasks})
+    # ① Parse ?status=, ?assigned_to=, ?overdue=, ... (same rules as the API)
+    try:
+        scoped = not request.user.is_superadmin()
+        filters = parse_task_filters(request.GET, scoped=scoped)
+        ordering = parse_task_ordering(request.GET, filters, scoped=scoped)
+    except TaskFilterError as exc:
+        for field, errors in exc.errors.items():
+            messages.error(request, f"{field}: {' '.join(errors)}")
+        filters, ordering = {}, ORDERINGS[DEFAULT_ORDERING]
+
+    # ② Scope them to the user's role
+    tasks = scoped_tasks(TaskScope.for_request(request), filters, ordering)
+
+    # ③ Full-text search if ?q= present (ranked, best match first)
+    query = request.GET.get("q", "").strip()
+    if query:
+        tasks = search(tasks, query)
+
+    # ④ Paginate; the total comes from the dashboard counters when only
+    # ?status= narrows the list, otherwise from a short-lived cached count.
+    count = None
+    if not query and set(filters) <= {"status"}:
+        statuses = sorted(filters.get("status", Task.Status.values))
+        if request.user.is_superadmin():
+            count = counters.total(counters.TASK_STATUS, names=statuses)
+        elif request.user.is_admin():
+            count = counters.total(counters.TEAM_STATUS, ref=request.user.id, names=statuses)
+    page = paginate(request, tasks, count)
+
+    return render(request, "admin_panel/tasks_list.html", {"tasks": page, "page_obj": page, "query": query})
 
 
 
@@ -135,15 +228,10 @@ def create_task(request):
 
 @login_required
 def task_report(request, task_id):
-    user = request.user
-    task = get_object_or_404(Task, pk=task_id)
+    task = get_object_or_404(Task.objects.select_related("assigned_to"), pk=task_id)
 
-    if user.is_superadmin():
-        pass
-    elif user.is_admin() and task.assigned_to.manager_id != user.id:
-        return redirect("dashboard")
-    elif user.is_user() and task.assigned_to_id != user.id:
-        return redirect("dashboard")
+    if not TaskScope.for_request(request).can_access_assigned(task):
+        return redirect("admin_panel:dashboard")
 
     return render(request, "admin_panel/task_report.html", {"task": task})
 
@@ -169,21 +257,26 @@ def assign_user_to_admin(request, user_id):
 
     return render(request, "admin_panel/assign_user.html", {"form": form, "user": user})
 
+@replica_reads
 @login_required
 def list_users(request):
     if request.user.is_superadmin():
-        users = CustomUser.objects.filter(role="USER")
+        count = counters.total(counters.USER_ROLE, names=["USER"])
     elif request.user.is_admin():
-        users = CustomUser.objects.filter(role="USER", manager=request.user)
+        # The list holds only role=USER; managed_ids may include promoted
+        # users. Answered from the (manager, role) index.
+        count = CustomUser.objects.filter(role="USER", manager=request.user).count()
     else:
-        users = CustomUser.objects.none()
+        count = 0
 
-    return render(request, "admin_panel/users_list.html", {"users": users})
+    # Manager names and task counts come with the page in one query.
+    page = paginate(request, scoped_users(request.user), count)
+    return render(request, "admin_panel/users_list.html", {"users": page, "page_obj": page})
 
 @login_required
 def create_user(request):
     if not request.user.is_superadmin():
-        return redirect("dashboard")
+        return redirect("admin_panel:dashboard")
 
     if request.method == "POST":
         form = CreateUserForm(request.POST)
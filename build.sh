@@ -1,3 +1,4 @@
 #!/usr/bin/env bash
 # build.sh
 python manage.py collectstatic --noinput
+python manage.py build_schema
@@ -12,5 +12,9 @@ import os
 from django.core.asgi import get_asgi_application
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "task_manager_project.settings")
+# No persistent connections under ASGI: sync code runs on executor threads,
+# each of which would hold its own connection open past the request. Use
+# DB_POOL=True to reuse connections instead.
+os.environ.setdefault("DB_CONN_MAX_AGE", "0")
 
 application = get_asgi_application()
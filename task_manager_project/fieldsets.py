@@ -0,0 +1,109 @@
+"""
+Sparse fieldsets for read endpoints: ``?fields=a,b`` keeps only those
+serializer fields, ``?omit=c,d`` drops them (both may be combined).
+
+Besides trimming the output, the queryset is narrowed with ``.only()`` to
+the model columns behind the kept fields plus ``fieldset_required`` (what
+permissions, pagination and validators read), so skipped columns -- large
+TextFields in particular -- are never fetched.
+"""
+from functools import lru_cache
+
+from django.core.exceptions import FieldDoesNotExist
+from drf_spectacular.utils import OpenApiParameter
+from rest_framework import serializers
+
+FIELDSET_PARAMETERS = [
+    OpenApiParameter("fields", str, description="Comma-separated fields to return (default: all)."),
+    OpenApiParameter("omit", str, description="Comma-separated fields to leave out."),
+]
+
+
+@lru_cache(maxsize=None)
+def serializer_sources(serializer_class):
+    """
+    {field name: source} for the readable fields of ``serializer_class``.
+    """
+    return {
+        name: field.source
+        for name, field in serializer_class().fields.items()
+        if not field.write_only
+    }
+
+
+def _names(value):
+    return [name.strip() for name in value.split(",") if name.strip()]
+
+
+class SparseFieldsetMixin:
+    # Model fields always loaded, whatever the client asked for.
+    fieldset_required = ("id",)
+    fieldset_actions = ("list", "retrieve")
+
+    def get_fieldset(self):
+        """
+        The requested field names in serializer order, or None for "all".
+        """
+        if not hasattr(self, "_fieldset"):
+            self._fieldset = self._parse_fieldset()
+        return self._fieldset
+
+    def _parse_fieldset(self):
+        if self.action not in self.fieldset_actions:
+            return None
+        params = self.request.query_params
+        wanted, omitted = _names(params.get("fields", "")), _names(params.get("omit", ""))
+        if not wanted and not omitted:
+            return None
+
+        available = list(serializer_sources(self.get_serializer_class()))
+        errors = {}
+        for param, names in (("fields", wanted), ("omit", omitted)):
+            unknown = [name for name in names if name not in available]
+            if unknown:
+                errors[param] = [
+                    f"Unknown field(s): {', '.join(unknown)}. Available: {', '.join(available)}."
+                ]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        keep = set(wanted or available) - set(omitted)
+        if not keep:
+            raise serializers.ValidationError({"fields": ["At least one field must remain."]})
+        return [name for name in available if name in keep]
+
+    def fieldset_columns(self, fieldset):
+        """
+        Model fields to load for ``fieldset``.
+        """
+        model = self.get_serializer_class().Meta.model
+        sources = serializer_sources(self.get_serializer_class())
+        columns = list(self.fieldset_required)
+        for name in fieldset:
+            source = sources[name]
+            try:
+                model._meta.get_field(source)
+            except FieldDoesNotExist:
+                continue  # computed value; let the serializer resolve it
+            if source not in columns:
+                columns.append(source)
+        return columns
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        fieldset = self.get_fieldset()
+        if fieldset is None:
+            return queryset
+        # Related rows are not part of any fieldset; only() cannot defer a
+        # relation that select_related() traverses anyway.
+        return queryset.select_related(None).only(*self.fieldset_columns(fieldset))
+
+    def get_serializer(self, *args, **kwargs):
+        serializer = super().get_serializer(*args, **kwargs)
+        fieldset = self.get_fieldset()
+        if fieldset is not None:
+            fields = getattr(serializer, "child", serializer).fields
+            for name in list(fields):
+                if name not in fieldset:
+                    fields.pop(name)
+        return serializer
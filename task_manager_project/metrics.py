@@ -0,0 +1,320 @@
+"""
+Per-view request metrics in the Prometheus text format.
+
+MetricsMiddleware times every request (sync or async) and, through a
+database execute wrapper, counts its SQL queries and the time spent in
+them. The request is
+also split at the view boundary: ``view`` time runs from the end of the
+request middleware to the view's return (authentication, queries and
+serialization for DRF views), ``render`` time covers rendering a template
+or DRF response afterwards. Samples are aggregated in-process per
+(view name, method, status).
+
+With several worker processes, set METRICS_DIR to a directory shared by
+them: each process writes its totals to ``<pid>.json`` there at most every
+METRICS_FLUSH_SECONDS, and the endpoint adds up every file. Files are
+cumulative and stay after a worker exits, so totals never go backwards;
+empty the directory when deploying.
+
+The endpoint answers only with ``Authorization: Bearer <METRICS_TOKEN>``.
+When METRICS_ENABLED is off the middleware removes itself from the stack
+(MiddlewareNotUsed) and the endpoint is a 404, so nothing is measured.
+"""
+import atexit
+import hmac
+import json
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import Http404, HttpResponse
+from django.views.decorators.http import require_GET
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+QUERY_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+CONTENT_TYPE = "text/plain; version=0.0.4; charset=utf-8"
+
+
+def _bucket_index(buckets, value):
+    for i, bound in enumerate(buckets):
+        if value <= bound:
+            return i
+    return len(buckets)
+
+
+def _empty_series():
+    return {
+        "count": 0,
+        "latency": [0] * (len(LATENCY_BUCKETS) + 1),
+        "latency_sum": 0.0,
+        "queries": [0] * (len(QUERY_BUCKETS) + 1),
+        "queries_sum": 0,
+        "db_seconds": 0.0,
+        "view_seconds": 0.0,
+        "render_seconds": 0.0,
+    }
+
+
+def _merge(into, series):
+    for key, value in series.items():
+        if isinstance(value, list):
+            into[key] = [a + b for a, b in zip(into[key], value)]
+        else:
+            into[key] += value
+
+
+class Registry:
+    """
+    Thread-safe totals for this process, keyed by (view, method, status).
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.series = {}
+        self.flushed_at = 0.0
+
+    def observe(self, labels, seconds, queries, db_seconds, view_seconds, render_seconds):
+        with self.lock:
+            series = self.series.get(labels)
+            if series is None:
+                series = self.series[labels] = _empty_series()
+            series["count"] += 1
+            series["latency"][_bucket_index(LATENCY_BUCKETS, seconds)] += 1
+            series["latency_sum"] += seconds
+            series["queries"][_bucket_index(QUERY_BUCKETS, queries)] += 1
+            series["queries_sum"] += queries
+            series["db_seconds"] += db_seconds
+            series["view_seconds"] += view_seconds
+            series["render_seconds"] += render_seconds
+
+    def snapshot(self):
+        with self.lock:
+            return {labels: {k: list(v) if isinstance(v, list) else v for k, v in s.items()}
+                    for labels, s in self.series.items()}
+
+    # ------------------------------
+    # Sharing totals between processes
+    # ------------------------------
+
+    def path(self, pid=None):
+        return os.path.join(settings.METRICS_DIR, f"{pid or os.getpid()}.json")
+
+    def flush(self, force=False):
+        """
+        Write this process's totals to METRICS_DIR (if set), at most once
+        per METRICS_FLUSH_SECONDS unless ``force``.
+        """
+        if not settings.METRICS_DIR:
+            return
+        now = time.monotonic()
+        if not force and now - self.flushed_at < settings.METRICS_FLUSH_SECONDS:
+            return
+        self.flushed_at = now
+        data = [[list(labels), series] for labels, series in self.snapshot().items()]
+        path = self.path()
+        tmp = f"{path}.tmp"
+        with open(tmp, "w") as fh:
+            json.dump(data, fh)
+        os.replace(tmp, path)  # readers never see a half-written file
+
+    def collect(self):
+        """
+        Totals of this process plus those flushed by every other process.
+        """
+        merged = self.snapshot()
+        if not settings.METRICS_DIR or not os.path.isdir(settings.METRICS_DIR):
+            return merged
+        own = os.path.basename(self.path())
+        for name in os.listdir(settings.METRICS_DIR):
+            if not name.endswith(".json") or name == own:
+                continue
+            try:
+                with open(os.path.join(settings.METRICS_DIR, name)) as fh:
+                    data = json.load(fh)
+            except (OSError, ValueError):
+                continue
+            for labels, series in data:
+                labels = tuple(labels)
+                if labels not in merged:
+                    merged[labels] = _empty_series()
+                _merge(merged[labels], series)
+        return merged
+
+
+registry = Registry()
+
+
+# QueryTimer of the request being served. A context variable rather than
+# connection.execute_wrapper() around the request: async views run their
+# queries on another thread (and connection), which inherits the context.
+_timer = ContextVar("metrics_timer", default=None)
+
+
+def _timed(execute, sql, params, many, context):
+    timer = _timer.get()
+    if timer is None:
+        return execute(sql, params, many, context)
+    return timer(execute, sql, params, many, context)
+
+
+def _install(sender, connection, **kwargs):
+    if _timed not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_timed)
+
+
+class QueryTimer:
+    """
+    Execute wrapper counting queries and their wall time.
+    """
+
+    def __init__(self):
+        self.count = 0
+        self.seconds = 0.0
+
+    def __call__(self, execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.count += 1
+            self.seconds += time.perf_counter() - started
+
+
+class MetricsMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.METRICS_ENABLED:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+        # Every connection opened from now on, plus any this thread holds.
+        connection_created.connect(_install, dispatch_uid="metrics_timer")
+        for connection in connections.all(initialized_only=True):
+            _install(None, connection)
+        if settings.METRICS_DIR:
+            os.makedirs(settings.METRICS_DIR, exist_ok=True)
+            atexit.register(registry.flush, force=True)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        timer = QueryTimer()
+        started = time.perf_counter()
+        token = _timer.set(timer)
+        try:
+            response = self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self.observe(request, response, timer, started)
+
+    async def __acall__(self, request):
+        timer = QueryTimer()
+        started = time.perf_counter()
+        token = _timer.set(timer)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _timer.reset(token)
+        return self.observe(request, response, timer, started)
+
+    def observe(self, request, response, timer, started):
+        ended = time.perf_counter()
+        view_started = getattr(request, "_metrics_view_started", ended)
+        view_ended = getattr(request, "_metrics_view_ended", ended)
+        match = request.resolver_match
+        labels = (match.view_name if match else "<unresolved>", request.method, str(response.status_code))
+        registry.observe(
+            labels,
+            ended - started,
+            timer.count,
+            timer.seconds,
+            view_ended - view_started,
+            ended - view_ended,
+        )
+        registry.flush()
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        request._metrics_view_started = time.perf_counter()
+
+    def process_template_response(self, request, response):
+        # Called after the view returns and before the response is rendered.
+        request._metrics_view_ended = time.perf_counter()
+        return response
+
+
+# ------------------------------
+# Prometheus text format
+# ------------------------------
+
+def _escape(value):
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    view, method, status = labels
+    pairs = [("view", view), ("method", method), ("status", status)] + list(extra.items())
+    return "{" + ",".join(f'{name}="{_escape(value)}"' for name, value in pairs) + "}"
+
+
+def _number(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+def render(collected):
+    lines = []
+
+    def histogram(name, help_text, buckets, counts_key, sum_key):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} histogram")
+        for labels, series in sorted(collected.items()):
+            cumulative = 0
+            for bound, n in zip(list(buckets) + ["+Inf"], series[counts_key]):
+                cumulative += n
+                le = bound if bound == "+Inf" else _number(float(bound))
+                lines.append(f"{name}_bucket{_labels(labels, le=le)} {cumulative}")
+            lines.append(f"{name}_sum{_labels(labels)} {_number(series[sum_key])}")
+            lines.append(f"{name}_count{_labels(labels)} {series['count']}")
+
+    def counter(name, help_text, key):
+        lines.append(f"# HELP {name} {help_text}")
+        lines.append(f"# TYPE {name} counter")
+        for labels, series in sorted(collected.items()):
+            lines.append(f"{name}{_labels(labels)} {_number(series[key])}")
+
+    histogram(
+        "http_request_duration_seconds", "Request latency, measured by MetricsMiddleware.",
+        LATENCY_BUCKETS, "latency", "latency_sum",
+    )
+    histogram("http_request_db_queries", "SQL queries per request.", QUERY_BUCKETS, "queries", "queries_sum")
+    counter("http_request_db_seconds_total", "Time spent executing SQL.", "db_seconds")
+    counter(
+        "http_request_view_seconds_total",
+        "Time inside the view (authentication, queries, serialization).", "view_seconds",
+    )
+    counter("http_request_render_seconds_total", "Time rendering responses after the view.", "render_seconds")
+    return "\n".join(lines) + "\n"
+
+
+@require_GET
+def metrics_view(request):
+    """
+    GET /metrics/ -- totals of every worker, for a Prometheus scraper.
+    """
+    token = settings.METRICS_TOKEN
+    if not settings.METRICS_ENABLED or not token:
+        raise Http404
+    supplied = request.headers.get("Authorization", "")
+    if not hmac.compare_digest(supplied.encode(), f"Bearer {token}".encode()):
+        return HttpResponse("Unauthorized\n", status=401, content_type="text/plain")
+    return HttpResponse(render(registry.collect()), content_type=CONTENT_TYPE)
@@ -0,0 +1,130 @@
+"""
+The OpenAPI schema, generated once instead of on every request.
+
+``manage.py build_schema`` (run by build.sh) renders the schema as YAML and
+JSON into OPENAPI_SCHEMA_DIR, each with a gzipped copy, plus a manifest
+holding their ETags and the APP_VERSION they were built for. SchemaView
+serves those bytes as they are -- the gzipped copy to clients that accept
+it -- and answers a matching If-None-Match with 304. A worker that finds no
+files, or files built for another APP_VERSION, generates the schema on its
+first request and keeps it in memory.
+
+Requests with a ``lang`` or ``version`` parameter, and all requests while
+OPENAPI_SCHEMA_CACHE is off (the default with DEBUG, so edits show up at
+once), are generated per request as drf_spectacular does.
+"""
+import gzip
+import hashlib
+import json
+import re
+import threading
+
+from django.conf import settings
+from django.http import HttpResponse
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from drf_spectacular.renderers import OpenApiJsonRenderer, OpenApiYamlRenderer
+from drf_spectacular.settings import spectacular_settings
+from drf_spectacular.views import SpectacularAPIView
+
+MANIFEST = "manifest.json"
+
+# Renderer format -> renderer producing that body. SchemaView's other
+# renderers differ only in media type.
+RENDERERS = {"yaml": OpenApiYamlRenderer(), "json": OpenApiJsonRenderer()}
+
+ACCEPTS_GZIP = re.compile(r"\bgzip\b")
+
+# format -> {"body", "gzip", "etag"} for this process, once loaded or built.
+_documents = None
+_lock = threading.Lock()
+
+
+def generate():
+    """
+    format -> the schema rendered in that format, as ``manage.py
+    spectacular`` would write it.
+    """
+    generator = spectacular_settings.DEFAULT_GENERATOR_CLASS()
+    data = generator.get_schema(request=None, public=spectacular_settings.SERVE_PUBLIC)
+    return {format: renderer.render(data, renderer_context={}) for format, renderer in RENDERERS.items()}
+
+
+def _document(body):
+    return {
+        "body": body,
+        # mtime=0: the same schema always compresses to the same bytes.
+        "gzip": gzip.compress(body, mtime=0),
+        "etag": f'W/"{hashlib.sha1(body).hexdigest()}"',
+    }
+
+
+def build(directory=None):
+    """
+    Generate the schema and write it, compressed copies and manifest to
+    ``directory`` (OPENAPI_SCHEMA_DIR by default). Returns the manifest.
+    """
+    directory = directory or settings.OPENAPI_SCHEMA_DIR
+    directory.mkdir(parents=True, exist_ok=True)
+    manifest = {"version": settings.APP_VERSION, "etags": {}}
+    for format, body in generate().items():
+        document = _document(body)
+        (directory / f"openapi.{format}").write_bytes(document["body"])
+        (directory / f"openapi.{format}.gz").write_bytes(document["gzip"])
+        manifest["etags"][format] = document["etag"]
+    # Last, so a worker never reads a manifest ahead of its files.
+    (directory / MANIFEST).write_text(json.dumps(manifest, indent=2))
+    return manifest
+
+
+def load(directory=None):
+    """
+    The documents prebuilt in ``directory`` for this APP_VERSION, or None.
+    """
+    directory = directory or settings.OPENAPI_SCHEMA_DIR
+    try:
+        manifest = json.loads((directory / MANIFEST).read_text())
+        if manifest["version"] != settings.APP_VERSION or set(manifest["etags"]) != set(RENDERERS):
+            return None
+        return {
+            format: {
+                "body": (directory / f"openapi.{format}").read_bytes(),
+                "gzip": (directory / f"openapi.{format}.gz").read_bytes(),
+                "etag": etag,
+            }
+            for format, etag in manifest["etags"].items()
+        }
+    except (OSError, ValueError, KeyError):
+        return None
+
+
+def documents():
+    global _documents
+    if _documents is None:
+        with _lock:
+            if _documents is None:
+                _documents = load() or {format: _document(body) for format, body in generate().items()}
+    return _documents
+
+
+class SchemaView(SpectacularAPIView):
+    """
+    SpectacularAPIView serving the prebuilt schema.
+    """
+
+    def get(self, request, *args, **kwargs):
+        if not settings.OPENAPI_SCHEMA_CACHE or "lang" in request.GET or "version" in request.GET:
+            return super().get(request, *args, **kwargs)
+
+        renderer = request.accepted_renderer
+        document = documents()[renderer.format]
+        compressed = ACCEPTS_GZIP.search(request.META.get("HTTP_ACCEPT_ENCODING", ""))
+        content_type = f"{renderer.media_type}; charset={renderer.charset}" if renderer.charset else renderer.media_type
+        response = HttpResponse(document["gzip"] if compressed else document["body"], content_type=content_type)
+        if compressed:
+            response["Content-Encoding"] = "gzip"
+        response["Content-Disposition"] = f'inline; filename="{self._get_filename(request, None)}"'
+        response["ETag"] = document["etag"]
+        # Clients may keep it, but must revalidate: a deploy changes it.
+        response["Cache-Control"] = "no-cache"
+        patch_vary_headers(response, ("Accept-Encoding",))
+        return get_conditional_response(request, etag=document["etag"], response=response)
@@ -0,0 +1,146 @@
+from django.core.exceptions import FieldDoesNotExist, ValidationError
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import Cursor, CursorPagination
+
+
+class KeysetPagination(CursorPagination):
+    """
+    Cursor pagination that seeks on the *whole* ordering tuple.
+
+    DRF's CursorPagination only filters on the first ordering field and falls
+    back to OFFSET for ties. Here the cursor stores every ordering value, e.g.
+    (updated_at, id), and each page is fetched with
+    ``WHERE (a < x) OR (a = x AND b < y) ORDER BY a, b LIMIT n``, so page N
+    costs the same as page 1 and no COUNT(*) is ever issued.
+
+    The last ordering field must be unique (normally "id") and every field
+    must be non-nullable and sorted in the same direction. Views opt in
+    through ``pagination_class``.
+    """
+    ordering = ("id",)
+    page_size = 50
+    page_size_query_param = "page_size"
+    max_page_size = 500
+    position_separator = "|"
+
+    def paginate_queryset(self, queryset, request, view=None):
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page(list(queryset))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """
+        paginate_queryset() for async views: the page is read with aiterator().
+        """
+        queryset = self._page_queryset(queryset, request, view)
+        if queryset is None:
+            return None
+        return self._set_page([row async for row in queryset.aiterator()])
+
+    def _page_queryset(self, queryset, request, view):
+        """
+        The query for this page, or None when pagination is off.
+        """
+        self.request = request
+        self.page_size = self.get_page_size(request)
+        if not self.page_size:
+            return None
+
+        self.base_url = request.build_absolute_uri()
+        self.ordering = self.get_ordering(request, queryset, view)
+        self.cursor = self.decode_cursor(request)
+
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+        ordering = self._reversed(self.ordering) if reverse else self.ordering
+
+        queryset = queryset.order_by(*ordering)
+        if position is not None:
+            queryset = queryset.filter(self._seek_filter(queryset.model, ordering, position))
+
+        # Always fetch one extra row to know whether another page follows.
+        return queryset[:self.page_size + 1]
+
+    def _set_page(self, results):
+        reverse = bool(self.cursor and self.cursor.reverse)
+        position = self.cursor.position if self.cursor else None
+        has_more = len(results) > self.page_size
+        self.page = results[:self.page_size]
+
+        if reverse:
+            self.page.reverse()
+            self.has_next = position is not None
+            self.has_previous = has_more
+        else:
+            self.has_next = has_more
+            self.has_previous = position is not None
+
+        if (self.has_previous or self.has_next) and self.template is not None:
+            self.display_page_controls = True
+
+        return self.page
+
+    def get_ordering(self, request, queryset, view):
+        ordering = super().get_ordering(request, queryset, view)
+        assert len({o.startswith("-") for o in ordering}) == 1, (
+            "Keyset pagination requires every ordering field to sort in the "
+            "same direction, got {ordering!r}.".format(ordering=ordering)
+        )
+        return ordering
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        if self.page:
+            position = self._get_position_from_instance(self.page[-1], self.ordering)
+        else:
+            position = self.cursor.position
+        return self.encode_cursor(Cursor(offset=0, reverse=False, position=position))
+
+    def get_previous_link(self):
+        if not self.has_previous:
+            return None
+        # From an empty page, step back to the tail of the result set.
+        position = None
+        if self.page:
+            position = self._get_position_from_instance(self.page[0], self.ordering)
+        return self.encode_cursor(Cursor(offset=0, reverse=True, position=position))
+
+    def _get_position_from_instance(self, instance, ordering):
+        values = []
+        for order in ordering:
+            field_name = order.lstrip("-")
+            if isinstance(instance, dict):
+                values.append(str(instance[field_name]))
+            else:
+                values.append(str(getattr(instance, field_name)))
+        return self.position_separator.join(values)
+
+    def _seek_filter(self, model, ordering, position):
+        """
+        Build the row-value comparison "ordering tuple comes after position".
+        """
+        raw_values = position.rsplit(self.position_separator, len(ordering) - 1)
+        if len(raw_values) != len(ordering):
+            raise NotFound(self.invalid_cursor_message)
+
+        fields = [order.lstrip("-") for order in ordering]
+        lookup = "__lt" if ordering[0].startswith("-") else "__gt"
+        try:
+            values = [
+                model._meta.get_field(name).to_python(raw)
+                for name, raw in zip(fields, raw_values)
+            ]
+        except (FieldDoesNotExist, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+        condition = Q()
+        for i, name in enumerate(fields):
+            ties = {fields[j]: values[j] for j in range(i)}
+            condition |= Q(**ties, **{name + lookup: values[i]})
+        return condition
+
+    def _reversed(self, ordering):
+        return tuple(o[1:] if o.startswith("-") else "-" + o for o in ordering)
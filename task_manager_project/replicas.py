@@ -0,0 +1,172 @@
+"""
+Read replicas for read-heavy views.
+
+Views opt in: a function view with the ``replica_reads`` decorator, a DRF
+viewset by listing actions in ``replica_actions``. For a GET/HEAD to such a
+view, ReplicaMiddleware picks a healthy replica and ReplicaRouter sends the
+request's reads there; writes, reads inside a transaction and every other
+request stay on ``default``.
+
+Read-your-writes: any unsafe request (POST, PUT, PATCH, DELETE) that
+succeeds (status < 400) sets a short-lived cookie that keeps that client
+on the primary for REPLICA_PIN_SECONDS, long enough for its write to
+replicate. Clients that drop cookies (some API clients) may read data up
+to REPLICA_MAX_LAG_SECONDS old.
+
+Lag: each replica's replay delay is checked at most every
+REPLICA_LAG_CHECK_SECONDS per process (PostgreSQL standbys report it;
+other backends, e.g. two SQLite files for local testing, count as current).
+A replica that lags by more than REPLICA_MAX_LAG_SECONDS, or cannot be
+reached, gets no reads until the next check.
+
+Replicas come from DATABASE_REPLICA_URLS (see settings); without any the
+middleware removes itself (MiddlewareNotUsed).
+"""
+import random
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections
+
+PIN_COOKIE = "db_primary"
+SAFE_METHODS = ("GET", "HEAD", "OPTIONS")
+
+# Replica alias serving this request's reads, or None for the primary.
+_read_alias = ContextVar("read_alias", default=None)
+
+# alias -> (monotonic time of the check, usable?)
+_health = {}
+
+POSTGRES_LAG_SQL = (
+    "SELECT CASE WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0 "
+    "ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0) END"
+)
+
+
+def replica_reads(view_func):
+    """
+    Let GET/HEAD requests to this function view (sync or async) read from
+    a replica.
+    """
+    if iscoroutinefunction(view_func):
+        async def _wrapped(request, *args, **kwargs):
+            return await view_func(request, *args, **kwargs)
+    else:
+        def _wrapped(request, *args, **kwargs):
+            return view_func(request, *args, **kwargs)
+    _wrapped = wraps(view_func)(_wrapped)
+    _wrapped.replica_reads = True
+    return _wrapped
+
+
+def replica_lag(alias):
+    """
+    Seconds the replica ``alias`` is behind its primary.
+    """
+    connection = connections[alias]
+    connection.ensure_connection()  # an unreachable replica raises here
+    if connection.vendor != "postgresql":
+        return 0.0
+    with connection.cursor() as cursor:
+        cursor.execute(POSTGRES_LAG_SQL)
+        return float(cursor.fetchone()[0] or 0)
+
+
+def is_healthy(alias):
+    now = time.monotonic()
+    checked_at, healthy = _health.get(alias, (None, False))
+    if checked_at is None or now - checked_at >= settings.REPLICA_LAG_CHECK_SECONDS:
+        try:
+            healthy = replica_lag(alias) <= settings.REPLICA_MAX_LAG_SECONDS
+        except DatabaseError:
+            healthy = False
+        _health[alias] = (now, healthy)
+    return healthy
+
+
+def choose_replica():
+    """
+    A random healthy replica, or None to use the primary.
+    """
+    healthy = [alias for alias in settings.DATABASE_REPLICAS if is_healthy(alias)]
+    return random.choice(healthy) if healthy else None
+
+
+def wants_replica(request, view_func):
+    if request.method not in SAFE_METHODS or PIN_COOKIE in request.COOKIES:
+        return False
+    actions = getattr(view_func, "actions", None)
+    if actions is not None:
+        # DRF viewset: map the method to its action.
+        action = actions.get("get" if request.method == "HEAD" else request.method.lower())
+        return action in getattr(view_func.cls, "replica_actions", ())
+    return getattr(view_func, "replica_reads", False)
+
+
+class ReplicaMiddleware:
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        if not settings.DATABASE_REPLICAS:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        token = _read_alias.set(None)
+        try:
+            response = self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self.pin(request, response)
+
+    async def __acall__(self, request):
+        token = _read_alias.set(None)
+        try:
+            response = await self.get_response(request)
+        finally:
+            _read_alias.reset(token)
+        return self.pin(request, response)
+
+    def pin(self, request, response):
+        # A rejected or failed request wrote nothing worth waiting for.
+        if request.method not in SAFE_METHODS and response.status_code < 400:
+            response.set_cookie(
+                PIN_COOKIE, "1", max_age=settings.REPLICA_PIN_SECONDS, httponly=True, samesite="Lax"
+            )
+        return response
+
+    def process_view(self, request, view_func, view_args, view_kwargs):
+        if wants_replica(request, view_func):
+            # The session user loads lazily; load it from the primary first,
+            # so a login that has not replicated yet is not lost.
+            if getattr(view_func, "replica_reads", False):
+                request.user.is_authenticated
+            _read_alias.set(choose_replica())
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        alias = _read_alias.get()
+        # Reads in a transaction on the primary must see its writes.
+        if alias is None or connections[DEFAULT_DB_ALIAS].in_atomic_block:
+            return None
+        return alias
+
+    def db_for_write(self, model, **hints):
+        # Explicit, or instances loaded from a replica would save back to it.
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        return True  # replicas hold the same rows as the primary
+
+    def allow_migrate(self, db, app_label, model_name=None, **hints):
+        return db not in settings.DATABASE_REPLICAS
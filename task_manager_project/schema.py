@@ -0,0 +1,31 @@
+"""
+OpenAPI schema and docs views, imported on first use.
+
+drf_spectacular's views bring in its schema generator and renderers, which
+serving the API never needs, so the URLconf routes to these wrappers and a
+worker only imports them when someone opens the docs. The schema itself is
+prebuilt (task_manager_project.openapi).
+"""
+from django.utils.module_loading import import_string
+from django.views.decorators.csrf import csrf_exempt
+
+
+def lazy_view(path, **initkwargs):
+    """
+    ``import_string(path).as_view(**initkwargs)``, built on the first
+    request.
+    """
+    view = None
+
+    @csrf_exempt  # like every APIView
+    def _view(request, *args, **kwargs):
+        nonlocal view
+        if view is None:
+            view = import_string(path).as_view(**initkwargs)
+        return view(request, *args, **kwargs)
+    return _view
+
+
+schema_view = lazy_view("task_manager_project.openapi.SchemaView")
+swagger_view = lazy_view("drf_spectacular.views.SpectacularSwaggerView", url_name="schema")
+redoc_view = lazy_view("drf_spectacular.views.SpectacularRedocView", url_name="schema")
@@ -0,0 +1,218 @@
+"""
+Query-count budgets for the test suite.
+
+QueryBudgetTestCase.assertQueryBudget() makes one request per role against
+a freshly built dataset at each size in SIZES (inside a rolled-back
+transaction, with the cache cleared) and fails when the number of SQL
+queries exceeds the role's budget or differs between sizes. Budgets are
+therefore constants: a page that starts issuing a query per row fails on
+the larger dataset even if it fits the budget on the smaller one. Each
+request must also get the status code the test expects for that role, so
+a budget always measures the path it names (success, or a denial) rather
+than an error path.
+
+API requests authenticate with a real JWT (as clients do); admin panel
+requests use a logged-in session.
+"""
+import io
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import Client, TestCase, override_settings
+from django.test.runner import DiscoverRunner
+from django.test.utils import CaptureQueriesContext
+from django.urls import URLPattern, URLResolver, get_resolver, reverse
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.authentication import RoleClaimsTokenSerializer
+from accounts.models import CustomUser
+from tasks.models import Task
+
+# Users per Admin and tasks per user; the larger size fills a whole page.
+SIZES = (3, 8)
+PASSWORD = "Budget-pass-123!"
+
+SUPERADMIN, ADMIN, USER, ANONYMOUS = "SUPERADMIN", "ADMIN", "USER", "ANONYMOUS"
+
+
+class TestRunner(DiscoverRunner):
+    """
+    The project's test runner: email goes to accounts.outbox.LocMemSender,
+    never to Brevo, whatever OUTBOX_SENDER says.
+    """
+
+    def setup_test_environment(self, **kwargs):
+        super().setup_test_environment(**kwargs)
+        self.sender = override_settings(OUTBOX_SENDER="accounts.outbox.LocMemSender")
+        self.sender.enable()
+
+    def teardown_test_environment(self, **kwargs):
+        self.sender.disable()
+        super().teardown_test_environment(**kwargs)
+
+
+class Dataset:
+    """
+    Accounts and tasks for one size: a SuperAdmin, an Admin managing
+    ``size`` Users with ``size`` tasks each, and a second Admin with one
+    User of their own (tasks outside the first Admin's scope).
+    """
+
+    def __init__(self, size):
+        now = timezone.now()
+        today = timezone.localdate()
+
+        def account(username, role, **extra):
+            user = CustomUser(
+                username=username,
+                email=f"{username}@example.com",
+                role=role,
+                is_staff=role != USER,
+                **extra,
+            )
+            user.set_password(PASSWORD)
+            return user
+
+        self.superadmin, self.admin, self.other_admin = CustomUser.objects.bulk_create([
+            account("super", SUPERADMIN, is_superuser=True),
+            account("admin", ADMIN),
+            account("other_admin", ADMIN),
+        ])
+        self.users = CustomUser.objects.bulk_create(
+            [account(f"user{i}", USER, manager=self.admin) for i in range(size)]
+            + [account("other_user", USER, manager=self.other_admin)]
+        )
+        self.other_user = self.users.pop()
+        self.user = self.users[0]
+
+        statuses = [Task.Status.TODO, Task.Status.COMPLETED, Task.Status.IN_PROGRESS]
+        tasks = []
+        for assignee in self.users + [self.other_user]:
+            for n in range(size):
+                status = statuses[n % len(statuses)]
+                done = status == Task.Status.COMPLETED
+                tasks.append(Task(
+                    title=f"{assignee.username} task {n}",
+                    description="Budget dataset task.",
+                    assigned_to=assignee,
+                    created_by=assignee.manager,
+                    due_date=today + timedelta(days=n - size),
+                    status=status,
+                    completion_report="Done." if done else None,
+                    worked_hours=Decimal("1.50") if done else None,
+                    # Same day for all: rollup buckets stay fixed as tasks grow.
+                    completed_at=now if done else None,
+                ))
+        Task.objects.bulk_create(tasks)
+        self.task = Task.objects.filter(assigned_to=self.user, status=Task.Status.TODO).first()
+        # One open task for each of two Users, whatever the size.
+        self.open_ids = [
+            Task.objects.filter(assigned_to=user, status=Task.Status.TODO).values_list("id", flat=True)[0]
+            for user in self.users[:2]
+        ]
+        self.completed = Task.objects.filter(assigned_to=self.user, status=Task.Status.COMPLETED).first()
+
+        # bulk_create sends no signals; derive counters and rollups once.
+        call_command("reconcile_counters", stdout=io.StringIO())
+        call_command("reconcile_hours", stdout=io.StringIO())
+
+    def actor(self, role):
+        return {SUPERADMIN: self.superadmin, ADMIN: self.admin, USER: self.user, ANONYMOUS: None}[role]
+
+
+def route_names(urlconf=None, namespace=None):
+    """
+    Names of every route in ``urlconf`` (namespaced ones as "ns:name"),
+    skipping the DRF router's format-suffix duplicates.
+    """
+    names = set()
+
+    def walk(patterns, prefix):
+        for pattern in patterns:
+            if isinstance(pattern, URLResolver):
+                ns = f"{prefix}{pattern.namespace}:" if pattern.namespace else prefix
+                walk(pattern.url_patterns, ns)
+            elif isinstance(pattern, URLPattern) and pattern.name and "format" not in pattern.pattern.regex.groupindex:
+                names.add(prefix + pattern.name)
+
+    walk(get_resolver(urlconf).url_patterns, f"{namespace}:" if namespace else "")
+    return names
+
+
+# Fast hashing: every dataset stores passwords for several accounts.
+@override_settings(PASSWORD_HASHERS=["django.contrib.auth.hashers.MD5PasswordHasher"])
+class QueryBudgetTestCase(TestCase):
+    # True: authenticate with a JWT bearer token; False: with a session.
+    api = True
+
+    def client_for(self, role, dataset):
+        user = dataset.actor(role)
+        if not self.api:
+            client = Client()
+            if user is not None:
+                client.force_login(user)
+            return client
+        client = APIClient()
+        if user is not None:
+            access = RoleClaimsTokenSerializer.get_token(user).access_token
+            client.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        return client
+
+    def count_queries(self, role, size, method, route, args=None, data=None, query="", status=200, **kwargs):
+        """
+        Queries made by one request to ``route``, which must answer with
+        ``status``; ``args`` and ``data`` may be callables taking the Dataset.
+        """
+        with transaction.atomic():
+            cache.clear()
+            ContentType.objects.clear_cache()
+            dataset = Dataset(size)
+            client = self.client_for(role, dataset)
+            url = reverse(route, args=args(dataset) if callable(args) else args) + query
+            payload = data(dataset) if callable(data) else data
+            with CaptureQueriesContext(connection) as queries:
+                response = getattr(client, method)(url, payload, **kwargs)
+                if response.streaming:
+                    b"".join(response.streaming_content)  # streamed rows query lazily
+            transaction.set_rollback(True)
+        self.assertEqual(
+            response.status_code, status, f"{method.upper()} {url} as {role}: {response.status_code} != {status}"
+        )
+        return len(queries), [captured["sql"] for captured in queries.captured_queries]
+
+    def assertQueryBudget(self, budgets, method, route, args=None, data=None, query="", status=200, **kwargs):
+        """
+        ``budgets`` maps each role to its maximum number of queries for one
+        request to the named ``route``. ``status`` is the status code every
+        role's request must get, or a mapping of role to status code.
+        """
+        for role, budget in budgets.items():
+            expected = status[role] if isinstance(status, dict) else status
+            counts = {}
+            for size in SIZES:
+                with self.subTest(route=route, role=role, size=size):
+                    counts[size], sql = self.count_queries(
+                        role, size, method, route, args, data, query, expected, **kwargs
+                    )
+                    self.assertLessEqual(
+                        counts[size], budget,
+                        f"{method.upper()} {route} as {role}: {counts[size]} queries > {budget}:\n"
+                        + "\n".join(sql),
+                    )
+            with self.subTest(route=route, role=role):
+                self.assertEqual(
+                    len(set(counts.values())), 1,
+                    f"{method.upper()} {route} as {role}: query count grows with the dataset {counts}",
+                )
+
+    def assertRoutesBudgeted(self, routes, budgeted):
+        """
+        Every route name in ``routes`` must be listed in ``budgeted``.
+        """
+        missing = sorted(set(routes) - set(budgeted))
+        self.assertFalse(missing, f"Routes without a query budget: {', '.join(missing)}")
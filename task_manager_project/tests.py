@@ -0,0 +1,233 @@
+import gzip
+import io
+import json
+import os
+import sqlite3
+import tempfile
+from pathlib import Path
+from unittest import mock
+
+from django.conf import settings
+from django.core.management import call_command
+from django.db import DEFAULT_DB_ALIAS, DatabaseError, connections, transaction
+from django.test import SimpleTestCase, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from tasks.models import Task
+from task_manager_project import metrics, openapi, replicas
+
+REPLICA = "replica"
+
+
+@override_settings(DATABASE_REPLICAS=[REPLICA], REPLICA_LAG_CHECK_SECONDS=0)
+class ReplicaTests(TransactionTestCase):
+    """
+    Routing with a second SQLite database as the replica: a copy of the
+    freshly migrated test database that never receives this test's writes,
+    so what a read returns shows where it went.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        path = os.path.join(tmp.name, "replica.sqlite3")
+        primary = connections[DEFAULT_DB_ALIAS]
+        primary.ensure_connection()
+        target = sqlite3.connect(path)
+        primary.connection.backup(target)
+        target.close()
+
+        # A connection created on the fly (not in settings.DATABASES): the
+        # test runner neither sets it up nor flushes it.
+        replica = primary.__class__({**primary.settings_dict, "NAME": path}, REPLICA)
+        connections[REPLICA] = replica
+        cls.addClassCleanup(connections.__delitem__, REPLICA)
+        cls.addClassCleanup(replica.close)
+
+    def setUp(self):
+        replicas._health.clear()
+        self.superadmin = CustomUser.objects.create_user("super", role="SUPERADMIN")
+        self.user = CustomUser.objects.create_user("user", role="USER")
+        self.task = Task.objects.create(title="t", assigned_to=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.superadmin)
+
+    def listed(self):
+        return [task["id"] for task in self.client.get(reverse("tasks-list")).json()["results"]]
+
+    def test_reads_go_to_the_replica(self):
+        with CaptureQueriesContext(connections[REPLICA]) as queries:
+            self.assertEqual(self.listed(), [])
+        self.assertTrue(queries)
+        self.assertEqual(self.client.get(reverse("tasks-detail", args=[self.task.pk])).status_code, 404)
+
+    def test_writes_pin_the_client_to_the_primary(self):
+        response = self.client.post(reverse("tasks-list"), {"title": "u", "assigned_to": self.user.pk})
+        self.assertEqual(response.status_code, 201)
+        self.assertIn(replicas.PIN_COOKIE, response.cookies)
+        self.assertTrue(Task.objects.using(DEFAULT_DB_ALIAS).filter(pk=response.json()["id"]).exists())
+        self.assertEqual(sorted(self.listed()), [self.task.pk, response.json()["id"]])
+
+    def test_failed_writes_do_not_pin(self):
+        response = self.client.patch(reverse("tasks-detail", args=[self.task.pk]), {"status": "nope"})
+        self.assertEqual(response.status_code, 400)
+        self.assertNotIn(replicas.PIN_COOKIE, response.cookies)
+        self.assertEqual(self.listed(), [])
+
+    def test_unhealthy_replica_falls_back_to_the_primary(self):
+        with mock.patch.object(replicas, "replica_lag", side_effect=DatabaseError):
+            self.assertEqual(self.listed(), [self.task.pk])
+        with mock.patch.object(replicas, "replica_lag", return_value=60):
+            self.assertEqual(self.listed(), [self.task.pk])
+        self.assertEqual(self.listed(), [])
+
+    def test_router(self):
+        router = replicas.ReplicaRouter()
+        self.assertIsNone(router.db_for_read(Task))
+        token = replicas._read_alias.set(REPLICA)
+        try:
+            self.assertEqual(router.db_for_read(Task), REPLICA)
+            self.assertEqual(router.db_for_write(Task), DEFAULT_DB_ALIAS)
+            with transaction.atomic():
+                self.assertIsNone(router.db_for_read(Task))
+            self.assertFalse(router.allow_migrate(REPLICA, "tasks"))
+        finally:
+            replicas._read_alias.reset(token)
+
+
+class SchemaCacheTests(SimpleTestCase):
+    """
+    The prebuilt schema (manage.py build_schema) as SchemaView serves it
+    with OPENAPI_SCHEMA_CACHE on.
+    """
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        tmp = tempfile.TemporaryDirectory()
+        cls.addClassCleanup(tmp.cleanup)
+        cls.dir = Path(tmp.name)
+        call_command("build_schema", "--dir", tmp.name, stdout=io.StringIO())
+        cls.manifest = json.loads((cls.dir / openapi.MANIFEST).read_text())
+
+    def setUp(self):
+        self.enterContext(override_settings(OPENAPI_SCHEMA_CACHE=True, OPENAPI_SCHEMA_DIR=self.dir))
+        # Served from the files only: generating here would be a miss.
+        self.enterContext(mock.patch.object(openapi, "generate", side_effect=AssertionError("generated")))
+        openapi._documents = None
+        self.addCleanup(setattr, openapi, "_documents", None)
+
+    def get(self, **headers):
+        return self.client.get(reverse("schema"), {"format": "json"}, headers=headers)
+
+    def test_build_writes_every_file(self):
+        self.assertEqual(self.manifest["version"], settings.APP_VERSION)
+        self.assertEqual(set(self.manifest["etags"]), {"json", "yaml"})
+        for format, etag in self.manifest["etags"].items():
+            body = (self.dir / f"openapi.{format}").read_bytes()
+            self.assertEqual(gzip.decompress((self.dir / f"openapi.{format}.gz").read_bytes()), body)
+            self.assertTrue(etag.startswith('W/"'))
+        self.assertEqual(json.loads((self.dir / "openapi.json").read_bytes())["openapi"][:2], "3.")
+
+    def test_serves_the_prebuilt_file(self):
+        response = self.get()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.content, (self.dir / "openapi.json").read_bytes())
+        self.assertEqual(response["ETag"], self.manifest["etags"]["json"])
+        self.assertEqual(response["Cache-Control"], "no-cache")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertFalse(response.has_header("Content-Encoding"))
+
+    def test_matching_etag_is_not_modified(self):
+        response = self.get(if_none_match=self.manifest["etags"]["json"])
+        self.assertEqual(response.status_code, 304)
+        self.assertEqual(response.content, b"")
+        self.assertEqual(self.get(if_none_match='W/"stale"').status_code, 200)
+
+    def test_gzip(self):
+        response = self.get(accept_encoding="br, gzip")
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        self.assertIn("Accept-Encoding", response["Vary"])
+        self.assertEqual(gzip.decompress(response.content), (self.dir / "openapi.json").read_bytes())
+
+    def test_manifest_for_another_version_is_ignored(self):
+        self.assertIsNotNone(openapi.load(self.dir))
+        with override_settings(APP_VERSION="another-build"):
+            self.assertIsNone(openapi.load(self.dir))
+            with self.assertRaisesMessage(AssertionError, "generated"):
+                self.get()
+
+
+@override_settings(METRICS_ENABLED=True, METRICS_TOKEN="scrape", METRICS_DIR="")
+class MetricsTests(TestCase):
+    """
+    What /metrics/ exposes, who may read it, and totals across processes.
+    """
+
+    def setUp(self):
+        self.enterContext(mock.patch.object(metrics, "registry", metrics.Registry()))
+        self.user = CustomUser.objects.create_user("user", role="USER")
+        Task.objects.create(title="t", assigned_to=self.user)
+
+    def scrape(self, **headers):
+        return self.client.get(reverse("metrics"), headers=headers)
+
+    def samples(self):
+        response = self.scrape(authorization="Bearer scrape")
+        self.assertEqual(response["Content-Type"], metrics.CONTENT_TYPE)
+        return dict(line.rsplit(" ", 1) for line in response.content.decode().splitlines() if line[0] != "#")
+
+    def test_exposition(self):
+        client = APIClient()
+        client.force_authenticate(self.user)
+        with CaptureQueriesContext(connections[DEFAULT_DB_ALIAS]) as queries:
+            for _ in range(2):
+                self.assertEqual(client.get(reverse("tasks-list")).status_code, 200)
+        total = len(queries)  # before the scrape resets connection.queries
+        samples = self.samples()
+
+        labels = 'view="tasks-list",method="GET",status="200"'
+        self.assertEqual(samples[f'http_request_duration_seconds_bucket{{{labels},le="+Inf"}}'], "2")
+        self.assertEqual(samples[f"http_request_duration_seconds_count{{{labels}}}"], "2")
+        self.assertGreater(float(samples[f"http_request_duration_seconds_sum{{{labels}}}"]), 0)
+        self.assertEqual(samples[f"http_request_db_queries_sum{{{labels}}}"], str(total))
+        per_request = total // 2
+        below = max(b for b in metrics.QUERY_BUCKETS if b < per_request)
+        above = min(b for b in metrics.QUERY_BUCKETS if b >= per_request)
+        self.assertEqual(samples[f'http_request_db_queries_bucket{{{labels},le="{float(below)}"}}'], "0")
+        self.assertEqual(samples[f'http_request_db_queries_bucket{{{labels},le="{float(above)}"}}'], "2")
+        self.assertIn(f"http_request_view_seconds_total{{{labels}}}", samples)
+
+    def test_token_required(self):
+        self.assertEqual(self.scrape().status_code, 401)
+        self.assertEqual(self.scrape(authorization="Bearer wrong").status_code, 401)
+        with override_settings(METRICS_ENABLED=False):
+            self.assertEqual(self.scrape(authorization="Bearer scrape").status_code, 404)
+        with override_settings(METRICS_TOKEN=""):
+            self.assertEqual(self.scrape(authorization="Bearer ").status_code, 404)
+
+    def test_totals_of_every_process(self):
+        tmp = tempfile.TemporaryDirectory()
+        self.addCleanup(tmp.cleanup)
+        labels = ("tasks-list", "GET", "200")
+        for pid, seconds in ((101, 0.02), (102, 0.3)):
+            other = metrics.Registry()
+            other.observe(labels, seconds, 3, 0.01, seconds, 0.0)
+            with override_settings(METRICS_DIR=tmp.name), mock.patch("os.getpid", return_value=pid):
+                other.flush(force=True)
+        metrics.registry.observe(labels, 0.004, 1, 0.001, 0.003, 0.001)
+
+        with override_settings(METRICS_DIR=tmp.name):
+            metrics.registry.flush(force=True)  # its own file is not counted twice
+            self.assertEqual(sorted(os.listdir(tmp.name)), sorted(["101.json", "102.json", f"{os.getpid()}.json"]))
+            series = metrics.registry.collect()[labels]
+        self.assertEqual(series["count"], 3)
+        self.assertEqual(series["queries_sum"], 7)
+        self.assertAlmostEqual(series["latency_sum"], 0.324)
+        # 0.004 <= 5ms, 0.02 <= 25ms, 0.3 <= 0.5s
+        self.assertEqual([i for i, n in enumerate(series["latency"]) if n], [0, 2, 6])
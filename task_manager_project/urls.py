@@ -1,11 +1,12 @@
 from django.contrib import admin
 from django.urls import path, include
-from drf_spectacular.views import SpectacularAPIView, SpectacularRedocView, SpectacularSwaggerView
 from django.views.generic import RedirectView
 from rest_framework_simplejwt.views import TokenObtainPairView, TokenRefreshView
 
 # use your wrappers (nice tags in docs)
 from accounts.api_auth import LoginView, RefreshView, VerifyView, LogoutView
+from task_manager_project.metrics import metrics_view
+from task_manager_project.schema import redoc_view, schema_view, swagger_view
 
 urlpatterns = [
     path("admin/", admin.site.urls),
@@ -25,10 +26,13 @@ urlpatterns = [
     path("api/v1/accounts/", include("accounts.urls")),
     path("api/v1/tasks/", include("tasks.urls")),
 
-    # OpenAPI schema & docs
-    path("api/v1/schema/", SpectacularAPIView.as_view(), name="schema"),
-    path("api/v1/docs/", SpectacularSwaggerView.as_view(url_name="schema"), name="swagger-ui"),
-    path("api/v1/redoc/", SpectacularRedocView.as_view(url_name="schema"), name="redoc"),
+    # OpenAPI schema & docs (drf_spectacular views, imported on first use)
+    path("api/v1/schema/", schema_view, name="schema"),
+    path("api/v1/docs/", swagger_view, name="swagger-ui"),
+    path("api/v1/redoc/", redoc_view, name="redoc"),
+
+    # Prometheus scrape target (see task_manager_project.metrics)
+    path("metrics/", metrics_view, name="metrics"),
 
     path("", RedirectView.as_view(url="/admin_panel/")),
 ]
@@ -1,8 +1,28 @@
 from django.contrib import admin
+from django.contrib.auth import get_user_model
+from django.db.models import Q
+
 from .models import Task
+from .search import matching_ids
 
 @admin.register(Task)
 class TaskAdmin(admin.ModelAdmin):
     list_display = ("title", "assigned_to", "status", "due_date", "created_by")
+    # created_by is nullable, so the default select_related() would skip it.
+    list_select_related = ("assigned_to", "created_by")
     list_filter = ("status", "due_date")
+    # Shows the search box; get_search_results() below decides what matches.
     search_fields = ("title", "assigned_to__username")
+
+    def get_search_results(self, request, queryset, search_term):
+        # Title/description words via the full-text index, or an exact
+        # assignee username; never a LIKE scan over every description.
+        term = search_term.strip()
+        if not term:
+            return queryset, False
+        assignees = get_user_model().objects.filter(username__iexact=term).values("pk")
+        condition = Q(assigned_to__in=assignees)
+        ids = matching_ids(term)
+        if ids is not None:
+            condition |= Q(pk__in=ids)
+        return queryset.filter(condition), False
@@ -0,0 +1,123 @@
+"""
+Async variants of the task list, detail and report endpoints, for ASGI
+servers (task_manager_project.asgi under uvicorn or daphne).
+
+They answer like TaskViewSet -- same JWT authentication, scope, filters,
+sparse fieldsets, keyset pages and ETags, all taken from a TaskViewSet
+instance that is set up but never dispatched -- while waiting on the
+database through Django's async ORM (aiterator, aget) instead
+of holding a worker thread. One ASGI worker therefore keeps many requests
+in flight. Django still executes the queries on its sync thread, one at a
+time per process, so the gain is in what surrounds them; compare with
+``manage.py bench_asgi``.
+
+Responses are always JSON (no browsable API), and the routes are not in
+the OpenAPI schema: they mirror the documented TaskViewSet ones.
+"""
+from functools import wraps
+
+from django.shortcuts import aget_object_or_404
+from django.views.decorators.http import require_safe
+from rest_framework.exceptions import AuthenticationFailed, NotAuthenticated, PermissionDenied
+from rest_framework.renderers import JSONRenderer
+from rest_framework.request import Request
+from rest_framework.settings import api_settings
+
+from accounts.authentication import CachedJWTAuthentication
+from task_manager_project.replicas import replica_reads
+
+from .views import TaskViewSet
+
+authentication = CachedJWTAuthentication()
+renderer = JSONRenderer()
+
+
+def _render(response):
+    response.accepted_renderer = renderer
+    response.accepted_media_type = renderer.media_type
+    response.renderer_context = {"response": response}
+    return response.render()
+
+
+def api_view(view_func):
+    """
+    Render the DRF Response an async view returns, and its exceptions the
+    way APIView.handle_exception() would.
+    """
+    @wraps(view_func)
+    async def _wrapped(request, *args, **kwargs):
+        try:
+            response = await view_func(request, *args, **kwargs)
+        except Exception as exc:
+            if isinstance(exc, (NotAuthenticated, AuthenticationFailed)):
+                exc.auth_header = authentication.authenticate_header(request)
+            response = api_settings.EXCEPTION_HANDLER(exc, {"request": request})
+            if response is None:
+                raise
+        return _render(response)
+    return _wrapped
+
+
+async def viewset(request, action, **kwargs):
+    """
+    A TaskViewSet for ``request`` as initial() leaves it: user
+    authenticated and view-level permissions checked.
+    """
+    drf_request = Request(request)
+    user_auth = await authentication.aauthenticate(request)
+    if user_auth is not None:
+        drf_request.user, drf_request.auth = user_auth
+    view = TaskViewSet(request=drf_request, args=(), kwargs=kwargs, action=action, format_kwarg=None)
+    for permission in view.get_permissions():
+        if not permission.has_permission(drf_request, view):
+            if user_auth is None:
+                raise NotAuthenticated()
+            raise PermissionDenied(getattr(permission, "message", None))
+    return view
+
+
+async def get_object(view):
+    """
+    view.get_object() without blocking. The queryset is already narrowed to
+    the caller's scope, which is exactly what TaskPermission's object check
+    enforces, so a task found here needs no further check.
+    """
+    queryset = view.filter_queryset(view.get_queryset())
+    return await aget_object_or_404(queryset, pk=view.kwargs["pk"])
+
+
+@replica_reads
+@require_safe
+@api_view
+async def task_list(request):
+    """
+    GET /api/v1/tasks/async/ -- TaskViewSet.list().
+    """
+    view = await viewset(request, "list")
+    serializer, rows = view.list_rows(view.filter_queryset(view.get_queryset()))
+    page = await view.paginator.apaginate_queryset(rows, view.request, view=view)
+    if page is None:
+        return view.list_response(serializer, [row async for row in rows.aiterator()], paginated=False)
+    return view.list_response(serializer, page)
+
+
+@replica_reads
+@require_safe
+@api_view
+async def task_detail(request, pk):
+    """
+    GET /api/v1/tasks/async/<id>/ -- TaskViewSet.retrieve().
+    """
+    view = await viewset(request, "retrieve", pk=pk)
+    return view.detail_response(await get_object(view))
+
+
+@replica_reads
+@require_safe
+@api_view
+async def task_report(request, pk):
+    """
+    GET /api/v1/tasks/async/<id>/report/ -- TaskViewSet.report().
+    """
+    view = await viewset(request, "report", pk=pk)
+    return view.report_response(await get_object(view))
@@ -0,0 +1,268 @@
+"""
+In-process load generator behind ``manage.py bench``.
+
+Each scenario is one kind of request (JWT login, a TaskViewSet action, an
+admin_panel page, an OTP step) made as a particular role against a dataset
+created by ``manage.py seed_bench``. Scenarios run one after another; within
+a scenario ``concurrency`` threads share the request budget, each with its
+own test clients and database connection, so contention on the database and
+caches is real while the network is left out of the measurement.
+
+Per request the wall time and the number of SQL queries are recorded (via
+``connection.execute_wrapper``); a scenario reports latency percentiles,
+throughput, query counts and status codes.
+"""
+import math
+import random
+import statistics
+import threading
+import time
+from collections import Counter
+from datetime import timedelta
+
+from django.db import connection
+from django.test import Client
+from django.utils import timezone
+from rest_framework.test import APIClient
+
+from accounts.authentication import RoleClaimsTokenSerializer
+from accounts.models import CustomUser, EmailOTP
+
+from .models import Task
+
+# Title prefix of the tasks written by the create scenario, for cleanup.
+CREATED_TITLE = "bench-run"
+
+
+class QueryCounter:
+    def __init__(self):
+        self.count = 0
+
+    def __call__(self, execute, sql, params, many, context):
+        self.count += 1
+        return execute(sql, params, many, context)
+
+
+class Actor:
+    """
+    One role's identity inside one worker thread: an authenticated API
+    client (JWT), a logged-in browser client and an anonymous client, plus
+    sample ids from the role's own task scope.
+    """
+
+    def __init__(self, user, password, rng):
+        self.user = user
+        self.password = password
+        self.rng = rng
+
+        self.api = APIClient()
+        access = RoleClaimsTokenSerializer.get_token(user).access_token
+        self.api.credentials(HTTP_AUTHORIZATION=f"Bearer {access}")
+        self.web = Client()
+        self.web.force_login(user)
+        self.anonymous = Client()
+
+        visible = Task.objects.visible_to(user).order_by("-updated_at")
+        self.task_ids = list(visible.values_list("id", flat=True)[:200])
+        self.completed_ids = list(
+            visible.filter(status=Task.Status.COMPLETED).values_list("id", flat=True)[:200]
+        )
+        if user.is_superadmin():
+            assignable = CustomUser.objects.filter(role=CustomUser.Roles.USER)
+        elif user.is_admin():
+            assignable = CustomUser.objects.filter(manager=user)
+        else:
+            assignable = CustomUser.objects.filter(pk=user.pk)
+        self.assignable = list(assignable.order_by("id").values_list("id", flat=True)[:200])
+
+    def pick(self, ids):
+        return self.rng.choice(ids) if ids else 0
+
+
+# ---------------------------------------------------------------------------
+# Scenarios: each returns (zero-argument request callable, expected statuses).
+# Anything done before returning is setup and is not timed.
+# ---------------------------------------------------------------------------
+
+def login(actor):
+    data = {"username": actor.user.username, "password": actor.password}
+    return lambda: actor.anonymous.post("/api/v1/auth/login/", data), {200}
+
+
+def task_list(actor):
+    return lambda: actor.api.get("/api/v1/tasks/"), {200}
+
+
+def task_list_filtered(actor):
+    return lambda: actor.api.get("/api/v1/tasks/?status=TODO&ordering=-updated_at"), {200}
+
+
+def task_detail(actor):
+    path = f"/api/v1/tasks/{actor.pick(actor.task_ids)}/"
+    return lambda: actor.api.get(path), {200}
+
+
+def task_create(actor):
+    data = {
+        "title": f"{CREATED_TITLE} {actor.rng.randrange(10**9)}",
+        "description": "Created by manage.py bench.",
+        "assigned_to": actor.pick(actor.assignable),
+        "due_date": (timezone.localdate() + timedelta(days=7)).isoformat(),
+    }
+    return lambda: actor.api.post("/api/v1/tasks/", data, format="json"), {201}
+
+
+def task_report(actor):
+    path = f"/api/v1/tasks/{actor.pick(actor.completed_ids)}/report/"
+    return lambda: actor.api.get(path), {200}
+
+
+def panel_dashboard(actor):
+    return lambda: actor.web.get("/admin_panel/"), {200}
+
+
+def panel_tasks(actor):
+    return lambda: actor.web.get("/admin_panel/tasks/"), {200}
+
+
+def panel_users(actor):
+    return lambda: actor.web.get("/admin_panel/users/"), {200}
+
+
+def otp_request(actor):
+    data = {"email": actor.user.email}
+    return lambda: actor.anonymous.post("/api/v1/accounts/auth/otp/request/", data), {302}
+
+
+def otp_verify(actor):
+    otp = EmailOTP.create_for_user(actor.user)
+    data = {"email": actor.user.email, "code": otp.code}
+    return lambda: actor.anonymous.post("/api/v1/accounts/auth/otp/verify/", data), {302}
+
+
+# (name, role, scenario); roles are CustomUser.Roles values.
+SCENARIOS = [
+    ("auth.login", "USER", login),
+    ("tasks.list", "USER", task_list),
+    ("tasks.list", "ADMIN", task_list),
+    ("tasks.list", "SUPERADMIN", task_list),
+    ("tasks.list_filtered", "ADMIN", task_list_filtered),
+    ("tasks.list_filtered", "SUPERADMIN", task_list_filtered),
+    ("tasks.detail", "USER", task_detail),
+    ("tasks.detail", "ADMIN", task_detail),
+    ("tasks.create", "ADMIN", task_create),
+    ("tasks.report", "ADMIN", task_report),
+    ("tasks.report", "SUPERADMIN", task_report),
+    ("panel.dashboard", "SUPERADMIN", panel_dashboard),
+    ("panel.tasks", "ADMIN", panel_tasks),
+    ("panel.tasks", "SUPERADMIN", panel_tasks),
+    ("panel.users", "SUPERADMIN", panel_users),
+    ("otp.request", "USER", otp_request),
+    ("otp.verify", "USER", otp_verify),
+]
+
+
+def scenario_label(name, role):
+    return f"{name}[{role.lower()}]"
+
+
+def percentile(ordered, fraction):
+    """
+    Nearest-rank percentile of an already sorted list.
+    """
+    if not ordered:
+        return None
+    return ordered[max(0, math.ceil(fraction * len(ordered)) - 1)]
+
+
+def summarize(samples, elapsed):
+    """
+    Aggregate ``(seconds, queries, status, ok)`` samples of one scenario.
+    """
+    latencies = sorted(seconds * 1000 for seconds, _, _, _ in samples)
+    queries = [n for _, n, _, _ in samples]
+    return {
+        "requests": len(samples),
+        "errors": sum(1 for _, _, _, ok in samples if not ok),
+        "throughput_rps": round(len(samples) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "mean": round(statistics.fmean(latencies), 3) if latencies else None,
+            "p50": round(percentile(latencies, 0.50), 3) if latencies else None,
+            "p95": round(percentile(latencies, 0.95), 3) if latencies else None,
+            "p99": round(percentile(latencies, 0.99), 3) if latencies else None,
+            "max": round(latencies[-1], 3) if latencies else None,
+        },
+        "queries": {
+            "mean": round(statistics.fmean(queries), 2) if queries else None,
+            "max": max(queries) if queries else None,
+        },
+        "status_codes": {str(code): n for code, n in sorted(Counter(s for _, _, s, _ in samples).items())},
+    }
+
+
+class Runner:
+    """
+    Runs scenarios; ``pools`` maps each role to the user ids its threads
+    act as (thread ``i`` takes the ``i``-th, wrapping around).
+    """
+
+    def __init__(self, pools, password, concurrency=8, requests=200, warmup=10, seed=None):
+        self.pools = pools
+        self.password = password
+        self.concurrency = concurrency
+        self.requests = requests
+        self.warmup = warmup
+        self.seed = seed
+
+    def _worker(self, index, role, scenario, quota, samples, windows, failures):
+        rng = random.Random(None if self.seed is None else self.seed * 1000 + index)
+        try:
+            pool = self.pools[role]
+            actor = Actor(CustomUser.objects.get(pk=pool[index % len(pool)]), self.password, rng)
+            first = last = None
+            for n in range(quota):
+                request, expected = scenario(actor)
+                counter = QueryCounter()
+                with connection.execute_wrapper(counter):
+                    started = time.perf_counter()
+                    response = request()
+                    ended = time.perf_counter()
+                if n < self.warmup:
+                    continue
+                first = started if first is None else first
+                last = ended
+                ok = response.status_code in expected
+                samples.append((ended - started, counter.count, response.status_code, ok))
+            if first is not None:
+                windows.append((first, last))
+        except Exception as exc:
+            failures.append(f"{type(exc).__name__}: {exc}")
+        finally:
+            connection.close()
+
+    def run(self, name, role, scenario):
+        """
+        Run one scenario and return its summary.
+        """
+        samples, windows, failures = [], [], []
+        share, extra = divmod(self.requests, self.concurrency)
+        threads = [
+            threading.Thread(
+                target=self._worker,
+                args=(i, role, scenario, self.warmup + share + (i < extra), samples, windows, failures),
+            )
+            for i in range(self.concurrency)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        # Throughput covers the measured requests only, from the first one
+        # started after warm-up to the last one finished.
+        elapsed = max(w[1] for w in windows) - min(w[0] for w in windows) if windows else 0
+
+        summary = summarize(samples, elapsed)
+        summary.update(name=name, role=role)
+        if failures:
+            summary["failures"] = sorted(set(failures))
+        return summary
@@ -0,0 +1,97 @@
+"""
+HTTP validators (ETag / Last-Modified) for task responses.
+
+A task's JSON is a function of its row, and every write path bumps
+``updated_at``, so:
+
+- detail: the strong ETag is (id, updated_at); usable with If-Match.
+- list: the weak ETag hashes the (id, updated_at) pairs of the page's rows
+  and whether pages precede and follow it, together with the caller and
+  the full query string (filters, fields, cursor, page size). Those
+  determine the page's JSON, so an unchanged ETag means an unchanged page.
+  The rows are read anyway, so validation costs no extra query; a 304
+  saves serializing and sending the page.
+"""
+import hashlib
+
+from django.utils.http import http_date, parse_etags, parse_http_date_safe
+from rest_framework import status
+from rest_framework.exceptions import APIException
+from rest_framework.response import Response
+
+# Bump when TaskSerializer output changes shape, to invalidate client copies.
+REPRESENTATION_VERSION = "2"
+
+
+class PreconditionFailed(APIException):
+    status_code = status.HTTP_412_PRECONDITION_FAILED
+    default_detail = "The task has changed since it was fetched; reload it and retry."
+    default_code = "precondition_failed"
+
+
+def _micros(moment):
+    return int(moment.timestamp() * 1_000_000)
+
+
+def task_etag(task):
+    return f'"{REPRESENTATION_VERSION}-{task.pk}-{_micros(task.updated_at)}"'
+
+
+def page_validators(request, rows, *state):
+    """
+    Return (etag, last_modified) for a list page of values() ``rows`` (with
+    "id" and "updated_at"); ``state``: anything else the page shows, such
+    as whether further pages exist.
+    """
+    key = "|".join([
+        REPRESENTATION_VERSION,
+        str(request.user.pk),
+        request.get_full_path(),
+        *map(str, state),
+        *(f"{row['id']}:{_micros(row['updated_at'])}" for row in rows),
+    ])
+    last = max((row["updated_at"] for row in rows), default=None)
+    return f'W/"{hashlib.sha1(key.encode()).hexdigest()}"', last
+
+
+def _opaque(etag):
+    return etag[2:] if etag.startswith("W/") else etag
+
+
+def none_match(request, etag, last_modified=None):
+    """
+    True if the client's copy is current (If-None-Match, weak comparison;
+    If-Modified-Since only when given a last_modified and no If-None-Match).
+    """
+    header = request.META.get("HTTP_IF_NONE_MATCH")
+    if header:
+        etags = parse_etags(header)
+        return "*" in etags or _opaque(etag) in {_opaque(e) for e in etags}
+    since = parse_http_date_safe(request.META.get("HTTP_IF_MODIFIED_SINCE", ""))
+    return bool(since and last_modified and int(last_modified.timestamp()) <= since)
+
+
+def check_if_match(request, etag):
+    """
+    Raise PreconditionFailed unless If-Match is absent, "*" or equal to
+    ``etag`` (strong comparison).
+    """
+    header = request.META.get("HTTP_IF_MATCH")
+    if not header:
+        return
+    etags = parse_etags(header)
+    if "*" not in etags and etag not in etags:
+        raise PreconditionFailed()
+
+
+def set_validators(response, etag, last_modified=None):
+    response["ETag"] = etag
+    if last_modified:
+        response["Last-Modified"] = http_date(last_modified.timestamp())
+    # Clients may keep a copy but must revalidate it; never share across users.
+    response["Cache-Control"] = "private, no-cache"
+    return response
+
+
+def not_modified(etag, last_modified=None):
+    return set_validators(Response(status=status.HTTP_304_NOT_MODIFIED), etag, last_modified)
@@ -0,0 +1,215 @@
+"""
+Server-side task filters and ordering, shared by the API and the admin panel.
+
+Only filters and orderings that an index on tasks_task can answer are
+accepted (see Task.Meta.indexes). Each anchor's index is also sorted by the
+keyset order, so a filtered page is read in order and stops after one
+page instead of sorting every match:
+
+    status          (status, updated_at, id)
+    assigned_to     (assigned_to, updated_at, id)
+    created_by      (created_by, updated_at, id)
+    overdue         partial (due_date) WHERE status is open; only open,
+                    past-due tasks are sorted
+    updated_since   (updated_at, id)
+    due_after/due_before  only together with one of the above
+
+Users and Admins are already narrowed to an indexed scope, so any
+combination is fine for them. An unscoped (SuperAdmin) query must include
+at least one of the anchors above, and a filtered one must keep the
+updated_at ordering; otherwise the request is rejected instead of scanning
+or sorting the whole table.
+"""
+from datetime import datetime, time
+
+from django.utils import timezone
+from django.utils.dateparse import parse_date, parse_datetime
+from rest_framework import serializers
+from rest_framework.filters import BaseFilterBackend
+
+from .models import Task
+
+# Filters that lead an index and therefore bound the rows read.
+ANCHORS = ("status", "assigned_to", "created_by", "overdue", "updated_since")
+
+# Public ordering name -> keyset ordering (last field unique).
+ORDERINGS = {
+    "-updated_at": ("-updated_at", "-id"),
+    "updated_at": ("updated_at", "id"),
+    "-id": ("-id",),
+    "id": ("id",),
+}
+DEFAULT_ORDERING = "-updated_at"
+# Orderings the anchors' indexes are sorted by.
+INDEXED_ORDERINGS = ("-updated_at", "updated_at")
+
+OPEN_STATUSES = (Task.Status.TODO, Task.Status.IN_PROGRESS)
+
+
+class TaskFilterError(ValueError):
+    """
+    Invalid filter input; ``errors`` maps parameter names to messages.
+    """
+
+    def __init__(self, errors):
+        super().__init__(errors)
+        self.errors = errors
+
+
+def _int(value):
+    try:
+        return int(value)
+    except ValueError:
+        raise ValueError("Expected an integer id.")
+
+
+def _date(value):
+    parsed = parse_date(value)
+    if parsed is None:
+        raise ValueError("Expected a date (YYYY-MM-DD).")
+    return parsed
+
+
+def _datetime(value):
+    parsed = parse_datetime(value)
+    if parsed is None:
+        day = parse_date(value)
+        if day is None:
+            raise ValueError("Expected an ISO 8601 date or datetime.")
+        parsed = datetime.combine(day, time.min)
+    if timezone.is_naive(parsed):
+        parsed = timezone.make_aware(parsed)
+    return parsed
+
+
+def _bool(value):
+    lowered = value.lower()
+    if lowered in ("1", "true", "yes"):
+        return True
+    if lowered in ("0", "false", "no"):
+        return False
+    raise ValueError("Expected true or false.")
+
+
+def _statuses(value):
+    statuses = {s.strip() for s in value.split(",") if s.strip()}
+    unknown = statuses - set(Task.Status.values)
+    if unknown:
+        raise ValueError(
+            f"Unknown status {', '.join(sorted(unknown))}; expected {', '.join(Task.Status.values)}."
+        )
+    return statuses
+
+
+PARSERS = {
+    "status": _statuses,
+    "assigned_to": _int,
+    "created_by": _int,
+    "due_after": _date,
+    "due_before": _date,
+    "overdue": _bool,
+    "updated_since": _datetime,
+}
+
+
+def parse_task_filters(params, scoped):
+    """
+    Validate query parameters into a filters dict. ``scoped`` is True when
+    the queryset is already limited to an indexed role scope.
+    Raises TaskFilterError.
+    """
+    filters, errors = {}, {}
+    for name, parse in PARSERS.items():
+        raw = params.get(name, "").strip()
+        if not raw:
+            continue
+        try:
+            filters[name] = parse(raw)
+        except ValueError as exc:
+            errors[name] = [str(exc)]
+    if errors:
+        raise TaskFilterError(errors)
+
+    if filters.get("overdue") is False:
+        del filters["overdue"]
+    if not scoped and filters and not any(name in filters for name in ANCHORS):
+        raise TaskFilterError({
+            "filters": [
+                f"{', '.join(sorted(filters))} cannot be used on its own; "
+                f"combine with one of: {', '.join(ANCHORS)}."
+            ]
+        })
+    return filters
+
+
+def parse_task_ordering(params, filters=None, scoped=True):
+    """
+    Return the keyset ordering tuple for ``?ordering=``, given the parsed
+    ``filters`` and ``scoped`` as for parse_task_filters(). Raises
+    TaskFilterError.
+    """
+    name = params.get("ordering", "").strip() or DEFAULT_ORDERING
+    if name not in ORDERINGS:
+        raise TaskFilterError({"ordering": [f"Expected one of: {', '.join(ORDERINGS)}."]})
+    if not scoped and filters and name not in INDEXED_ORDERINGS:
+        raise TaskFilterError({
+            "ordering": [f"Filtered lists can only be ordered by {' or '.join(INDEXED_ORDERINGS)}."]
+        })
+    return ORDERINGS[name]
+
+
+def apply_task_filters(queryset, filters):
+    if "status" in filters:
+        queryset = queryset.filter(status__in=sorted(filters["status"]))
+    if "assigned_to" in filters:
+        queryset = queryset.filter(assigned_to_id=filters["assigned_to"])
+    if "created_by" in filters:
+        queryset = queryset.filter(created_by_id=filters["created_by"])
+    if "due_after" in filters:
+        queryset = queryset.filter(due_date__gte=filters["due_after"])
+    if "due_before" in filters:
+        queryset = queryset.filter(due_date__lte=filters["due_before"])
+    if filters.get("overdue"):
+        # Same predicate as the partial index task_open_due_idx.
+        queryset = queryset.filter(status__in=OPEN_STATUSES, due_date__lt=timezone.localdate())
+    if "updated_since" in filters:
+        queryset = queryset.filter(updated_at__gte=filters["updated_since"])
+    return queryset
+
+
+class TaskFilterBackend(BaseFilterBackend):
+    """
+    DRF backend for the filters above; also supplies the paginator's
+    ordering through get_ordering().
+    """
+
+    def filter_queryset(self, request, queryset, view):
+        filters, ordering = self.parse(request)
+        return apply_task_filters(queryset, filters).order_by(*ordering)
+
+    def get_ordering(self, request, queryset, view):
+        return self.parse(request)[1]
+
+    def parse(self, request):
+        scoped = not request.user.is_superadmin()
+        try:
+            filters = parse_task_filters(request.query_params, scoped=scoped)
+            return filters, parse_task_ordering(request.query_params, filters, scoped=scoped)
+        except TaskFilterError as exc:
+            raise serializers.ValidationError(exc.errors)
+
+    def get_schema_operation_parameters(self, view):
+        def param(name, schema, description):
+            return {"name": name, "required": False, "in": "query", "description": description, "schema": schema}
+
+        date = {"type": "string", "format": "date"}
+        return [
+            param("status", {"type": "string"}, f"Comma-separated statuses ({', '.join(Task.Status.values)})."),
+            param("assigned_to", {"type": "integer"}, "Assignee user id."),
+            param("created_by", {"type": "integer"}, "Creator user id."),
+            param("due_after", date, "Due on or after this date."),
+            param("due_before", date, "Due on or before this date."),
+            param("overdue", {"type": "boolean"}, "Open tasks whose due date has passed."),
+            param("updated_since", {"type": "string", "format": "date-time"}, "Updated at or after."),
+            param("ordering", {"type": "string", "enum": list(ORDERINGS)}, f"Default {DEFAULT_ORDERING}."),
+        ]
@@ -0,0 +1,159 @@
+import fnmatch
+import json
+import platform
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test.utils import override_settings
+from django.utils import timezone
+from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+
+from accounts.models import CustomUser, EmailOTP, OutboundEmail
+from tasks import benchmark
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Drive the API, admin panel and OTP endpoints in-process with "
+        "concurrent clients against a dataset from manage.py seed_bench, and "
+        "write p50/p95/p99 latency, throughput and query counts per scenario "
+        "to a JSON file. Pass --baseline to compare with an earlier run."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="loadtest", help="Dataset prefix given to seed_bench.")
+        parser.add_argument("--password", default="Bench-pass-123!")
+        parser.add_argument("--concurrency", type=int, default=8, help="Threads per scenario.")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per scenario.")
+        parser.add_argument("--warmup", type=int, default=5, help="Unmeasured requests per thread.")
+        parser.add_argument(
+            "--only", action="append", default=[],
+            help="Run scenarios matching this pattern (e.g. 'tasks.*'); repeatable.",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--output", default="bench-results.json")
+        parser.add_argument("--baseline", help="Earlier results file to compare against.")
+        parser.add_argument(
+            "--keep-writes", action="store_true",
+            help="Keep the tasks, OTPs, emails and tokens the run created.",
+        )
+
+    def handle(self, *args, **options):
+        if options["concurrency"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency and --requests must be positive.")
+        pools = self.pools(options["prefix"])
+
+        selected = [
+            (benchmark.scenario_label(name, role), name, role, scenario)
+            for name, role, scenario in benchmark.SCENARIOS
+            if not options["only"]
+            or any(fnmatch.fnmatch(benchmark.scenario_label(name, role), p) for p in options["only"])
+        ]
+        if not selected:
+            raise CommandError("No scenario matches --only.")
+
+        runner = benchmark.Runner(
+            pools,
+            options["password"],
+            concurrency=options["concurrency"],
+            requests=options["requests"],
+            warmup=options["warmup"],
+            seed=options["seed"],
+        )
+        started_at = timezone.now()
+        results = {}
+        # Queued OTP emails must not leave the machine.
+        with override_settings(OUTBOX_DISPATCH_ON_COMMIT=False):
+            try:
+                for label, name, role, scenario in selected:
+                    results[label] = runner.run(name, role, scenario)
+                    self.report(label, results[label])
+            finally:
+                if not options["keep_writes"]:
+                    self.clean_up(options["prefix"], started_at)
+
+        document = {
+            "started_at": started_at.isoformat(),
+            "environment": {
+                "python": platform.python_version(),
+                "django": django.get_version(),
+                "database": connection.vendor,
+                "cache": settings.CACHES["default"]["BACKEND"],
+            },
+            "dataset": {
+                "prefix": options["prefix"],
+                "users": CustomUser.objects.filter(username__startswith=f"{options['prefix']}_").count(),
+                "tasks": Task.objects.count(),
+            },
+            "options": {
+                key: options[key] for key in ("concurrency", "requests", "warmup", "seed")
+            },
+            "scenarios": results,
+        }
+        with open(options["output"], "w") as fh:
+            json.dump(document, fh, indent=2)
+        self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        if options["baseline"]:
+            self.compare(options["baseline"], results)
+
+        failed = [label for label, summary in results.items() if summary["errors"] or summary.get("failures")]
+        if failed:
+            raise CommandError("Scenarios with errors: " + ", ".join(failed))
+
+    def pools(self, prefix):
+        """
+        Up to 100 seeded user ids per role, favouring users with tasks.
+        """
+        users = CustomUser.objects.filter(username__startswith=f"{prefix}_", is_active=True)
+        pools = {
+            CustomUser.Roles.SUPERADMIN: users.filter(role=CustomUser.Roles.SUPERADMIN),
+            CustomUser.Roles.ADMIN: users.filter(role=CustomUser.Roles.ADMIN, managed_users__isnull=False),
+            CustomUser.Roles.USER: users.filter(role=CustomUser.Roles.USER, tasks__isnull=False),
+        }
+        pools = {
+            str(role): list(queryset.distinct().order_by("id").values_list("id", flat=True)[:100])
+            for role, queryset in pools.items()
+        }
+        empty = [role for role, ids in pools.items() if not ids]
+        if empty:
+            raise CommandError(
+                f"No {prefix}_* users for {', '.join(empty)}; run manage.py seed_bench first."
+            )
+        return pools
+
+    def report(self, label, summary):
+        latency = summary["latency_ms"]
+        self.stdout.write(
+            f"{label:<34} {summary['throughput_rps'] or 0:>8.1f} req/s  "
+            f"p50 {latency['p50'] or 0:>8.2f}  p95 {latency['p95'] or 0:>8.2f}  "
+            f"p99 {latency['p99'] or 0:>8.2f} ms  "
+            f"queries {summary['queries']['mean'] or 0:>5.1f}  errors {summary['errors']}"
+        )
+        for failure in summary.get("failures", []):
+            self.stderr.write(f"  {failure}")
+
+    def compare(self, path, results):
+        with open(path) as fh:
+            baseline = json.load(fh)["scenarios"]
+        self.stdout.write(f"\nAgainst {path} (p95 ms, queries):")
+        for label, summary in results.items():
+            before = baseline.get(label)
+            if before is None:
+                continue
+            old, new = before["latency_ms"]["p95"], summary["latency_ms"]["p95"]
+            change = f"{(new - old) / old:+.0%}" if old and new is not None else "n/a"
+            self.stdout.write(
+                f"{label:<34} {old} -> {new} ({change})  "
+                f"{before['queries']['mean']} -> {summary['queries']['mean']}"
+            )
+
+    def clean_up(self, prefix, since):
+        users = CustomUser.objects.filter(username__startswith=f"{prefix}_")
+        Task.objects.filter(title__startswith=benchmark.CREATED_TITLE, created_at__gte=since).delete()
+        EmailOTP.objects.filter(user__in=users, created_at__gte=since).delete()
+        OutboundEmail.objects.filter(to_email__startswith=f"{prefix}_", created_at__gte=since).delete()
+        OutstandingToken.objects.filter(user__in=users, created_at__gte=since).delete()
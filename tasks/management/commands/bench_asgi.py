@@ -0,0 +1,253 @@
+import asyncio
+import fnmatch
+import json
+import queue
+import random
+import threading
+import time
+
+from asgiref.sync import sync_to_async
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, connections
+from django.test import AsyncClient
+from django.test.utils import override_settings
+from django.utils import timezone
+
+from accounts.authentication import RoleClaimsTokenSerializer
+from accounts.models import CustomUser
+from tasks import benchmark
+from tasks.management.commands.bench import Command as BenchCommand
+
+# (name, role, method, WSGI path, ASGI path, expected status). Paths are
+# formatted with one of the actor's task ids and completed task ids.
+ENDPOINTS = [
+    ("tasks.list", "ADMIN", "get", "/api/v1/tasks/", "/api/v1/tasks/async/", 200),
+    ("tasks.detail", "USER", "get", "/api/v1/tasks/{task}/", "/api/v1/tasks/async/{task}/", 200),
+    (
+        "tasks.report", "ADMIN", "get",
+        "/api/v1/tasks/{completed}/report/", "/api/v1/tasks/async/{completed}/report/", 200,
+    ),
+    (
+        "otp.request", "USER", "post",
+        "/api/v1/accounts/auth/otp/request/", "/api/v1/accounts/auth/otp/request/async/", 302,
+    ),
+]
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the WSGI and ASGI request paths under concurrency: the sync "
+        "TaskViewSet and OTP views served by a fixed number of threads (like "
+        "gunicorn's workers/threads) against their async variants "
+        "(tasks.async_views) on a single event loop, at each --concurrency "
+        "level, against a dataset from manage.py seed_bench."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--prefix", default="loadtest", help="Dataset prefix given to seed_bench.")
+        parser.add_argument("--password", default="Bench-pass-123!")
+        parser.add_argument(
+            "--concurrency", default="1,8,32",
+            help="Comma-separated numbers of clients with a request in flight.",
+        )
+        parser.add_argument("--threads", type=int, default=4, help="WSGI threads serving the requests.")
+        parser.add_argument("--requests", type=int, default=200, help="Measured requests per run.")
+        parser.add_argument("--warmup", type=int, default=2, help="Unmeasured requests per client.")
+        parser.add_argument(
+            "--only", action="append", default=[],
+            help="Run endpoints matching this pattern (e.g. 'tasks.*'); repeatable.",
+        )
+        parser.add_argument("--seed", type=int, default=None)
+        parser.add_argument("--output", help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        try:
+            levels = [int(n) for n in options["concurrency"].split(",")]
+        except ValueError:
+            raise CommandError("--concurrency expects comma-separated integers.")
+        if min(levels) < 1 or options["threads"] < 1 or options["requests"] < 1:
+            raise CommandError("--concurrency, --threads and --requests must be positive.")
+        bench = BenchCommand()
+        pools = bench.pools(options["prefix"])
+        endpoints = [
+            endpoint for endpoint in ENDPOINTS
+            if not options["only"]
+            or any(fnmatch.fnmatch(benchmark.scenario_label(endpoint[0], endpoint[1]), p) for p in options["only"])
+        ]
+        if not endpoints:
+            raise CommandError("No endpoint matches --only.")
+
+        self.options = options
+        started_at = timezone.now()
+        results = {}
+        # Queued OTP emails must not leave the machine.
+        with override_settings(OUTBOX_DISPATCH_ON_COMMIT=False):
+            try:
+                for endpoint in endpoints:
+                    label = benchmark.scenario_label(endpoint[0], endpoint[1])
+                    for level in levels:
+                        actors = self.actors(pools[endpoint[1]], level)
+                        wsgi = self.run_wsgi(endpoint, actors)
+                        asgi = asyncio.run(self.run_asgi(endpoint, actors))
+                        results[f"{label}@{level}"] = {"concurrency": level, "wsgi": wsgi, "asgi": asgi}
+                        self.report(label, level, wsgi, asgi)
+            finally:
+                bench.clean_up(options["prefix"], started_at)
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                document = {"started_at": started_at.isoformat(), "threads": options["threads"], "runs": results}
+                json.dump(document, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        failed = [key for key, run in results.items() if run["wsgi"]["errors"] or run["asgi"]["errors"]]
+        if failed:
+            raise CommandError("Runs with errors: " + ", ".join(failed))
+
+    def actors(self, pool, count):
+        seed = self.options["seed"]
+        actors = []
+        for i in range(count):
+            rng = random.Random(None if seed is None else seed * 1000 + i)
+            actor = benchmark.Actor(CustomUser.objects.get(pk=pool[i % len(pool)]), self.options["password"], rng)
+            access = RoleClaimsTokenSerializer.get_token(actor.user).access_token
+            actor.headers = {"authorization": f"Bearer {access}"}
+            actor.aclient = AsyncClient()
+            actors.append(actor)
+        return actors
+
+    def quotas(self, count):
+        share, extra = divmod(self.options["requests"], count)
+        return [self.options["warmup"] + share + (i < extra) for i in range(count)]
+
+    def request(self, endpoint, actor, asgi):
+        _, _, method, wsgi_path, asgi_path, _ = endpoint
+        path = (asgi_path if asgi else wsgi_path).format(
+            task=actor.pick(actor.task_ids), completed=actor.pick(actor.completed_ids)
+        )
+        data = {"email": actor.user.email} if method == "post" else None
+        return method, path, data
+
+    # ------------------------------
+    # WSGI: a fixed pool of threads, one request at a time each
+    # ------------------------------
+
+    def run_wsgi(self, endpoint, actors):
+        jobs = queue.Queue()
+        samples, windows, in_flight = [], [], Gauge()
+
+        def serve():
+            try:
+                while (job := jobs.get()) is not None:
+                    job()
+            finally:
+                connection.close()
+
+        def client(actor, quota):
+            first = last = None
+            for n in range(quota):
+                method, path, data = self.request(endpoint, actor, asgi=False)
+                http = actor.api if method == "get" else actor.anonymous
+                done, box = threading.Event(), {}
+
+                def job():
+                    with in_flight:
+                        box["response"] = getattr(http, method)(path, data)
+                    done.set()
+
+                started = time.perf_counter()
+                jobs.put(job)
+                done.wait()
+                ended = time.perf_counter()
+                if n >= self.options["warmup"]:
+                    first = started if first is None else first
+                    last = ended
+                    status = box["response"].status_code
+                    samples.append((ended - started, 0, status, status == endpoint[5]))
+            if first is not None:
+                windows.append((first, last))
+
+        servers = [threading.Thread(target=serve) for _ in range(self.options["threads"])]
+        clients = [
+            threading.Thread(target=client, args=(actor, quota))
+            for actor, quota in zip(actors, self.quotas(len(actors)))
+        ]
+        for thread in servers + clients:
+            thread.start()
+        for thread in clients:
+            thread.join()
+        for _ in servers:
+            jobs.put(None)
+        for thread in servers:
+            thread.join()
+        return self.summarize(samples, windows, in_flight)
+
+    # ------------------------------
+    # ASGI: every client's request in flight on one event loop
+    # ------------------------------
+
+    async def run_asgi(self, endpoint, actors):
+        samples, windows, in_flight = [], [], Gauge()
+
+        async def client(actor, quota):
+            first = last = None
+            for n in range(quota):
+                method, path, data = self.request(endpoint, actor, asgi=True)
+                headers = actor.headers if method == "get" else None
+                started = time.perf_counter()
+                with in_flight:
+                    response = await getattr(actor.aclient, method)(path, data, headers=headers)
+                ended = time.perf_counter()
+                if n >= self.options["warmup"]:
+                    first = started if first is None else first
+                    last = ended
+                    samples.append((ended - started, 0, response.status_code, response.status_code == endpoint[5]))
+            if first is not None:
+                windows.append((first, last))
+
+        try:
+            await asyncio.gather(*(
+                client(actor, quota) for actor, quota in zip(actors, self.quotas(len(actors)))
+            ))
+        finally:
+            # The async ORM ran its queries on its own thread and connection.
+            await sync_to_async(connections.close_all)()
+        return self.summarize(samples, windows, in_flight)
+
+    def summarize(self, samples, windows, in_flight):
+        elapsed = max(w[1] for w in windows) - min(w[0] for w in windows) if windows else 0
+        summary = benchmark.summarize(samples, elapsed)
+        del summary["queries"]  # not counted here; see manage.py bench
+        summary["max_in_flight"] = in_flight.peak
+        return summary
+
+    def report(self, label, level, wsgi, asgi):
+        def line(summary):
+            latency = summary["latency_ms"]
+            return (
+                f"{summary['throughput_rps'] or 0:>8.1f} req/s  p50 {latency['p50'] or 0:>7.2f}  "
+                f"p95 {latency['p95'] or 0:>7.2f} ms  in flight {summary['max_in_flight']:>3}"
+            )
+
+        self.stdout.write(f"{label:<22} c={level:<4} WSGI {line(wsgi)}")
+        self.stdout.write(f"{'':<22} {'':<6} ASGI {line(asgi)}")
+
+
+class Gauge:
+    """
+    Requests currently inside the application, and the most seen at once.
+    """
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.current = 0
+        self.peak = 0
+
+    def __enter__(self):
+        with self.lock:
+            self.current += 1
+            self.peak = max(self.peak, self.current)
+
+    def __exit__(self, *exc_info):
+        with self.lock:
+            self.current -= 1
@@ -0,0 +1,92 @@
+import statistics
+import time
+
+from django.core.management.base import BaseCommand
+from django.core.signals import request_finished, request_started
+from django.db import connection
+from django.db.backends.signals import connection_created
+
+from tasks.benchmark import percentile
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Measure what a request pays for its database connection: simulate "
+        "request cycles (request_started/finished, as the handler sends them) "
+        "that each run a small task query, with a new connection per request "
+        "and with persistent connections (CONN_MAX_AGE, with and without "
+        "health checks), or through the connection pool when one is configured."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--requests", type=int, default=300, help="Request cycles per mode.")
+        parser.add_argument("--max-age", type=int, default=600, help="CONN_MAX_AGE for the persistent modes.")
+
+    def handle(self, *args, **options):
+        settings_dict = connection.settings_dict
+        saved = {key: settings_dict.get(key) for key in ("CONN_MAX_AGE", "CONN_HEALTH_CHECKS")}
+        if settings_dict.get("OPTIONS", {}).get("pool"):
+            modes = [("pool", 0, False)]
+        else:
+            modes = [
+                ("new connection per request", 0, False),
+                ("persistent", options["max_age"], False),
+                ("persistent + health checks", options["max_age"], True),
+            ]
+
+        self.stdout.write(f"{connection.vendor}, {options['requests']} requests per mode")
+        self.stdout.write(f"connect() alone: {self.connect_cost() * 1000:.3f} ms")
+
+        results = {}
+        try:
+            for label, max_age, health_checks in modes:
+                connection.close()
+                settings_dict["CONN_MAX_AGE"] = max_age
+                settings_dict["CONN_HEALTH_CHECKS"] = health_checks
+                results[label] = self.run(options["requests"])
+        finally:
+            connection.close()
+            settings_dict.update(saved)
+
+        for label, (latencies, connects) in results.items():
+            self.stdout.write(
+                f"{label:<28} mean {statistics.fmean(latencies):>7.3f} ms  "
+                f"p50 {percentile(latencies, 0.50):>7.3f}  p95 {percentile(latencies, 0.95):>7.3f}  "
+                f"connections opened {connects}"
+            )
+        if "persistent" in results:
+            fresh = statistics.fmean(results["new connection per request"][0])
+            kept = statistics.fmean(results["persistent"][0])
+            self.stdout.write(self.style.SUCCESS(
+                f"Persistent connections save {fresh - kept:.3f} ms per request ({fresh / kept:.1f}x)."
+            ))
+
+    def connect_cost(self, rounds=20):
+        timings = []
+        for _ in range(rounds):
+            connection.close()
+            started = time.perf_counter()
+            connection.ensure_connection()
+            timings.append(time.perf_counter() - started)
+        connection.close()
+        return statistics.median(timings)
+
+    def run(self, requests):
+        connects = []
+
+        def opened(sender, connection, **kwargs):
+            connects.append(connection.alias)
+
+        latencies = []
+        connection_created.connect(opened)
+        try:
+            for _ in range(requests):
+                started = time.perf_counter()
+                request_started.send(sender=self.__class__)
+                list(Task.objects.order_by("-updated_at", "-id").values("id", "title", "status")[:20])
+                request_finished.send(sender=self.__class__)
+                latencies.append((time.perf_counter() - started) * 1000)
+        finally:
+            connection_created.disconnect(opened)
+        return sorted(latencies), len(connects)
@@ -0,0 +1,150 @@
+import re
+import time
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, transaction
+from django.utils import timezone
+
+from rest_framework.request import Request
+from rest_framework.test import APIRequestFactory
+
+from accounts.models import CustomUser
+from admin_panel.forms import TaskForm
+from admin_panel.pagination import PER_PAGE
+from admin_panel.views import scoped_tasks, scoped_users
+from tasks.filters import DEFAULT_ORDERING, ORDERINGS
+from tasks.models import Task
+from tasks.scope import TaskScope
+from tasks.seeding import seed_dataset
+from tasks.views import TaskViewSet
+
+# EXPLAIN lines that mean "read every row of this table".
+FULL_SCAN_PATTERNS = {
+    "sqlite": re.compile(r"\bSCAN (\w+)\s*$", re.MULTILINE),
+    "postgresql": re.compile(r"\bSeq Scan on (\w+)"),
+}
+
+
+class Command(BaseCommand):
+    help = (
+        "Seed a large synthetic dataset inside a transaction, EXPLAIN every "
+        "role-scoped task query and fail if any of them falls back to a full "
+        "table scan. The data is rolled back unless --keep is given."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--admins", type=int, default=20)
+        parser.add_argument("--users-per-admin", type=int, default=50)
+        parser.add_argument("--tasks-per-user", type=int, default=200)
+        parser.add_argument("--keep", action="store_true", help="Commit the seeded data.")
+        parser.add_argument(
+            "--prefix", default="scopebench", help="Username prefix of the seeded dataset (see seed_bench)."
+        )
+
+    def handle(self, *args, **options):
+        self.verbosity = options["verbosity"]
+        with transaction.atomic():
+            started = time.monotonic()
+            try:
+                ids = seed_dataset(
+                    admins=options["admins"],
+                    users_per_admin=options["users_per_admin"],
+                    tasks_per_user=options["tasks_per_user"],
+                    prefix=options["prefix"],
+                    seed=1,
+                    log=lambda msg: self.stdout.write(msg),
+                )
+            except ValueError as exc:
+                raise CommandError(exc)
+            self.stdout.write(f"Seeded in {time.monotonic() - started:.1f}s")
+
+            # Give the planner real statistics, as production would have.
+            if connection.vendor in ("sqlite", "postgresql"):
+                with connection.cursor() as cursor:
+                    cursor.execute("ANALYZE")
+
+            failures = self.check_plans(ids)
+
+            if not options["keep"]:
+                transaction.set_rollback(True)
+
+        if failures:
+            raise CommandError("Full table scans in: " + ", ".join(failures))
+        self.stdout.write(self.style.SUCCESS("Every role scope is index-backed."))
+
+    def scopes(self, ids):
+        """
+        (label, queryset) for each query the API and the admin panel run,
+        built by the same code that serves them.
+        """
+        superadmin = CustomUser.objects.get(pk=ids["SUPERADMIN"][0])
+        admin = CustomUser.objects.get(pk=ids["ADMIN"][0])
+        user = CustomUser.objects.get(pk=ids["USER"][0])
+        task_id = Task.objects.filter(assigned_to=user).values_list("id", flat=True).first()
+        newest = ORDERINGS[DEFAULT_ORDERING]
+
+        for role, who in (("superadmin", superadmin), ("admin", admin), ("user", user)):
+            yield f"api list [{role}]", self.api_page(who)
+            yield f"api list status [{role}]", self.api_page(who, status="TODO")
+            view = self.api_view(who, "retrieve")
+            yield f"api detail [{role}]", view.filter_queryset(view.get_queryset()).filter(pk=task_id)
+
+        # tasks.filters anchors on the unscoped (SuperAdmin) queryset
+        since = (timezone.now() - timedelta(days=1)).isoformat()
+        today = timezone.localdate().isoformat()
+        for label, params in (
+            ("status", {"status": "TODO", "due_after": today}),
+            ("assigned_to", {"assigned_to": user.id, "due_before": today}),
+            ("created_by", {"created_by": admin.id}),
+            ("overdue", {"overdue": "true"}),
+            ("updated_since", {"updated_since": since}),
+        ):
+            yield f"api filter {label} [superadmin]", self.api_page(superadmin, **params)
+
+        # admin_panel.views.tasks_list, list_users and the TaskForm assignee
+        # choices
+        for role, who in (("superadmin", superadmin), ("admin", admin), ("user", user)):
+            scope = TaskScope(who)
+            yield f"panel tasks [{role}]", scoped_tasks(scope, {}, newest)[:PER_PAGE]
+            yield f"panel tasks status [{role}]", scoped_tasks(scope, {"status": {"TODO"}}, newest)[:PER_PAGE]
+        for role, who in (("superadmin", superadmin), ("admin", admin)):
+            yield f"panel users [{role}]", scoped_users(who)[:PER_PAGE]
+            yield f"panel assignees [{role}]", TaskForm(user=who).fields["assigned_to"].queryset
+
+    def api_view(self, who, action="list", **params):
+        """
+        A TaskViewSet set up for a GET by ``who`` with query ``params``.
+        """
+        request = Request(APIRequestFactory().get("/", params))
+        request.user = who
+        return TaskViewSet(request=request, args=(), kwargs={}, action=action, format_kwarg=None)
+
+    def api_page(self, who, **params):
+        """
+        The first page TaskViewSet.list() reads: its values() rows plus the
+        paginator's look-ahead row.
+        """
+        view = self.api_view(who, **params)
+        _, rows = view.list_rows(view.filter_queryset(view.get_queryset()))
+        return rows[:view.paginator.page_size + 1]
+
+    def check_plans(self, ids):
+        pattern = FULL_SCAN_PATTERNS.get(connection.vendor)
+        if pattern is None:
+            self.stdout.write(self.style.WARNING(
+                f"No full-scan detector for {connection.vendor}; printing plans only."
+            ))
+
+        failures = []
+        for label, queryset in self.scopes(ids):
+            plan = queryset.explain()
+            scanned = pattern.findall(plan) if pattern else []
+            if scanned:
+                failures.append(label)
+                self.stdout.write(self.style.ERROR(f"FAIL {label}: full scan of {', '.join(scanned)}"))
+            else:
+                self.stdout.write(self.style.SUCCESS(f"ok   {label}"))
+            if self.verbosity > 1:
+                self.stdout.write("     " + plan.replace("\n", "\n     "))
+        return failures
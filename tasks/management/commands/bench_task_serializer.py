@@ -0,0 +1,66 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from rest_framework.renderers import JSONRenderer
+
+from tasks.models import Task
+from tasks.rows import RowSerializer
+from tasks.seeding import seed_dataset
+from tasks.serializers import TaskSerializer
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare rows/second of TaskSerializer(many=True) against the "
+        "values()-based RowSerializer used by the task list, on a seeded "
+        "dataset that is rolled back afterwards. Fails if outputs differ."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--rows", type=int, default=20000, help="Tasks to seed and serialize.")
+        parser.add_argument("--repeat", type=int, default=3, help="Runs per path; the best is reported.")
+
+    def handle(self, *args, **options):
+        users = 50
+        with transaction.atomic():
+            try:
+                seed_dataset(
+                    admins=1,
+                    users_per_admin=users,
+                    tasks_per_user=max(options["rows"] // users, 1),
+                    # Not seed_bench's prefix, so both can share a database.
+                    prefix="serializerbench",
+                    seed=1,
+                )
+            except ValueError as exc:
+                raise CommandError(exc)
+            queryset = Task.objects.select_related("assigned_to", "created_by").order_by("-updated_at", "-id")
+            rows = RowSerializer(TaskSerializer)
+
+            def model_path():
+                return JSONRenderer().render(TaskSerializer(queryset, many=True).data)
+
+            def row_path():
+                return JSONRenderer().render(rows.many(rows.values(queryset)))
+
+            total = queryset.count()
+            results = {}
+            for label, run in (("TaskSerializer", model_path), ("RowSerializer", row_path)):
+                best = None
+                for _ in range(options["repeat"]):
+                    started = time.perf_counter()
+                    body = run()
+                    elapsed = time.perf_counter() - started
+                    best = elapsed if best is None else min(best, elapsed)
+                results[label] = (best, body)
+
+            transaction.set_rollback(True)
+
+        (slow, slow_body), (fast, fast_body) = results["TaskSerializer"], results["RowSerializer"]
+        if slow_body != fast_body:
+            raise CommandError("RowSerializer output differs from TaskSerializer.")
+
+        for label, (elapsed, _) in results.items():
+            self.stdout.write(f"{label:<15} {total / elapsed:>12,.0f} rows/s  ({elapsed:.3f}s for {total} rows)")
+        self.stdout.write(self.style.SUCCESS(f"RowSerializer is {slow / fast:.1f}x faster; output identical."))
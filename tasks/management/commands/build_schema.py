@@ -0,0 +1,26 @@
+from pathlib import Path
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from task_manager_project import openapi
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate the OpenAPI schema once, as YAML and JSON with gzipped "
+        "copies, for /api/v1/schema/ to serve (see task_manager_project.openapi). "
+        "Run on every deploy by build.sh."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dir", help="Write here instead of OPENAPI_SCHEMA_DIR.")
+
+    def handle(self, *args, **options):
+        directory = Path(options["dir"]) if options["dir"] else settings.OPENAPI_SCHEMA_DIR
+        manifest = openapi.build(directory)
+        for format, etag in manifest["etags"].items():
+            body = (directory / f"openapi.{format}").stat().st_size
+            compressed = (directory / f"openapi.{format}.gz").stat().st_size
+            self.stdout.write(f"openapi.{format}: {body} bytes, {compressed} gzipped, ETag {etag}")
+        self.stdout.write(self.style.SUCCESS(f"Wrote the schema for version {manifest['version']} to {directory}"))
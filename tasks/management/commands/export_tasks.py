@@ -0,0 +1,45 @@
+import sys
+
+from django.contrib.auth import get_user_model
+from django.core.management.base import BaseCommand, CommandError
+
+from tasks.export import CHUNK_SIZE, EXPORT_FORMATS, iter_export
+from tasks.models import Task
+
+
+class Command(BaseCommand):
+    help = (
+        "Stream every task to CSV or NDJSON with constant memory. "
+        "Pass --as-user to apply the same role scoping as the tasks API."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--format", choices=list(EXPORT_FORMATS), default="csv")
+        parser.add_argument("--output", "-o", help="File to write (default: stdout).")
+        parser.add_argument("--as-user", help="Username whose task scope to export.")
+        parser.add_argument("--chunk-size", type=int, default=CHUNK_SIZE)
+
+    def handle(self, *args, **options):
+        queryset = Task.objects.all()
+        if options["as_user"]:
+            User = get_user_model()
+            try:
+                user = User.objects.get(username=options["as_user"])
+            except User.DoesNotExist:
+                raise CommandError(f"No user named {options['as_user']!r}.")
+            queryset = Task.objects.visible_to(user)
+
+        out = open(options["output"], "w", encoding="utf-8", newline="") if options["output"] else sys.stdout
+        try:
+            rows = 0
+            for line in iter_export(queryset, options["format"], options["chunk_size"]):
+                out.write(line)
+                rows += 1
+        finally:
+            if out is not sys.stdout:
+                out.close()
+
+        if options["output"]:
+            # CSV has a header line; NDJSON does not.
+            count = rows - 1 if options["format"] == "csv" else rows
+            self.stderr.write(f"Exported {count} tasks to {options['output']}")
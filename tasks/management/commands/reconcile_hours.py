@@ -0,0 +1,68 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from tasks import rollups
+from tasks.models import HoursRollup
+
+
+class Command(BaseCommand):
+    help = (
+        "Recompute worked-hours rollups from the tasks table and fix any "
+        "drift. Safe to run periodically (e.g. from cron)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--dry-run", action="store_true", help="Report drift without fixing it.")
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            # Lock the rollups so concurrent increments wait for the rebuild.
+            stored = {}
+            for r in HoursRollup.objects.select_for_update():
+                stored.setdefault((r.scope, r.ref, r.period, r.start), {})[r.shard] = r
+            exact = {key: value for key, value in rollups.compute_all().items() if any(value)}
+
+            drift = []
+            for key in stored.keys() | exact.keys():
+                shards = stored.get(key, {}).values()
+                have = (sum(r.hours for r in shards), sum(r.tasks for r in shards))
+                want = exact.get(key, (0, 0))
+                if have != want:
+                    drift.append((key, have, want))
+
+            for (scope, ref, period, start), have, want in sorted(drift):
+                self.stdout.write(
+                    f"{scope}:{ref}:{period}:{start} {have[0]}h/{have[1]} -> {want[0]}h/{want[1]}"
+                )
+
+            if options["dry_run"]:
+                self.stdout.write(f"{len(drift)} rollups drifted (dry run).")
+                return
+
+            HoursRollup.objects.exclude(
+                pk__in=[r.pk for key, shards in stored.items() if key in exact for r in shards.values()]
+            ).delete()
+            # A drifted bucket is rewritten onto shard 0. Every shard row of
+            # an "all" bucket is created up front so increments to it never
+            # take the insert path.
+            drifted = {key for key, have, want in drift}
+            missing = []
+            for key, (hours, tasks) in exact.items():
+                scope, ref, period, start = key
+                shards = stored.get(key, {})
+                count = settings.HOURS_ROLLUP_SHARDS if scope == rollups.ALL else 1
+                for shard in set(range(count)) | set(shards):
+                    want = ((hours, tasks) if shard == 0 else (0, 0)) if key in drifted else None
+                    if shard not in shards:
+                        value = want or (0, 0)
+                        missing.append(HoursRollup(
+                            scope=scope, ref=ref, period=period, start=start, shard=shard,
+                            hours=value[0], tasks=value[1],
+                        ))
+                    elif want is not None and (shards[shard].hours, shards[shard].tasks) != want:
+                        shards[shard].hours, shards[shard].tasks = want
+                        shards[shard].save(update_fields=["hours", "tasks"])
+            HoursRollup.objects.bulk_create(missing)
+
+        self.stdout.write(self.style.SUCCESS(f"Reconciled; {len(drift)} rollups corrected."))
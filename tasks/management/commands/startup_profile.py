@@ -0,0 +1,92 @@
+import json
+import subprocess
+import sys
+from collections import defaultdict
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+# Run in a fresh interpreter: import the WSGI module the way gunicorn does
+# (task_manager_project.wsgi also imports the URLconf) and report how long
+# that took.
+BOOT = """
+import importlib, json, sys, time
+started = time.perf_counter()
+importlib.import_module(sys.argv[1])
+print(json.dumps({"boot_ms": (time.perf_counter() - started) * 1000}))
+"""
+
+
+class Command(BaseCommand):
+    help = (
+        "Boot the WSGI application in a fresh interpreter under "
+        "python -X importtime and report the import time per package (or "
+        "module), to keep a worker's cold start within --budget-ms."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--top", type=int, default=20, help="Rows to show.")
+        parser.add_argument(
+            "--modules", action="store_true",
+            help="Report single modules by cumulative time (what each one pulls in) instead of packages.",
+        )
+        parser.add_argument("--repeat", type=int, default=3, help="Boots to run; the fastest one is reported.")
+        parser.add_argument("--budget-ms", type=float, help="Fail when the boot takes longer than this.")
+        parser.add_argument("--output", help="Also write the results to this JSON file.")
+
+    def handle(self, *args, **options):
+        if options["repeat"] < 1 or options["top"] < 1:
+            raise CommandError("--repeat and --top must be positive.")
+        module = settings.WSGI_APPLICATION.rsplit(".", 1)[0]
+        # The fastest boot has the least noise from the rest of the machine.
+        boot_ms, imports = min((self.boot(module) for _ in range(options["repeat"])), key=lambda run: run[0])
+
+        if options["modules"]:
+            rows = sorted(((name, cumulative) for name, _, cumulative in imports), key=lambda row: -row[1])
+        else:
+            packages = defaultdict(float)
+            for name, own, _ in imports:
+                packages[name.split(".")[0]] += own
+            rows = sorted(packages.items(), key=lambda row: -row[1])
+        import_ms = sum(own for _, own, _ in imports)
+
+        self.stdout.write(f"{'ms':>9}  {'module' if options['modules'] else 'package'}")
+        for name, ms in rows[:options["top"]]:
+            self.stdout.write(f"{ms:>9.1f}  {name}")
+        self.stdout.write(
+            f"Boot {boot_ms:.1f} ms ({import_ms:.1f} ms importing {len(imports)} modules) "
+            f"for {module}, fastest of {options['repeat']}"
+        )
+
+        if options["output"]:
+            with open(options["output"], "w") as fh:
+                document = {
+                    "module": module, "boot_ms": boot_ms, "import_ms": import_ms,
+                    "imports": [{"module": n, "self_ms": o, "cumulative_ms": c} for n, o, c in imports],
+                }
+                json.dump(document, fh, indent=2)
+            self.stdout.write(self.style.SUCCESS(f"Wrote {options['output']}"))
+
+        budget = options["budget_ms"]
+        if budget is not None and boot_ms > budget:
+            raise CommandError(f"Boot took {boot_ms:.1f} ms, over the {budget:g} ms budget.")
+
+    def boot(self, module):
+        """
+        (boot ms, [(module, self ms, cumulative ms)]) for one fresh
+        interpreter importing ``module``.
+        """
+        result = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", BOOT, module],
+            cwd=settings.BASE_DIR, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(f"Importing {module} failed:\n{result.stderr[-2000:]}")
+        imports = []
+        for line in result.stderr.splitlines():
+            # "import time:  self [us] | cumulative | imported package"
+            if not line.startswith("import time:") or line.endswith("imported package"):
+                continue
+            own, cumulative, name = line[len("import time:"):].split("|")
+            imports.append((name.strip(), int(own) / 1000, int(cumulative) / 1000))
+        return json.loads(result.stdout.splitlines()[-1])["boot_ms"], imports
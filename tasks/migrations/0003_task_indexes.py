@@ -0,0 +1,71 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:34
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0002_alter_task_status"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="task",
+            name="assigned_to",
+            field=models.ForeignKey(
+                db_index=False,
+                help_text="User who will do the task",
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="tasks",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AlterField(
+            model_name="task",
+            name="created_by",
+            field=models.ForeignKey(
+                blank=True,
+                db_index=False,
+                help_text="Admin or SuperAdmin who created the task",
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="created_tasks",
+                to=settings.AUTH_USER_MODEL,
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["assigned_to", "status", "due_date"],
+                name="task_assignee_status_due_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["created_by", "status"], name="task_creator_status_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "due_date"], name="task_status_due_idx"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(fields=["updated_at", "id"], name="task_updated_id_idx"),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                condition=models.Q(("status__in", ["TODO", "IN_PROGRESS"])),
+                fields=["due_date"],
+                name="task_open_due_idx",
+            ),
+        ),
+    ]
@@ -0,0 +1,75 @@
+# Full-text search index over tasks_task(title, description); see tasks.search.
+
+from django.db import migrations
+
+SQLITE_INSTALL = [
+    """
+    CREATE VIRTUAL TABLE tasks_task_fts USING fts5(
+        title, description, content='tasks_task', content_rowid='id'
+    )
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_insert AFTER INSERT ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_delete AFTER DELETE ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+    END
+    """,
+    """
+    CREATE TRIGGER tasks_task_fts_update AFTER UPDATE OF title, description ON tasks_task BEGIN
+        INSERT INTO tasks_task_fts(tasks_task_fts, rowid, title, description)
+        VALUES ('delete', old.id, old.title, old.description);
+        INSERT INTO tasks_task_fts(rowid, title, description)
+        VALUES (new.id, new.title, new.description);
+    END
+    """,
+    "INSERT INTO tasks_task_fts(tasks_task_fts) VALUES ('rebuild')",
+]
+
+SQLITE_UNINSTALL = [
+    "DROP TRIGGER IF EXISTS tasks_task_fts_update",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_delete",
+    "DROP TRIGGER IF EXISTS tasks_task_fts_insert",
+    "DROP TABLE IF EXISTS tasks_task_fts",
+]
+
+# Must match tasks.search.PG_DOCUMENT exactly for the planner to use it.
+POSTGRES_INSTALL = [
+    """
+    CREATE INDEX task_search_idx ON tasks_task USING GIN ((
+        setweight(to_tsvector('english', coalesce("tasks_task"."title", '')), 'A') ||
+        setweight(to_tsvector('english', coalesce("tasks_task"."description", '')), 'B')
+    ))
+    """,
+]
+
+POSTGRES_UNINSTALL = ["DROP INDEX IF EXISTS task_search_idx"]
+
+
+def _run(schema_editor, statements):
+    for sql in statements.get(schema_editor.connection.vendor, ()):
+        schema_editor.execute(sql)
+
+
+def install(apps, schema_editor):
+    _run(schema_editor, {"sqlite": SQLITE_INSTALL, "postgresql": POSTGRES_INSTALL})
+
+
+def uninstall(apps, schema_editor):
+    _run(schema_editor, {"sqlite": SQLITE_UNINSTALL, "postgresql": POSTGRES_UNINSTALL})
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0003_task_indexes"),
+    ]
+
+    operations = [
+        migrations.RunPython(install, uninstall),
+    ]
@@ -0,0 +1,92 @@
+# Generated by Django 5.2.6 on 2026-10-18 01:52
+
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.db import migrations, models
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+
+def backfill_rollups(apps, schema_editor):
+    Task = apps.get_model("tasks", "Task")
+    HoursRollup = apps.get_model("tasks", "HoursRollup")
+
+    # The completion time was never recorded; the last update is the best
+    # available estimate for tasks that are already completed.
+    Task.objects.filter(status="COMPLETED").update(completed_at=F("updated_at"))
+
+    daily = (
+        Task.objects.filter(status="COMPLETED", worked_hours__isnull=False)
+        .annotate(day=TruncDate("completed_at", tzinfo=timezone.get_current_timezone()))
+        .values_list("assigned_to", "assigned_to__manager", "day")
+        .annotate(hours=Sum("worked_hours"), n=Count("id"))
+        .order_by()
+    )
+    totals = defaultdict(lambda: [Decimal(0), 0])
+    for assignee, manager_id, day, hours, n in daily:
+        week = day - timedelta(days=day.weekday())
+        refs = [("user", assignee), ("all", 0)] + (
+            [("team", manager_id)] if manager_id else []
+        )
+        for scope, ref in refs:
+            for period, start in (("day", day), ("week", week)):
+                total = totals[(scope, ref, period, start)]
+                total[0] += hours
+                total[1] += n
+    HoursRollup.objects.bulk_create(
+        HoursRollup(
+            scope=scope, ref=ref, period=period, start=start, hours=hours, tasks=n
+        )
+        for (scope, ref, period, start), (hours, n) in totals.items()
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0004_task_search"),
+        ("accounts", "0007_tokenuser"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="task",
+            name="completed_at",
+            field=models.DateTimeField(blank=True, editable=False, null=True),
+        ),
+        migrations.CreateModel(
+            name="HoursRollup",
+            fields=[
+                (
+                    "id",
+                    models.BigAutoField(
+                        auto_created=True,
+                        primary_key=True,
+                        serialize=False,
+                        verbose_name="ID",
+                    ),
+                ),
+                ("scope", models.CharField(max_length=10)),
+                ("ref", models.BigIntegerField(default=0)),
+                ("period", models.CharField(max_length=10)),
+                ("start", models.DateField()),
+                (
+                    "hours",
+                    models.DecimalField(decimal_places=2, default=0, max_digits=12),
+                ),
+                ("tasks", models.IntegerField(default=0)),
+            ],
+            options={
+                "constraints": [
+                    models.UniqueConstraint(
+                        fields=("scope", "ref", "period", "start"),
+                        name="hours_rollup_key",
+                    )
+                ],
+            },
+        ),
+        migrations.RunPython(backfill_rollups, migrations.RunPython.noop),
+    ]
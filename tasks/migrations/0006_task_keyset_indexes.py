@@ -0,0 +1,43 @@
+# Generated by Django 5.2.6 on 2026-10-18 02:44
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0005_task_completed_at_hoursrollup"),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.RemoveIndex(
+            model_name="task",
+            name="task_creator_status_idx",
+        ),
+        migrations.RemoveIndex(
+            model_name="task",
+            name="task_status_due_idx",
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["assigned_to", "updated_at", "id"],
+                name="task_assignee_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["created_by", "updated_at", "id"],
+                name="task_creator_updated_idx",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="task",
+            index=models.Index(
+                fields=["status", "updated_at", "id"], name="task_status_updated_idx"
+            ),
+        ),
+    ]
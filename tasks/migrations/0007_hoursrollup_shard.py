@@ -0,0 +1,29 @@
+# Generated by Django 5.2.6 on 2026-10-18 03:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("tasks", "0006_task_keyset_indexes"),
+    ]
+
+    operations = [
+        migrations.RemoveConstraint(
+            model_name="hoursrollup",
+            name="hours_rollup_key",
+        ),
+        migrations.AddField(
+            model_name="hoursrollup",
+            name="shard",
+            field=models.PositiveSmallIntegerField(default=0),
+        ),
+        migrations.AddConstraint(
+            model_name="hoursrollup",
+            constraint=models.UniqueConstraint(
+                fields=("scope", "ref", "period", "start", "shard"),
+                name="hours_rollup_key",
+            ),
+        ),
+    ]
@@ -1,8 +1,20 @@
 from django.db import models
 from django.conf import settings
+from django.utils import timezone
 
 User = settings.AUTH_USER_MODEL
 
+
+class TaskQuerySet(models.QuerySet):
+    def visible_to(self, user):
+        """
+        Tasks ``user`` may see through the API (see tasks.scope.TaskScope).
+        """
+        from .scope import TaskScope
+
+        return TaskScope(user).filter(self)
+
+
 class Task(models.Model):
     class Status(models.TextChoices):
         TODO = "TODO", "To Do"
@@ -16,6 +28,7 @@ class Task(models.Model):
         on_delete=models.CASCADE,
         related_name="tasks",
         help_text="User who will do the task",
+        db_index=False,  # covered by the (assigned_to, status, due_date) index
     )
     due_date = models.DateField(null=True, blank=True)
     status = models.CharField(
@@ -42,11 +55,73 @@ class Task(models.Model):
         on_delete=models.SET_NULL,
         related_name="created_tasks",
         help_text="Admin or SuperAdmin who created the task",
+        db_index=False,  # covered by the (created_by, updated_at, id) index
     )
 
+    # Set when the task enters COMPLETED, cleared when it leaves; decides
+    # which day/week its worked_hours are reported under.
+    completed_at = models.DateTimeField(null=True, blank=True, editable=False)
+
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    objects = TaskQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            # User scope, Admin "managed users" scope and status/due filters.
+            models.Index(fields=["assigned_to", "status", "due_date"], name="task_assignee_status_due_idx"),
+            # Keyset pagination order: (updated_at, id), alone and after each
+            # tasks.filters anchor, so filtered pages are read in order.
+            models.Index(fields=["updated_at", "id"], name="task_updated_id_idx"),
+            models.Index(fields=["assigned_to", "updated_at", "id"], name="task_assignee_updated_idx"),
+            # Also the Admin "tasks I created" scope.
+            models.Index(fields=["created_by", "updated_at", "id"], name="task_creator_updated_idx"),
+            # Also global status counts (SuperAdmin, dashboards).
+            models.Index(fields=["status", "updated_at", "id"], name="task_status_updated_idx"),
+            # Overdue lookups only ever touch open tasks.
+            models.Index(
+                fields=["due_date"],
+                name="task_open_due_idx",
+                condition=models.Q(status__in=["TODO", "IN_PROGRESS"]),
+            ),
+        ]
+
+    # Columns whose before/after values are published through
+    # tasks.signals.tasks_changed (counters and rollups key off these).
+    TRACKED_FIELDS = ("status", "assigned_to_id", "worked_hours", "completed_at")
+
+    @classmethod
+    def from_db(cls, db, field_names, values):
+        instance = super().from_db(db, field_names, values)
+        instance._tracked_state = {
+            name: value
+            for name, value in zip(field_names, values)
+            if name in cls.TRACKED_FIELDS and value is not models.DEFERRED
+        }
+        return instance
+
+    def tracked_state(self):
+        return {name: getattr(self, name) for name in self.TRACKED_FIELDS}
+
+    def stamp_completion(self, now=None):
+        """
+        Keep completed_at consistent with status. Bulk writers call this
+        themselves; save() does it automatically.
+        """
+        if self.status == self.Status.COMPLETED:
+            if self.completed_at is None:
+                self.completed_at = now or timezone.now()
+        else:
+            self.completed_at = None
+
+    def save(self, *args, **kwargs):
+        self.stamp_completion()
+        update_fields = kwargs.get("update_fields")
+        if update_fields is not None and "status" in update_fields:
+            kwargs["update_fields"] = {*update_fields, "completed_at"}
+        super().save(*args, **kwargs)
+
     def clean(self):
         """
         Enforce rules:
@@ -62,3 +137,41 @@ class Task(models.Model):
 
     def __str__(self):
         return f"{self.title} ({self.get_status_display()})"
+
+
+class HoursRollup(models.Model):
+    """
+    Worked hours of completed tasks, summed per bucket and kept current by
+    tasks.rollups; ``manage.py reconcile_hours`` rebuilds it.
+
+    scope="user", ref=<assignee id>  -> that user's hours
+    scope="team", ref=<admin id>     -> hours of the users that Admin manages
+    scope="all",  ref=0              -> everyone
+    period="day" | "week" (weeks start on Monday), start=<first day>
+
+    Every completion updates the "all" rows, so those are split over
+    HOURS_ROLLUP_SHARDS rows (``shard``) like admin_panel's counters; a
+    bucket's value is the sum of its shards. Other scopes use shard 0.
+    """
+    USER = "user"
+    TEAM = "team"
+    ALL = "all"
+    DAY = "day"
+    WEEK = "week"
+
+    scope = models.CharField(max_length=10)
+    ref = models.BigIntegerField(default=0)
+    period = models.CharField(max_length=10)
+    start = models.DateField()
+    shard = models.PositiveSmallIntegerField(default=0)
+    hours = models.DecimalField(max_digits=12, decimal_places=2, default=0)
+    tasks = models.IntegerField(default=0)
+
+    class Meta:
+        constraints = [
+            # Also serves range reads: WHERE scope, ref, period AND start BETWEEN.
+            models.UniqueConstraint(fields=["scope", "ref", "period", "start", "shard"], name="hours_rollup_key"),
+        ]
+
+    def __str__(self):
+        return f"{self.scope}:{self.ref}:{self.period}:{self.start}#{self.shard} = {self.hours}h / {self.tasks}"
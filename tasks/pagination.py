@@ -0,0 +1,8 @@
+from task_manager_project.pagination import KeysetPagination
+
+
+class TaskCursorPagination(KeysetPagination):
+    """
+    Newest-first task pages, seeking on (updated_at, id).
+    """
+    ordering = ("-updated_at", "-id")
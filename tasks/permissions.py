@@ -1,5 +1,7 @@
 from rest_framework.permissions import BasePermission, SAFE_METHODS
 
+from .scope import TaskScope
+
 class TaskPermission(BasePermission):
     """
     - SuperAdmin: can see all tasks.
@@ -8,17 +10,9 @@ class TaskPermission(BasePermission):
     """
 
     def has_object_permission(self, request, view, obj):
-        user = request.user
-
-        if hasattr(user, "is_superadmin") and user.is_superadmin():
-            return True
-
-        if hasattr(user, "is_admin") and user.is_admin():
-            # Admin can manage tasks of users they manage or tasks they created
-            return obj.assigned_to.manager_id == user.id or obj.created_by_id == user.id
-
-        # else normal user
-        return obj.assigned_to_id == user.id
+        # Admin can manage tasks of users they manage or tasks they created.
+        # Answered from ids only; the managed set is resolved once per request.
+        return TaskScope.for_request(request).can_access(obj)
 
     def has_permission(self, request, view):
         # Must be authenticated
@@ -0,0 +1,196 @@
+"""
+Incrementally maintained worked-hours rollups (see tasks.models.HoursRollup).
+
+Receivers in tasks.signals turn task and user changes into deltas that are
+applied here with ``UPDATE ... SET hours = hours + x``, mirroring
+admin_panel.counters. Only tasks that are COMPLETED with worked_hours
+count; a task contributes to the day and week of its completed_at (in the
+current timezone) for its assignee, the assignee's manager and everyone.
+
+The "everyone" buckets change with every completion, so they are sharded
+as the dashboard counters are: a worker thread updates its own shard row
+and readers sum the shards.
+"""
+import os
+import threading
+from collections import defaultdict
+from datetime import timedelta
+from decimal import Decimal
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F, Sum
+from django.db.models.functions import TruncDate
+from django.utils import timezone
+
+from .models import HoursRollup, Task
+
+USER, TEAM, ALL = HoursRollup.USER, HoursRollup.TEAM, HoursRollup.ALL
+DAY, WEEK = HoursRollup.DAY, HoursRollup.WEEK
+PERIODS = (DAY, WEEK)
+SCOPES = (USER, TEAM, ALL)
+
+
+def bucket(day, period):
+    return day - timedelta(days=day.weekday()) if period == WEEK else day
+
+
+def _contribution(state):
+    """
+    (assignee id, local completion day, hours) or None if not counted.
+    """
+    if (
+        state is None
+        or state["status"] != Task.Status.COMPLETED
+        or state["worked_hours"] is None
+        or state["completed_at"] is None
+    ):
+        return None
+    day = timezone.localtime(state["completed_at"]).date()
+    return state["assigned_to_id"], day, Decimal(state["worked_hours"])
+
+
+def _add(deltas, scope, ref, day, hours, tasks):
+    for period in PERIODS:
+        key = (scope, ref, period, bucket(day, period))
+        total_hours, total_tasks = deltas[key]
+        deltas[key] = (total_hours + hours, total_tasks + tasks)
+
+
+def writer_shard():
+    """
+    The "all" shard this process and thread write to (see
+    admin_panel.counters.writer_shard).
+    """
+    return hash((os.getpid(), threading.get_ident())) % settings.HOURS_ROLLUP_SHARDS
+
+
+def apply(deltas):
+    """
+    Add each ``{(scope, ref, period, start): (hours, tasks)}`` delta,
+    creating rows on first use.
+    """
+    deltas = {key: value for key, value in deltas.items() if any(value)}
+    if not deltas:
+        return
+    shard = writer_shard()
+    with transaction.atomic():
+        for (scope, ref, period, start), (hours, tasks) in sorted(deltas.items()):
+            key = dict(scope=scope, ref=ref, period=period, start=start, shard=shard if scope == ALL else 0)
+            rollup = HoursRollup.objects.filter(**key)
+            if rollup.update(hours=F("hours") + hours, tasks=F("tasks") + tasks):
+                continue
+            try:
+                with transaction.atomic():
+                    HoursRollup.objects.create(**key, hours=hours, tasks=tasks)
+            except IntegrityError:
+                # Another writer created the row first.
+                rollup.update(hours=F("hours") + hours, tasks=F("tasks") + tasks)
+
+
+def task_deltas(changes):
+    """
+    Deltas for a list of ``(before, after)`` Task.tracked_state() pairs.
+    Changes that do not touch a counted contribution cost nothing.
+    """
+    relevant = []
+    for before, after in changes:
+        old, new = _contribution(before), _contribution(after)
+        if old != new:
+            relevant.append((old, new))
+    if not relevant:
+        return {}
+
+    assignees = {c[0] for pair in relevant for c in pair if c is not None}
+    managers = dict(
+        get_user_model().objects.filter(pk__in=assignees).values_list("id", "manager_id")
+    )
+
+    deltas = defaultdict(lambda: (Decimal(0), 0))
+    for old, new in relevant:
+        for contribution, sign in ((old, -1), (new, 1)):
+            if contribution is None:
+                continue
+            assignee, day, hours = contribution
+            _add(deltas, USER, assignee, day, sign * hours, sign)
+            _add(deltas, ALL, 0, day, sign * hours, sign)
+            manager_id = managers.get(assignee)
+            if manager_id:
+                _add(deltas, TEAM, manager_id, day, sign * hours, sign)
+    return deltas
+
+
+def user_deltas(user, before, after):
+    """
+    Moving a user to another Admin moves their hours between the two
+    teams. The user's own rollups already hold every bucket to move, so no
+    task rows are read.
+    """
+    old_manager = before["manager_id"] if before else None
+    new_manager = after["manager_id"] if after else None
+    if before is None or after is None or old_manager == new_manager:
+        return {}
+
+    deltas = {}
+    rows = HoursRollup.objects.filter(scope=USER, ref=user.pk).values_list("period", "start", "hours", "tasks")
+    for period, start, hours, tasks in rows:
+        if old_manager:
+            deltas[(TEAM, old_manager, period, start)] = (-hours, -tasks)
+        if new_manager:
+            deltas[(TEAM, new_manager, period, start)] = (hours, tasks)
+    return deltas
+
+
+def forget(scope, ref):
+    # A deleted Admin's users lose their manager through a bulk SET NULL
+    # that sends no signals; their team rollups simply go away. A deleted
+    # user's own rows are already zero (their tasks were deleted first).
+    HoursRollup.objects.filter(scope=scope, ref=ref).delete()
+
+
+def compute_all():
+    """
+    Exact rollups straight from the tasks table, for reconciliation.
+    One grouped query by (assignee, manager, local day); weeks are summed
+    from the days.
+    """
+    daily = (
+        Task.objects.filter(
+            status=Task.Status.COMPLETED, worked_hours__isnull=False, completed_at__isnull=False
+        )
+        .annotate(day=TruncDate("completed_at", tzinfo=timezone.get_current_timezone()))
+        .values_list("assigned_to", "assigned_to__manager", "day")
+        .annotate(hours=Sum("worked_hours"), n=Count("id"))
+        .order_by()
+    )
+    totals = defaultdict(lambda: (Decimal(0), 0))
+    for assignee, manager_id, day, hours, n in daily:
+        _add(totals, USER, assignee, day, hours, n)
+        _add(totals, ALL, 0, day, hours, n)
+        if manager_id:
+            _add(totals, TEAM, manager_id, day, hours, n)
+    return dict(totals)
+
+
+def read(scope, ref, period, first, last):
+    """
+    Buckets for one scope between two dates (inclusive), oldest first, with
+    empty buckets filled in. Reads one row per bucket and shard.
+    """
+    first, last = bucket(first, period), bucket(last, period)
+    stored = defaultdict(lambda: (Decimal("0.00"), 0))
+    rows = HoursRollup.objects.filter(
+        scope=scope, ref=ref, period=period, start__gte=first, start__lte=last
+    ).values_list("start", "hours", "tasks")
+    for start, hours, tasks in rows:
+        total_hours, total_tasks = stored[start]
+        stored[start] = (total_hours + hours, total_tasks + tasks)
+    step = timedelta(days=7 if period == WEEK else 1)
+    buckets = []
+    start = first
+    while start <= last:
+        hours, tasks = stored.get(start, (Decimal("0.00"), 0))
+        buckets.append({"start": start, "hours": hours, "tasks": tasks})
+        start += step
+    return buckets
@@ -0,0 +1,142 @@
+"""
+Per-request task scoping.
+
+TaskScope answers "which tasks may this user see?" for the API, the
+permission class and the admin panel. For Admins it resolves the ids of the
+users they manage once per request, so object-level checks are plain id
+comparisons instead of lazy-loading ``task.assigned_to`` to read its
+``manager_id``. With a shared cache (CACHE_SHARED) the ids are also kept
+across requests for TASK_SCOPE_CACHE_TIMEOUT seconds, and dropped when a
+user's manager changes.
+"""
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+from .models import Task
+
+
+def _managed_key(admin_id):
+    return f"task_scope:managed:{admin_id}"
+
+
+def forget_managed(*admin_ids):
+    """
+    Drop cached managed-user ids; called when a user's manager changes.
+    """
+    cache.delete_many([_managed_key(pk) for pk in admin_ids if pk])
+
+
+class TaskScope:
+    def __init__(self, user):
+        self.user = user
+
+    @classmethod
+    def for_request(cls, request):
+        """
+        Resolve the scope once per request and reuse it afterwards.
+        """
+        scope = getattr(request, "_task_scope", None)
+        if scope is None or scope.user is not request.user:
+            scope = request._task_scope = cls(request.user)
+        return scope
+
+    @cached_property
+    def managed_ids(self):
+        """
+        Ids of the users this Admin manages (empty for other roles).
+        """
+        if not self.user.is_admin():
+            return frozenset()
+        timeout = settings.TASK_SCOPE_CACHE_TIMEOUT
+        key = _managed_key(self.user.id)
+        ids = cache.get(key) if timeout else None
+        if ids is None:
+            ids = frozenset(
+                get_user_model().objects.filter(manager_id=self.user.id).values_list("id", flat=True)
+            )
+            if timeout:
+                cache.set(key, ids, timeout)
+        return ids
+
+    # ------------------------------
+    # Querysets
+    # ------------------------------
+
+    def filter(self, queryset):
+        """
+        API scope:
+        - SuperAdmin sees all.
+        - Admin sees tasks of the users they manage plus tasks they created.
+        - User sees only their own tasks.
+
+        The Admin branch is written as ``assigned_to IN (managed ids) OR
+        created_by = admin`` so both sides stay on the tasks table and each
+        can be answered from an index, instead of an OR across a JOIN.
+        """
+        user = self.user
+        if user.is_superadmin():
+            return queryset
+        if user.is_admin():
+            managed = get_user_model().objects.filter(manager_id=user.id).values("id")
+            return queryset.filter(Q(assigned_to__in=managed) | Q(created_by_id=user.id))
+        return queryset.filter(assigned_to_id=user.id)
+
+    def filter_assigned(self, queryset):
+        """
+        Admin panel scope: like filter(), but Admins only see tasks assigned
+        to the users they manage.
+        """
+        user = self.user
+        if user.is_superadmin():
+            return queryset
+        if user.is_admin():
+            managed = get_user_model().objects.filter(manager_id=user.id).values("id")
+            return queryset.filter(assigned_to__in=managed)
+        return queryset.filter(assigned_to_id=user.id)
+
+    def tasks(self):
+        return self.filter(Task.objects.all())
+
+    def assignable(self, queryset):
+        """
+        Users this user may assign tasks to: anyone for SuperAdmins, the
+        users they manage for Admins, themselves for Users.
+        """
+        user = self.user
+        if user.is_superadmin():
+            return queryset
+        if user.is_admin():
+            return queryset.filter(manager_id=user.id)
+        return queryset.filter(pk=user.id)
+
+    # ------------------------------
+    # Object checks (ids only, no queries beyond managed_ids)
+    # ------------------------------
+
+    def manages(self, user_id):
+        return user_id in self.managed_ids
+
+    def can_access(self, task):
+        """
+        Object-level counterpart of filter().
+        """
+        user = self.user
+        if user.is_superadmin():
+            return True
+        if user.is_admin():
+            return self.manages(task.assigned_to_id) or task.created_by_id == user.id
+        return task.assigned_to_id == user.id
+
+    def can_access_assigned(self, task):
+        """
+        Object-level counterpart of filter_assigned().
+        """
+        user = self.user
+        if user.is_superadmin():
+            return True
+        if user.is_admin():
+            return self.manages(task.assigned_to_id)
+        return task.assigned_to_id == user.id
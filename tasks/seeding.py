@@ -0,0 +1,118 @@
+"""
+Synthetic data for benchmarks: role hierarchies and tasks, inserted with
+bulk_create so millions of rows take seconds rather than hours.
+"""
+import random
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.utils import timezone
+
+from .models import Task
+
+# Roughly what a live tenant looks like: most work is finished or queued.
+STATUS_WEIGHTS = {
+    Task.Status.TODO: 30,
+    Task.Status.IN_PROGRESS: 15,
+    Task.Status.COMPLETED: 55,
+}
+
+
+def seed_dataset(
+    superadmins=1,
+    admins=20,
+    users_per_admin=50,
+    tasks_per_user=100,
+    password="Bench-pass-123!",
+    batch_size=5000,
+    prefix="bench",
+    seed=None,
+    log=None,
+):
+    """
+    Create ``superadmins`` SuperAdmins, ``admins`` Admins each managing
+    ``users_per_admin`` Users, and on average ``tasks_per_user`` tasks per
+    User (skewed so a few users carry much more work than others).
+
+    Returns a dict of created user ids keyed by role. Raises ValueError if
+    users named ``<prefix>_*`` already exist.
+    """
+    User = get_user_model()
+    if User.objects.filter(username__startswith=f"{prefix}_").exists():
+        raise ValueError(f"Users named {prefix}_* already exist; seed with another prefix.")
+    rng = random.Random(seed)
+    log = log or (lambda msg: None)
+    hashed = make_password(password)  # hashing once keeps seeding fast
+
+    def make_users(role, count, tag, **extra):
+        users = [
+            User(
+                username=f"{prefix}_{tag}_{i}",
+                email=f"{prefix}_{tag}_{i}@example.com",
+                password=hashed,
+                role=role,
+                is_staff=role != User.Roles.USER,
+                **extra,
+            )
+            for i in range(count)
+        ]
+        User.objects.bulk_create(users, batch_size=batch_size)
+        return list(
+            User.objects.filter(username__startswith=f"{prefix}_{tag}_")
+            .order_by("id")
+            .values_list("id", flat=True)
+        )
+
+    superadmin_ids = make_users(User.Roles.SUPERADMIN, superadmins, "super")
+    admin_ids = make_users(User.Roles.ADMIN, admins, "admin")
+    log(f"Created {len(superadmin_ids)} SuperAdmins and {len(admin_ids)} Admins")
+
+    user_ids = []
+    for n, admin_id in enumerate(admin_ids):
+        user_ids += make_users(User.Roles.USER, users_per_admin, f"user{n}", manager_id=admin_id)
+    managers = dict(
+        User.objects.filter(id__in=user_ids).values_list("id", "manager_id")
+    )
+    log(f"Created {len(user_ids)} Users")
+
+    if not user_ids:
+        return {"SUPERADMIN": superadmin_ids, "ADMIN": admin_ids, "USER": user_ids}
+
+    statuses = list(STATUS_WEIGHTS)
+    weights = list(STATUS_WEIGHTS.values())
+    now = timezone.now()
+    today = timezone.localdate()
+    total = len(user_ids) * tasks_per_user
+    created = 0
+    while created < total:
+        batch = []
+        for _ in range(min(batch_size, total - created)):
+            # Skew: a fifth of the tasks pile onto a handful of busy users.
+            if rng.random() < 0.2:
+                idx = min(int(rng.paretovariate(1.2)) - 1, len(user_ids) - 1)
+            else:
+                idx = rng.randrange(len(user_ids))
+            assignee = user_ids[idx]
+            status = rng.choices(statuses, weights)[0]
+            done = status == Task.Status.COMPLETED
+            completed_at = now - timedelta(minutes=rng.randint(0, 90 * 24 * 60)) if done else None
+            batch.append(
+                Task(
+                    title=f"Task {created + len(batch)}",
+                    description="Synthetic benchmark task. " * rng.randint(1, 20),
+                    assigned_to_id=assignee,
+                    created_by_id=managers[assignee],
+                    due_date=today + timedelta(days=rng.randint(-60, 60)),
+                    status=status,
+                    completion_report="Done." if done else None,
+                    worked_hours=Decimal(rng.randint(25, 4000)) / 100 if done else None,
+                    completed_at=completed_at,
+                )
+            )
+        Task.objects.bulk_create(batch, batch_size=batch_size)
+        created += len(batch)
+        log(f"Created {created}/{total} tasks")
+
+    return {"SUPERADMIN": superadmin_ids, "ADMIN": admin_ids, "USER": user_ids}
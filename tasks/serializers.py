@@ -1,7 +1,59 @@
+from django.contrib.auth import get_user_model
 from rest_framework import serializers
 from .models import Task
+from .scope import TaskScope
+
+
+class AssigneeField(serializers.PrimaryKeyRelatedField):
+    """
+    Primary-key field for ``assigned_to``, limited to the users the
+    requester may assign work to (TaskScope.assignable). Keeping a task's
+    current assignee is always allowed, so a task the requester may edit
+    (e.g. one they created for a user who has since changed teams) can be
+    saved back unchanged.
+
+    Bulk endpoints prefetch every referenced user in one query and pass them
+    in ``context["assignees"]`` ({id: user}); the field then resolves ids
+    from that map instead of running one SELECT per item.
+    """
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        request = self.context.get("request")
+        if request is None:
+            return queryset
+        return TaskScope.for_request(request).assignable(queryset)
+
+    @staticmethod
+    def _pk(data):
+        if isinstance(data, bool):
+            return None
+        try:
+            return int(data)
+        except (TypeError, ValueError):
+            return None
+
+    def to_internal_value(self, data):
+        pk = self._pk(data)
+        instance = getattr(self.parent, "instance", None)
+        if instance is not None and pk is not None and pk == instance.assigned_to_id:
+            return instance.assigned_to
+        assignees = self.context.get("assignees")
+        if assignees is None:
+            return super().to_internal_value(data)
+        if pk is None:
+            self.fail("incorrect_type", data_type=type(data).__name__)
+        if pk not in assignees:
+            self.fail("does_not_exist", pk_value=data)
+        return assignees[pk]
+
 
 class TaskSerializer(serializers.ModelSerializer):
+    assigned_to = AssigneeField(
+        queryset=get_user_model().objects.all(),
+        help_text="User who will do the task",
+    )
+
     class Meta:
         model = Task
         fields = [
@@ -14,10 +66,11 @@ class TaskSerializer(serializers.ModelSerializer):
             "completion_report",
             "worked_hours",
             "created_by",
+            "completed_at",
             "created_at",
             "updated_at",
         ]
-        read_only_fields = ["created_by", "created_at", "updated_at"]
+        read_only_fields = ["created_by", "completed_at", "created_at", "updated_at"]
 
     def validate(self, data):
         """
@@ -33,3 +86,18 @@ class TaskSerializer(serializers.ModelSerializer):
                     "When a task is completed, completion_report and worked_hours are required."
                 )
         return data
+
+
+class HoursBucketSerializer(serializers.Serializer):
+    start = serializers.DateField()
+    hours = serializers.DecimalField(max_digits=12, decimal_places=2)
+    tasks = serializers.IntegerField()
+
+
+class HoursReportSerializer(serializers.Serializer):
+    scope = serializers.CharField()
+    ref = serializers.IntegerField()
+    period = serializers.CharField()
+    total_hours = serializers.DecimalField(max_digits=14, decimal_places=2)
+    total_tasks = serializers.IntegerField()
+    buckets = HoursBucketSerializer(many=True)
@@ -0,0 +1,66 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import Signal, receiver
+
+from accounts.signals import user_changed
+from . import rollups
+from .models import HoursRollup, Task
+from .scope import forget_managed
+
+# Sent whenever tasks are written, including by bulk paths that bypass
+# post_save/post_delete. ``changes`` is a list of ``(before, after)`` pairs of
+# Task.tracked_state() dicts; ``before`` is None for new tasks and ``after``
+# is None for deleted ones.
+tasks_changed = Signal()
+
+
+@receiver(pre_save, sender=Task)
+def _load_missing_state(sender, instance, raw=False, **kwargs):
+    # Instances built by hand, or loaded with tracked fields deferred, need
+    # their previous state fetched before it is overwritten.
+    if raw or instance._state.adding:
+        return
+    state = getattr(instance, "_tracked_state", None)
+    if state is not None and len(state) == len(sender.TRACKED_FIELDS):
+        return
+    row = Task.objects.filter(pk=instance.pk).values(*Task.TRACKED_FIELDS).first()
+    instance._tracked_state = row
+
+
+@receiver(post_save, sender=Task)
+def _task_saved(sender, instance, created, raw=False, **kwargs):
+    if raw:
+        return
+    before = None if created else instance._tracked_state
+    after = instance.tracked_state()
+    tasks_changed.send(sender=Task, changes=[(before, after)])
+    instance._tracked_state = after
+
+
+@receiver(post_delete, sender=Task)
+def _task_deleted(sender, instance, **kwargs):
+    before = getattr(instance, "_tracked_state", None) or instance.tracked_state()
+    tasks_changed.send(sender=Task, changes=[(before, None)])
+
+
+@receiver(user_changed)
+def _invalidate_scopes(sender, instance, before, after, **kwargs):
+    old_manager = before["manager_id"] if before else None
+    new_manager = after["manager_id"] if after else None
+    if old_manager != new_manager:
+        forget_managed(old_manager, new_manager)
+    if after is None:
+        forget_managed(instance.pk)
+
+
+@receiver(tasks_changed)
+def _roll_up_hours(sender, changes, **kwargs):
+    rollups.apply(rollups.task_deltas(changes))
+
+
+@receiver(user_changed)
+def _move_hours(sender, instance, before, after, **kwargs):
+    rollups.apply(rollups.user_deltas(instance, before, after))
+    if after is None:
+        rollups.forget(HoursRollup.USER, instance.pk)
+        if before["role"] == "ADMIN":
+            rollups.forget(HoursRollup.TEAM, instance.pk)
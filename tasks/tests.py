@@ -1,3 +1,862 @@
-from django.test import TestCase
+import csv
+import io
+import json
+from collections import defaultdict
+from datetime import date
+from decimal import Decimal
+from itertools import cycle
+from unittest import mock
 
-# Create your tests here.
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.db.models import QuerySet
+from django.test import TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils import timezone
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APIClient
+
+from accounts.models import CustomUser
+from task_manager_project.testing import ADMIN, ANONYMOUS, SUPERADMIN, USER, QueryBudgetTestCase, route_names
+from . import rollups
+from .export import EXPORT_FORMATS, iter_export
+from .models import HoursRollup, Task
+from .rows import RowSerializer
+from .search import search
+from .seeding import seed_dataset
+from .serializers import TaskSerializer
+from .views import TaskViewSet
+
+
+class RowSerializerTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = CustomUser.objects.create_user("admin", password="x", role="ADMIN")
+        cls.user = CustomUser.objects.create_user("user", password="x", role="USER", manager=cls.admin)
+        Task.objects.create(title="Open", assigned_to=cls.user, created_by=cls.admin)
+        Task.objects.create(
+            title="Done ü \"quoted\"",
+            description="Line one\nline two",
+            assigned_to=cls.user,
+            created_by=None,
+            due_date=date(2025, 1, 31),
+            status=Task.Status.COMPLETED,
+            completion_report="Shipped.",
+            worked_hours=Decimal("7.5"),
+        )
+        Task.objects.create(
+            title="Whole hours",
+            assigned_to=cls.user,
+            created_by=cls.admin,
+            status=Task.Status.COMPLETED,
+            completion_report="",
+            worked_hours=Decimal("12"),
+        )
+
+    def test_output_is_byte_identical_to_task_serializer(self):
+        queryset = Task.objects.order_by("id")
+        expected = JSONRenderer().render(TaskSerializer(queryset, many=True).data)
+        rows = RowSerializer(TaskSerializer)
+        actual = JSONRenderer().render(rows.many(rows.values(queryset)))
+        self.assertEqual(actual, expected)
+
+    def test_list_endpoint_uses_identical_representation(self):
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        response = client.get("/api/v1/tasks/", {"ordering": "id"})
+        self.assertEqual(response.status_code, 200)
+        expected = JSONRenderer().render(TaskSerializer(Task.objects.order_by("id"), many=True).data)
+        self.assertEqual(JSONRenderer().render(response.json()["results"]), expected)
+
+
+class TaskScopeTests(TestCase):
+    """
+    An Admin's access follows their team as soon as a user's manager
+    changes, in every worker.
+    """
+
+    def setUp(self):
+        cache.clear()
+        self.admin = CustomUser.objects.create_user("admin", role="ADMIN")
+        self.other_admin = CustomUser.objects.create_user("other_admin", role="ADMIN")
+        self.user = CustomUser.objects.create_user("user", role="USER", manager=self.admin)
+        self.task = Task.objects.create(title="Team task", assigned_to=self.user)
+
+    def statuses(self, admin):
+        client = APIClient()
+        client.force_authenticate(admin)
+        hours = client.get(reverse("tasks-hours"), {"scope": "user", "ref": self.user.pk})
+        detail = client.get(reverse("tasks-detail", args=[self.task.pk]))
+        return hours.status_code, detail.status_code
+
+    def test_reassignment_in_another_worker(self):
+        self.assertEqual(self.statuses(self.admin), (200, 200))
+        # No signal reaches this process, as when another worker saves it.
+        CustomUser.objects.filter(pk=self.user.pk).update(manager=self.other_admin)
+        self.assertEqual(self.statuses(self.admin), (403, 404))
+        self.assertEqual(self.statuses(self.other_admin), (200, 200))
+
+    @override_settings(TASK_SCOPE_CACHE_TIMEOUT=300)
+    def test_reassignment_drops_cached_scopes(self):
+        self.assertEqual(self.statuses(self.admin), (200, 200))
+        self.assertEqual(self.statuses(self.other_admin), (403, 404))
+        self.user.manager = self.other_admin
+        self.user.save()
+        self.assertEqual(self.statuses(self.admin), (403, 404))
+        self.assertEqual(self.statuses(self.other_admin), (200, 200))
+
+
+class TaskPaginationTests(TestCase):
+    """
+    Task list pages seek on (updated_at, id): every task appears exactly
+    once, whatever the page boundaries and concurrent writes.
+    """
+
+    def setUp(self):
+        self.boss = CustomUser.objects.create_user("boss", role="SUPERADMIN", is_superuser=True)
+        self.client = APIClient()
+        self.client.force_authenticate(self.boss)
+        self.user = CustomUser.objects.create_user("user", role="USER")
+        self.tasks = [Task.objects.create(title=f"Task {i}", assigned_to=self.user) for i in range(5)]
+
+    def page(self, url=None, **params):
+        response = self.client.get(url or reverse("tasks-list"), params)
+        self.assertEqual(response.status_code, 200)
+        return response.json()
+
+    def walk(self, **params):
+        pages, body = [], self.page(**params)
+        while True:
+            pages.append([task["id"] for task in body["results"]])
+            if not body["next"]:
+                return pages
+            body = self.page(body["next"])
+
+    def newest_first(self):
+        return list(Task.objects.order_by("-updated_at", "-id").values_list("pk", flat=True))
+
+    def test_pages_cover_every_task_once(self):
+        pages = self.walk(page_size=2)
+        self.assertEqual([len(page) for page in pages], [2, 2, 1])
+        self.assertEqual(sum(pages, []), self.newest_first())
+
+    def test_ties_on_updated_at_break_on_id(self):
+        Task.objects.update(updated_at=self.tasks[0].updated_at)
+        self.assertEqual(sum(self.walk(page_size=2), []), self.newest_first())
+
+    def test_exact_last_page_has_no_next_link(self):
+        self.tasks.pop().delete()
+        first = self.page(page_size=2)
+        self.assertIsNone(first["previous"])
+        last = self.page(first["next"])
+        self.assertEqual(len(last["results"]), 2)
+        self.assertIsNone(last["next"])
+        self.assertEqual(self.page(last["previous"])["results"], first["results"])
+
+    def test_cursor_is_stable_under_writes(self):
+        expected = self.newest_first()
+        first = self.page(page_size=2)
+        # A new task and an edited one both move to the front; the next page
+        # still starts right after the last task already seen.
+        Task.objects.create(title="Newer", assigned_to=self.user)
+        Task.objects.get(pk=expected[-1]).save()
+        second = self.page(first["next"])
+        self.assertEqual([task["id"] for task in second["results"]], expected[2:4])
+
+    def test_page_size_is_capped(self):
+        Task.objects.bulk_create(Task(title=f"Bulk {i}", assigned_to=self.user) for i in range(500))
+        self.assertEqual(len(self.page(page_size=10_000)["results"]), 500)
+
+
+class TaskWriteTests(TestCase):
+    """
+    Single and bulk writes: assignees stay within the requester's scope,
+    and a bulk batch is written completely or not at all.
+    """
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user("admin", role="ADMIN")
+        self.user = CustomUser.objects.create_user("user", role="USER", manager=self.admin)
+        self.stranger = CustomUser.objects.create_user("stranger", role="USER")
+        self.tasks = [Task.objects.create(title=f"Task {i}", assigned_to=self.user) for i in range(2)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.admin)
+
+    def titles(self):
+        return list(Task.objects.order_by("pk").values_list("title", flat=True))
+
+    def test_single_writes_only_assign_within_scope(self):
+        url = reverse("tasks-list")
+        response = self.client.post(url, {"title": "Theirs", "assigned_to": self.stranger.pk}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertIn("assigned_to", response.json())
+        response = self.client.post(url, {"title": "Ours", "assigned_to": self.user.pk}, format="json")
+        self.assertEqual(response.status_code, 201)
+
+        detail = reverse("tasks-detail", args=[self.tasks[0].pk])
+        response = self.client.patch(detail, {"assigned_to": self.stranger.pk}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(Task.objects.get(pk=self.tasks[0].pk).assigned_to_id, self.user.pk)
+
+    def test_current_assignee_may_stay_out_of_scope(self):
+        # Created by the Admin, whose user then moved to another team: still
+        # editable by its creator, who may keep but not pick that assignee.
+        task = Task.objects.create(title="Created", assigned_to=self.user, created_by=self.admin)
+        self.user.manager = None
+        self.user.save()
+        detail = reverse("tasks-detail", args=[task.pk])
+        response = self.client.put(detail, {"title": "Edited", "assigned_to": self.user.pk}, format="json")
+        self.assertEqual(response.status_code, 200)
+        response = self.client.patch(reverse("tasks-bulk-update"), [
+            {"id": task.pk, "title": "Bulk", "assigned_to": self.user.pk},
+        ], format="json")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(Task.objects.get(pk=task.pk).title, "Bulk")
+
+        other = Task.objects.create(title="Other", assigned_to=self.stranger, created_by=self.admin)
+        response = self.client.patch(
+            reverse("tasks-detail", args=[other.pk]), {"assigned_to": self.user.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_user_assigns_only_to_themselves(self):
+        self.client.force_authenticate(self.user)
+        response = self.client.post(
+            reverse("tasks-list"), {"title": "Theirs", "assigned_to": self.stranger.pk}, format="json"
+        )
+        self.assertEqual(response.status_code, 400)
+
+    def test_bulk_create_writes_nothing_when_an_item_fails(self):
+        response = self.client.post(reverse("tasks-bulk-create"), [
+            {"title": "Fine", "assigned_to": self.user.pk},
+            {"title": "Out of scope", "assigned_to": self.stranger.pk},
+            {"title": "Incomplete", "assigned_to": self.user.pk, "status": "COMPLETED"},
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn("assigned_to", errors[1])
+        self.assertIn("non_field_errors", errors[2])
+        self.assertEqual(self.titles(), ["Task 0", "Task 1"])
+
+    def test_bulk_update_writes_nothing_when_an_item_fails(self):
+        first, second = self.tasks
+        response = self.client.patch(reverse("tasks-bulk-update"), [
+            {"id": first.pk, "title": "Renamed"},
+            {"id": second.pk, "status": "COMPLETED"},
+            {"id": 10**9, "title": "Missing"},
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+        errors = response.json()
+        self.assertEqual(errors[0], {})
+        self.assertIn("non_field_errors", errors[1])
+        self.assertEqual(errors[2], {"id": ["Not found."]})
+        self.assertEqual(self.titles(), ["Task 0", "Task 1"])
+
+        response = self.client.patch(reverse("tasks-bulk-update"), [
+            {"id": first.pk, "title": "Renamed"},
+            {"id": second.pk, "title": "Renamed too"},
+        ], format="json")
+        self.assertEqual(response.json(), {"updated": [first.pk, second.pk]})
+        self.assertEqual(self.titles(), ["Renamed", "Renamed too"])
+
+    def test_bulk_update_rejects_duplicate_ids(self):
+        first, second = self.tasks
+        response = self.client.patch(reverse("tasks-bulk-update"), [
+            {"id": first.pk, "status": "IN_PROGRESS"},
+            {"id": second.pk, "title": "Fine"},
+            {"id": first.pk, "status": "TODO"},
+        ], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{}, {}, {"id": ["Duplicate id."]}])
+        self.assertEqual(Task.objects.get(pk=first.pk).status, Task.Status.TODO)
+
+    def test_bulk_endpoints_reject_boolean_ids(self):
+        Task.objects.filter(pk=self.tasks[0].pk).update(id=1)
+        response = self.client.patch(reverse("tasks-bulk-update"), [{"id": True, "title": "Renamed"}], format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), [{"id": ["Not found."]}])
+        response = self.client.post(reverse("tasks-bulk-status"), {"ids": [True], "status": "TODO"}, format="json")
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(self.titles()[0], "Task 0")
+
+    def test_bulk_writes_lock_their_rows(self):
+        select_for_update = QuerySet.select_for_update
+        requests = (
+            ("patch", "tasks-bulk-update", [{"id": self.tasks[0].pk, "title": "Renamed"}]),
+            ("post", "tasks-bulk-status", {"ids": [self.tasks[0].pk], "status": "IN_PROGRESS"}),
+        )
+        for method, route, data in requests:
+            with self.subTest(route=route), mock.patch.object(
+                QuerySet, "select_for_update", autospec=True, side_effect=select_for_update
+            ) as locking:
+                response = getattr(self.client, method)(reverse(route), data, format="json")
+                self.assertEqual(response.status_code, 200)
+                locking.assert_called_once_with(mock.ANY, of=("self",))
+
+
+class TaskFilterTests(TestCase):
+    """
+    Unscoped (SuperAdmin) lists accept only filters and orderings an index
+    can answer; scoped lists accept any combination.
+    """
+
+    def setUp(self):
+        self.boss = CustomUser.objects.create_user("boss", role="SUPERADMIN", is_superuser=True)
+        self.user = CustomUser.objects.create_user("user", role="USER")
+        self.todo = Task.objects.create(title="Todo", assigned_to=self.user, due_date=date(2026, 1, 10))
+        Task.objects.create(title="Doing", assigned_to=self.user, status="IN_PROGRESS")
+        self.client = APIClient()
+        self.client.force_authenticate(self.boss)
+
+    def get(self, **params):
+        return self.client.get(reverse("tasks-list"), params)
+
+    def test_rejected_combinations(self):
+        for params, field in (
+            ({"status": "DONE"}, "status"),
+            ({"assigned_to": "me"}, "assigned_to"),
+            ({"ordering": "title"}, "ordering"),
+            ({"due_after": "2026-01-01"}, "filters"),
+            ({"status": "TODO", "ordering": "id"}, "ordering"),
+            ({"updated_since": "2026-01-01", "ordering": "-id"}, "ordering"),
+        ):
+            with self.subTest(**params):
+                response = self.get(**params)
+                self.assertEqual(response.status_code, 400)
+                self.assertEqual(list(response.json()), [field])
+
+    def test_indexed_combinations(self):
+        for params in (
+            {"ordering": "id"},
+            {"status": "TODO", "due_after": "2026-01-01"},
+            {"assigned_to": self.user.pk, "ordering": "updated_at"},
+        ):
+            with self.subTest(**params):
+                response = self.get(**params)
+                self.assertEqual(response.status_code, 200)
+        results = self.get(status="TODO", due_after="2026-01-01").json()["results"]
+        self.assertEqual([task["id"] for task in results], [self.todo.pk])
+
+    def test_scoped_lists_accept_any_combination(self):
+        self.client.force_authenticate(self.user)
+        response = self.get(due_after="2026-01-01", ordering="id")
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([task["id"] for task in response.json()["results"]], [self.todo.pk])
+
+    def test_every_anchor_index_is_in_keyset_order(self):
+        indexed = {tuple(index.fields) for index in Task._meta.indexes}
+        for anchor in ("status", "assigned_to", "created_by"):
+            self.assertIn((anchor, "updated_at", "id"), indexed)
+
+
+class ConditionalRequestTests(TestCase):
+    """
+    ETags on task lists and details: 304 while the client's copy is current,
+    412 when an If-Match write would overwrite a newer version.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("user", role="USER")
+        self.other = CustomUser.objects.create_user("other", role="USER")
+        self.tasks = [Task.objects.create(title=f"Task {i}", assigned_to=self.user) for i in range(3)]
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def revalidate(self, url, etag, **params):
+        return self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+
+    def test_list_is_not_modified_until_its_page_changes(self):
+        for route in ("tasks-list", "tasks-async-list"):
+            with self.subTest(route=route):
+                url = reverse(route)
+                etag = self.client.get(url, {"page_size": 2})["ETag"]
+                response = self.revalidate(url, etag, page_size=2)
+                self.assertEqual((response.status_code, response["ETag"]), (304, etag))
+                self.assertEqual(self.revalidate(url, etag, page_size=3).status_code, 200)
+
+    def test_list_etag_follows_edits_and_deletions(self):
+        url = reverse("tasks-list")
+        newest, _, oldest = sorted(self.tasks, key=lambda t: (t.updated_at, t.pk), reverse=True)
+        etag = self.client.get(url, {"page_size": 2})["ETag"]
+        oldest.delete()  # not on the first page, which has no next page now
+        response = self.revalidate(url, etag, page_size=2)
+        self.assertEqual(response.status_code, 200)
+        etag = response["ETag"]
+        newest.title = "Edited"
+        newest.save()
+        self.assertEqual(self.revalidate(url, etag, page_size=2).status_code, 200)
+
+    def test_list_etag_is_per_user(self):
+        url = reverse("tasks-list")
+        etag = self.client.get(url)["ETag"]
+        self.client.force_authenticate(self.other)
+        self.assertEqual(self.revalidate(url, etag).status_code, 200)
+
+    def test_detail_is_not_modified(self):
+        url = reverse("tasks-detail", args=[self.tasks[0].pk])
+        response = self.client.get(url)
+        self.assertEqual(self.revalidate(url, response["ETag"]).status_code, 304)
+        since = self.client.get(url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"])
+        self.assertEqual(since.status_code, 304)
+
+    def test_stale_if_match_is_rejected(self):
+        task = self.tasks[0]
+        url = reverse("tasks-detail", args=[task.pk])
+        etag = self.client.get(url)["ETag"]
+        response = self.client.patch(url, {"title": "First"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+        stale = self.client.patch(url, {"title": "Second"}, format="json", HTTP_IF_MATCH=etag)
+        self.assertEqual(stale.status_code, 412)
+        self.assertEqual(Task.objects.get(pk=task.pk).title, "First")
+        anyway = self.client.patch(url, {"title": "Second"}, format="json", HTTP_IF_MATCH="*")
+        self.assertEqual(anyway.status_code, 200)
+
+
+class SearchTests(TestCase):
+    """
+    Full-text search: ranking, scope, and an index that follows every write
+    path.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("user", role="USER")
+        self.other = CustomUser.objects.create_user("other", role="USER")
+
+    def task(self, title, description="", assignee=None):
+        return Task.objects.create(title=title, description=description, assigned_to=assignee or self.user)
+
+    def found(self, text):
+        return [task.pk for task in search(Task.objects.all(), text)]
+
+    def test_title_matches_rank_first(self):
+        in_description = self.task("Weekly chores", "Deploy the staging server")
+        in_title = self.task("Deploy", "Nothing else")
+        self.assertEqual(self.found("deploy"), [in_title.pk, in_description.pk])
+        ranks = [task.search_rank for task in search(Task.objects.all(), "deploy")]
+        self.assertEqual(ranks, sorted(ranks))
+
+    def test_every_word_must_match_and_the_last_is_a_prefix(self):
+        both = self.task("Renew certificates", "before expiry")
+        self.task("Renew domain")
+        self.assertEqual(self.found("renew cert"), [both.pk])
+        self.assertEqual(self.found("  "), [])
+
+    def test_index_follows_updates_and_deletes(self):
+        task = self.task("Alpha")
+        task.title = "Beta"
+        task.save()
+        self.assertEqual((self.found("alpha"), self.found("beta")), ([], [task.pk]))
+
+        Task.objects.filter(pk=task.pk).update(description="gamma")
+        self.assertEqual(self.found("gamma"), [task.pk])
+        task.refresh_from_db()
+        task.title = "Delta"
+        Task.objects.bulk_update([task], ["title"])
+        self.assertEqual((self.found("beta"), self.found("delta")), ([], [task.pk]))
+
+        task.delete()
+        self.assertEqual((self.found("delta"), self.found("gamma")), ([], []))
+
+    def test_search_endpoint_stays_in_scope(self):
+        mine = self.task("Report numbers")
+        self.task("Report numbers", assignee=self.other)
+        client = APIClient()
+        client.force_authenticate(self.user)
+        response = client.get(reverse("tasks-search"), {"q": "report"})
+        self.assertEqual([task["id"] for task in response.json()], [mine.pk])
+
+
+class SparseFieldsetTests(TestCase):
+    """
+    ?fields=/?omit= trim the output and the columns read, and reject names
+    the serializer does not have.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("user", role="USER")
+        self.task = Task.objects.create(title="t", description="long text", assigned_to=self.user)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def get(self, route, query, *args):
+        return self.client.get(reverse(route, args=args) + query)
+
+    def test_fields_and_omit(self):
+        response = self.get("tasks-list", "?fields=title,id")
+        self.assertEqual([list(row) for row in response.json()["results"]], [["id", "title"]])
+
+        response = self.get("tasks-detail", "?omit=description,completion_report", self.task.pk)
+        self.assertEqual(
+            list(response.json()),
+            [name for name in TaskSerializer().fields if name not in ("description", "completion_report")],
+        )
+
+        response = self.get("tasks-detail", "?fields=id,title,status&omit=status", self.task.pk)
+        self.assertEqual(response.json(), {"id": self.task.pk, "title": "t"})
+
+    def test_unknown_fields(self):
+        response = self.get("tasks-list", "?fields=title,nope&omit=secret")
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(response.json()["fields"][0].startswith("Unknown field(s): nope. Available: id, title,"))
+        self.assertTrue(response.json()["omit"][0].startswith("Unknown field(s): secret."))
+
+        response = self.get("tasks-list", "?fields=title&omit=title")
+        self.assertEqual(response.json(), {"fields": ["At least one field must remain."]})
+
+    def test_only_narrows_columns(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get("tasks-detail", "?fields=title", self.task.pk)
+        self.assertEqual(response.json(), {"title": "t"})
+        [sql] = [q["sql"] for q in queries if 'FROM "tasks_task"' in q["sql"]]
+        self.assertNotIn('"description"', sql)
+        self.assertNotIn("JOIN", sql)
+        self.assertIn('"title"', sql)
+
+        with CaptureQueriesContext(connection) as queries:
+            self.get("tasks-list", "?fields=id")
+        [sql] = [q["sql"] for q in queries if 'FROM "tasks_task"' in q["sql"]]
+        self.assertNotIn('"description"', sql)
+
+    def test_columns_keep_what_views_read(self):
+        view = TaskViewSet()
+        self.assertEqual(
+            view.fieldset_columns(["title", "assigned_to"]),
+            ["id", "assigned_to", "created_by", "status", "updated_at", "title"],
+        )
+
+    def test_writes_ignore_fieldsets(self):
+        response = self.client.patch(
+            reverse("tasks-detail", args=[self.task.pk]) + "?fields=id", {"title": "u"}, format="json"
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(list(response.json()), list(TaskSerializer().fields))
+
+
+class HoursRollupTests(TestCase):
+    """
+    Worked-hours rollups follow tasks into and out of COMPLETED and across
+    reassignments, and always agree with reconcile_hours.
+    """
+
+    def setUp(self):
+        self.admin = CustomUser.objects.create_user("admin", role="ADMIN")
+        self.other = CustomUser.objects.create_user("other", role="ADMIN")
+        self.user = CustomUser.objects.create_user("user", role="USER", manager=self.admin)
+        self.peer = CustomUser.objects.create_user("peer", role="USER", manager=self.other)
+
+    def today(self, scope, ref=0):
+        [bucket] = rollups.read(scope, ref, rollups.DAY, timezone.localdate(), timezone.localdate())
+        return bucket["hours"], bucket["tasks"]
+
+    def assertReconciled(self):
+        totals = defaultdict(lambda: (0, 0))
+        for r in HoursRollup.objects.all():
+            hours, tasks = totals[(r.scope, r.ref, r.period, r.start)]
+            totals[(r.scope, r.ref, r.period, r.start)] = (hours + r.hours, tasks + r.tasks)
+        stored = {key: value for key, value in totals.items() if any(value)}
+        exact = {key: value for key, value in rollups.compute_all().items() if any(value)}
+        self.assertEqual(stored, exact)
+        out = io.StringIO()
+        call_command("reconcile_hours", "--dry-run", stdout=out)
+        self.assertIn("0 rollups drifted", out.getvalue())
+
+    def test_status_changes(self):
+        task = Task.objects.create(title="t", assigned_to=self.user, worked_hours=Decimal("2.00"))
+        self.assertEqual(self.today(rollups.ALL), (0, 0))
+
+        task.status = Task.Status.COMPLETED
+        task.save()
+        for scope, ref in ((rollups.USER, self.user.pk), (rollups.TEAM, self.admin.pk), (rollups.ALL, 0)):
+            self.assertEqual(self.today(scope, ref), (Decimal("2.00"), 1))
+        self.assertReconciled()
+
+        task.worked_hours = Decimal("3.50")
+        task.save()
+        self.assertEqual(self.today(rollups.TEAM, self.admin.pk), (Decimal("3.50"), 1))
+        self.assertReconciled()
+
+        task.status = Task.Status.IN_PROGRESS
+        task.save()
+        self.assertIsNone(task.completed_at)
+        self.assertEqual(self.today(rollups.USER, self.user.pk), (0, 0))
+        self.assertReconciled()
+
+        task.status = Task.Status.COMPLETED
+        task.save()
+        task.delete()
+        self.assertEqual(self.today(rollups.ALL), (0, 0))
+        self.assertReconciled()
+
+    def test_reassignment(self):
+        task = Task.objects.create(
+            title="t", assigned_to=self.user, status=Task.Status.COMPLETED, worked_hours=Decimal("3.00"),
+        )
+        task.assigned_to = self.peer
+        task.save()
+        self.assertEqual(self.today(rollups.USER, self.user.pk), (0, 0))
+        self.assertEqual(self.today(rollups.USER, self.peer.pk), (Decimal("3.00"), 1))
+        self.assertEqual(self.today(rollups.TEAM, self.admin.pk), (0, 0))
+        self.assertEqual(self.today(rollups.TEAM, self.other.pk), (Decimal("3.00"), 1))
+        self.assertReconciled()
+
+        # Moving the assignee to another Admin carries their hours along.
+        self.peer.manager = self.admin
+        self.peer.save()
+        self.assertEqual(self.today(rollups.TEAM, self.other.pk), (0, 0))
+        self.assertEqual(self.today(rollups.TEAM, self.admin.pk), (Decimal("3.00"), 1))
+        self.assertReconciled()
+
+        self.admin.delete()
+        self.assertFalse(HoursRollup.objects.filter(scope=rollups.TEAM, ref=self.admin.pk).exists())
+        self.assertReconciled()
+
+    @override_settings(HOURS_ROLLUP_SHARDS=3)
+    def test_all_scope_is_sharded(self):
+        with mock.patch.object(rollups, "writer_shard", side_effect=cycle(range(3))):
+            for i in range(3):
+                Task.objects.create(
+                    title=f"t{i}", assigned_to=self.user, status=Task.Status.COMPLETED, worked_hours=Decimal("1.00"),
+                )
+        rows = HoursRollup.objects.filter(scope=rollups.ALL, period=rollups.DAY)
+        self.assertEqual(sorted(rows.values_list("shard", "tasks")), [(0, 1), (1, 1), (2, 1)])
+        self.assertEqual(HoursRollup.objects.filter(scope=rollups.USER, shard__gt=0).count(), 0)
+        self.assertEqual(self.today(rollups.ALL), (Decimal("3.00"), 3))
+        self.assertReconciled()
+
+        # Drift is folded onto shard 0; every shard row stays.
+        rows.filter(shard=2).update(hours=Decimal("9.00"))
+        call_command("reconcile_hours", stdout=io.StringIO())
+        self.assertEqual(sorted(rows.values_list("shard", "hours")), [
+            (0, Decimal("3.00")), (1, Decimal("0.00")), (2, Decimal("0.00")),
+        ])
+        self.assertReconciled()
+
+    def test_bulk_status(self):
+        ids = [Task.objects.create(title=f"t{i}", assigned_to=self.user).pk for i in range(2)]
+        client = APIClient()
+        client.force_authenticate(self.admin)
+        url = reverse("tasks-bulk-status")
+        payload = {"ids": ids, "status": "COMPLETED", "worked_hours": "1.25", "completion_report": "done"}
+        self.assertEqual(client.post(url, payload, format="json").status_code, 200)
+        self.assertEqual(self.today(rollups.TEAM, self.admin.pk), (Decimal("2.50"), 2))
+        self.assertReconciled()
+
+        self.assertEqual(client.post(url, {"ids": ids, "status": "TODO"}, format="json").status_code, 200)
+        self.assertEqual(self.today(rollups.ALL), (0, 0))
+        self.assertReconciled()
+
+
+class ExportTests(TestCase):
+    """
+    Streaming exports: scope, formats, and spreadsheet-safe CSV cells.
+    """
+
+    def setUp(self):
+        self.user = CustomUser.objects.create_user("user", role="USER")
+        other = CustomUser.objects.create_user("other", role="USER")
+        self.tasks = [
+            Task.objects.create(title="=HYPERLINK(\"http://x\")", assigned_to=self.user),
+            Task.objects.create(
+                title="Plain, \"quoted\"", assigned_to=self.user, status=Task.Status.COMPLETED,
+                worked_hours=Decimal("1.50"), completion_report="@SUM(A1)",
+            ),
+        ]
+        Task.objects.create(title="Not mine", assigned_to=other)
+        self.client = APIClient()
+        self.client.force_authenticate(self.user)
+
+    def export(self, fmt, **params):
+        response = self.client.get(reverse("tasks-export"), {"as": fmt, **params})
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Type"], EXPORT_FORMATS[fmt])
+        return b"".join(response.streaming_content).decode()
+
+    def test_csv(self):
+        rows = list(csv.DictReader(io.StringIO(self.export("csv"))))
+        self.assertEqual([int(row["id"]) for row in rows], [task.pk for task in self.tasks])
+        self.assertEqual(rows[0]["title"], "'=HYPERLINK(\"http://x\")")
+        self.assertEqual(rows[1]["title"], "Plain, \"quoted\"")
+        self.assertEqual(rows[1]["completion_report"], "'@SUM(A1)")
+        self.assertEqual((rows[1]["worked_hours"], rows[1]["assigned_to"]), ("1.50", "user"))
+        self.assertEqual(rows[0]["worked_hours"], "")
+
+    def test_ndjson(self):
+        lines = self.export("ndjson", status="COMPLETED").splitlines()
+        self.assertEqual(len(lines), 1)
+        record = json.loads(lines[0])
+        self.assertEqual(record["id"], self.tasks[1].pk)
+        # Only CSV is escaped; JSON consumers get the text as stored.
+        self.assertEqual(record["completion_report"], "@SUM(A1)")
+        self.assertEqual(record["worked_hours"], "1.50")
+
+    def test_rows_stream_in_chunks(self):
+        lines = iter_export(Task.objects.filter(assigned_to=self.user), "ndjson", chunk_size=1)
+        self.assertEqual(json.loads(next(lines))["id"], self.tasks[0].pk)
+        self.assertEqual(len(list(lines)), 1)
+
+    def test_unknown_format(self):
+        response = self.client.get(reverse("tasks-export"), {"as": "xlsx"})
+        self.assertEqual(response.status_code, 400)
+
+
+class SeedingTests(TestCase):
+    """
+    Seeded datasets never collide: each command has its own prefix and a
+    taken prefix is refused up front.
+    """
+
+    def test_benchmarks_run_next_to_seed_bench(self):
+        call_command(
+            "seed_bench", "--superadmins=1", "--admins=1", "--users-per-admin=2", "--tasks-per-user=2",
+            stdout=io.StringIO(),
+        )
+        out = io.StringIO()
+        call_command("bench_task_serializer", "--rows=20", "--repeat=1", stdout=out)
+        self.assertIn("RowSerializer", out.getvalue())
+
+    def test_taken_prefix_is_refused(self):
+        seed_dataset(admins=1, users_per_admin=1, tasks_per_user=1, prefix="dup")
+        with self.assertRaisesMessage(ValueError, "Users named dup_* already exist"):
+            seed_dataset(admins=1, users_per_admin=1, tasks_per_user=1, prefix="dup")
+        with self.assertRaisesMessage(CommandError, "Users named dup_* already exist"):
+            call_command("bench_task_scopes", "--prefix=dup", stdout=io.StringIO())
+
+
+class TaskApiQueryBudgetTests(QueryBudgetTestCase):
+    """
+    Maximum queries per request for every task API route, per role.
+    """
+
+    BUDGETED = (
+        "tasks-list", "tasks-detail", "tasks-report", "tasks-export", "tasks-search", "tasks-hours",
+        "tasks-bulk-create", "tasks-bulk-update", "tasks-bulk-status",
+        "tasks-async-list", "tasks-async-detail", "tasks-async-report",
+    )
+
+    def test_every_route_is_budgeted(self):
+        routes = {name for name in route_names("tasks.urls") if name != "api-root"}
+        self.assertRoutesBudgeted(routes, self.BUDGETED)
+
+    def test_list(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2, ANONYMOUS: 0}, "get", "tasks-list", status={
+                SUPERADMIN: 200, ADMIN: 200, USER: 200, ANONYMOUS: 401,
+            },
+        )
+
+    def test_list_filtered(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "tasks-list", query="?status=TODO&ordering=updated_at"
+        )
+
+    def test_list_fieldset(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "tasks-list", query="?fields=id,title,status"
+        )
+
+    def test_create(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 8, ADMIN: 8, USER: 8}, "post", "tasks-list",
+            data=lambda d: {"title": "New", "assigned_to": d.user.pk}, format="json", status=201,
+        )
+
+    def test_retrieve(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 3, USER: 2}, "get", "tasks-detail", args=lambda d: [d.task.pk]
+        )
+
+    def test_partial_update(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 10, ADMIN: 11, USER: 10}, "patch", "tasks-detail",
+            args=lambda d: [d.task.pk], data={"status": "IN_PROGRESS"}, format="json",
+        )
+
+    def test_update(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 4, ADMIN: 5, USER: 4}, "put", "tasks-detail", args=lambda d: [d.task.pk],
+            data=lambda d: {"title": "Renamed", "assigned_to": d.user.pk, "status": "TODO"}, format="json",
+        )
+
+    def test_destroy(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 8, ADMIN: 9, USER: 8}, "delete", "tasks-detail", args=lambda d: [d.task.pk], status=204
+        )
+
+    def test_report(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 3, USER: 2}, "get", "tasks-report", args=lambda d: [d.completed.pk],
+            status={SUPERADMIN: 200, ADMIN: 200, USER: 403},
+        )
+
+    def test_export(self):
+        self.assertQueryBudget({SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "tasks-export")
+
+    def test_search(self):
+        self.assertQueryBudget({SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "tasks-search", query="?q=task")
+
+    def test_hours(self):
+        self.assertQueryBudget({SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "tasks-hours")
+
+    def test_bulk_create(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 10, ADMIN: 10, USER: 10}, "post", "tasks-bulk-create",
+            data=lambda d: [{"title": f"Bulk {n}", "assigned_to": d.user.pk} for n in range(3)], format="json",
+            status=201,
+        )
+
+    def test_bulk_update(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 5, ADMIN: 5}, "patch", "tasks-bulk-update",
+            data=lambda d: [{"id": pk, "title": "Bulk edit"} for pk in d.open_ids], format="json",
+        )
+        # A User's scope holds only their own tasks.
+        self.assertQueryBudget(
+            {USER: 5}, "patch", "tasks-bulk-update",
+            data=lambda d: [{"id": d.task.pk, "title": "Bulk edit"}], format="json",
+        )
+
+    def test_bulk_status(self):
+        # One rollup/counter UPDATE per bucket touched: bounded by the
+        # batch's assignees, never by the size of the table.
+        self.assertQueryBudget(
+            {SUPERADMIN: 24, ADMIN: 24}, "post", "tasks-bulk-status",
+            data=lambda d: {"ids": d.open_ids, "status": "COMPLETED", "completion_report": "Done.",
+                            "worked_hours": "2.00"},
+            format="json",
+        )
+        self.assertQueryBudget(
+            {USER: 22}, "post", "tasks-bulk-status",
+            data=lambda d: {"ids": [d.task.pk], "status": "COMPLETED", "completion_report": "Done.",
+                            "worked_hours": "2.00"},
+            format="json",
+        )
+
+    # Async variants (tasks.async_views): the same queries, minus the
+    # object-level scope check the scoped queryset already covers.
+
+    def test_async_list(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2, ANONYMOUS: 0}, "get", "tasks-async-list", status={
+                SUPERADMIN: 200, ADMIN: 200, USER: 200, ANONYMOUS: 401,
+            },
+        )
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "tasks-async-list", query="?status=TODO&fields=id,title"
+        )
+
+    def test_async_retrieve(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "tasks-async-detail", args=lambda d: [d.task.pk]
+        )
+
+    def test_async_report(self):
+        self.assertQueryBudget(
+            {SUPERADMIN: 2, ADMIN: 2, USER: 2}, "get", "tasks-async-report", args=lambda d: [d.completed.pk],
+            status={SUPERADMIN: 200, ADMIN: 200, USER: 403},
+        )
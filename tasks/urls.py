@@ -1,7 +1,16 @@
+from django.urls import path
 from rest_framework.routers import DefaultRouter
+from . import async_views
 from .views import TaskViewSet
 
 router = DefaultRouter()
 router.register(r"", TaskViewSet, basename="tasks")
 
-urlpatterns = router.urls
+urlpatterns = [
+    # Async variants for ASGI servers (see tasks.async_views)
+    path("async/", async_views.task_list, name="tasks-async-list"),
+    path("async/<int:pk>/", async_views.task_detail, name="tasks-async-detail"),
+    path("async/<int:pk>/report/", async_views.task_report, name="tasks-async-report"),
+]
+
+urlpatterns += router.urls
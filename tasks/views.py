@@ -1,16 +1,57 @@
-from rest_framework import viewsets, status
+from datetime import timedelta
+from decimal import Decimal
+
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.http import StreamingHttpResponse
+from django.utils import timezone
+from django.utils.dateparse import parse_date
+from drf_spectacular.types import OpenApiTypes
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view, inline_serializer
+from rest_framework import viewsets, status, serializers
+from rest_framework.exceptions import PermissionDenied
 from rest_framework.response import Response
 from rest_framework.decorators import action
-from django.db.models import Q
+
+from task_manager_project.fieldsets import FIELDSET_PARAMETERS, SparseFieldsetMixin
 
 from .models import Task
-from .serializers import TaskSerializer
+from .serializers import HoursReportSerializer, TaskSerializer
 from .permissions import TaskPermission
+from .pagination import TaskCursorPagination
+from .export import EXPORT_FORMATS, iter_export
+from .search import search as search_tasks
+from .filters import TaskFilterBackend
+from .rows import RowSerializer
+from . import conditional
+from .signals import tasks_changed
+from . import rollups
+from .scope import TaskScope
 
-class TaskViewSet(viewsets.ModelViewSet):
+@extend_schema_view(
+    list=extend_schema(parameters=FIELDSET_PARAMETERS),
+    retrieve=extend_schema(parameters=FIELDSET_PARAMETERS),
+)
+class TaskViewSet(SparseFieldsetMixin, viewsets.ModelViewSet):
     queryset = Task.objects.all().select_related("assigned_to", "created_by")
     serializer_class = TaskSerializer
     permission_classes = [TaskPermission]
+    pagination_class = TaskCursorPagination
+    # ?status=&assigned_to=&...&ordering= (index-backed combinations only)
+    filter_backends = [TaskFilterBackend]
+    # list() reads values() rows and formats them without TaskSerializer.
+    row_serializer = RowSerializer(TaskSerializer)
+    # ?fields=/?omit= never skip what scope checks, keyset pages and ETags read.
+    fieldset_required = ("id", "assigned_to", "created_by", "status", "updated_at")
+    # Upper bound on items accepted by the bulk endpoints in one request.
+    bulk_max_items = 5000
+    # Default and maximum number of hits returned by the search endpoint.
+    search_limit = 20
+    search_max_limit = 100
+    # Most buckets the hours endpoint returns in one response.
+    hours_max_buckets = 366
+    # GET actions that may read from a replica (task_manager_project.replicas).
+    replica_actions = ("list", "retrieve", "report")
 
     def get_queryset(self):
         """
@@ -19,18 +60,83 @@ class TaskViewSet(viewsets.ModelViewSet):
         - Admin sees tasks of their assigned users.
         - User sees only their own tasks.
         """
-        user = self.request.user
+        scope = TaskScope.for_request(self.request)
+        queryset = scope.filter(super().get_queryset())
+        if getattr(self, "lock_object", False):
+            queryset = queryset.select_for_update(of=("self",))
+        return queryset
 
-        if user.is_superadmin():
-            return Task.objects.all()
+    # ------------------------------
+    # Conditional requests
+    # ------------------------------
+    # GET list/detail answer 304 when If-None-Match (or If-Modified-Since on
+    # detail) shows the client's copy is current, before any serialization.
+    # A list page is validated by the rows it holds (tasks.conditional).
+    # PUT/PATCH honour If-Match: the row is locked, its ETag compared, and a
+    # stale copy gets 412 instead of silently overwriting someone's edit.
 
-        if user.is_admin():
-            return Task.objects.filter(
-                Q(assigned_to__manager=user) | Q(created_by=user)
-            )
+    def list(self, request, *args, **kwargs):
+        serializer, rows = self.list_rows(self.filter_queryset(self.get_queryset()))
+        page = self.paginate_queryset(rows)
+        if page is None:
+            return self.list_response(serializer, list(rows), paginated=False)
+        return self.list_response(serializer, page)
+
+    def list_response(self, serializer, rows, paginated=True):
+        """
+        The response for the rows list() read, or 304 when the client's copy
+        of that page is current.
+        """
+        state = (self.paginator.has_previous, self.paginator.has_next) if paginated else ()
+        etag, last_modified = conditional.page_validators(self.request, rows, *state)
+        if conditional.none_match(self.request, etag):
+            return conditional.not_modified(etag, last_modified)
+        if paginated:
+            response = self.get_paginated_response(serializer.many(rows))
+        else:
+            response = Response(serializer.many(rows))
+        return conditional.set_validators(response, etag, last_modified)
+
+    def list_rows(self, queryset):
+        """
+        The row serializer for this request's fieldset and the values()
+        rows it formats.
+        """
+        fieldset = self.get_fieldset()
+        serializer = self.row_serializer if fieldset is None else RowSerializer(TaskSerializer, fields=fieldset)
+        return serializer, serializer.values(queryset, *self.fieldset_required)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.detail_response(self.get_object())
+
+    def detail_response(self, task):
+        etag = conditional.task_etag(task)
+        if conditional.none_match(self.request, etag, task.updated_at):
+            return conditional.not_modified(etag, task.updated_at)
+        response = Response(self.get_serializer(task).data)
+        return conditional.set_validators(response, etag, task.updated_at)
 
-        # normal user
-        return Task.objects.filter(assigned_to=user)
+    def get_object(self):
+        task = super().get_object()
+        if self.request.method in ("PUT", "PATCH"):
+            conditional.check_if_match(self.request, conditional.task_etag(task))
+        return task
+
+    def update(self, request, *args, **kwargs):
+        if "HTTP_IF_MATCH" not in request.META:
+            response = super().update(request, *args, **kwargs)
+        else:
+            with transaction.atomic():
+                self.lock_object = True
+                response = super().update(request, *args, **kwargs)
+        task = getattr(self, "updated_task", None)
+        if task is not None:
+            conditional.set_validators(response, conditional.task_etag(task), task.updated_at)
+        return response
+
+    def perform_update(self, serializer):
+        serializer.save()
+        self.updated_task = serializer.instance
 
     def perform_create(self, serializer):
         """
@@ -44,10 +150,11 @@ class TaskViewSet(viewsets.ModelViewSet):
         GET /api/v1/tasks/<id>/report/
         - Admin and SuperAdmin can view report of completed tasks.
         """
-        task = self.get_object()
+        return self.report_response(self.get_object())
 
+    def report_response(self, task):
         # Check permissions:
-        if request.user.is_user():
+        if self.request.user.is_user():
             return Response({"detail": "Not allowed."}, status=status.HTTP_403_FORBIDDEN)
 
         if task.status != Task.Status.COMPLETED:
@@ -60,3 +167,305 @@ class TaskViewSet(viewsets.ModelViewSet):
             "title": task.title,
         }
         return Response(data)
+
+    @extend_schema(
+        parameters=[OpenApiParameter("as", enum=tuple(EXPORT_FORMATS), default="csv")],
+        responses={(200, content_type): OpenApiTypes.STR for content_type in EXPORT_FORMATS.values()},
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def export(self, request):
+        """
+        GET /api/v1/tasks/export/?as=csv|ndjson
+        Streams every task in the caller's scope, one row per line; accepts
+        the same filters as the list.
+        """
+        fmt = request.query_params.get("as", "csv")
+        if fmt not in EXPORT_FORMATS:
+            raise serializers.ValidationError({"as": [f"Expected one of: {', '.join(EXPORT_FORMATS)}."]})
+
+        response = StreamingHttpResponse(
+            iter_export(self.filter_queryset(self.get_queryset()), fmt), content_type=EXPORT_FORMATS[fmt]
+        )
+        response["Content-Disposition"] = f'attachment; filename="tasks.{fmt}"'
+        return response
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("q", str, required=True, description="Words to find in title or description."),
+            OpenApiParameter("limit", int, default=20),
+        ],
+        responses=TaskSerializer(many=True),
+    )
+    @action(detail=False, methods=["get"], pagination_class=None)
+    def search(self, request):
+        """
+        GET /api/v1/tasks/search/?q=<words>&limit=20
+        Tasks in the caller's scope matching every word, best match first;
+        accepts the same filters as the list.
+        """
+        text = request.query_params.get("q", "")
+        if not text.strip():
+            raise serializers.ValidationError({"q": ["This parameter is required."]})
+        try:
+            limit = min(int(request.query_params.get("limit", self.search_limit)), self.search_max_limit)
+        except ValueError:
+            raise serializers.ValidationError({"limit": ["Expected an integer."]})
+        if limit < 1:
+            raise serializers.ValidationError({"limit": ["Must be at least 1."]})
+
+        tasks = search_tasks(self.filter_queryset(self.get_queryset()), text)[:limit]
+        return Response(self.get_serializer(tasks, many=True).data)
+
+    @extend_schema(
+        parameters=[
+            OpenApiParameter("scope", enum=rollups.SCOPES, description="Default: user for Users, team for Admins, all for SuperAdmins."),
+            OpenApiParameter("ref", int, description="User id (scope=user) or Admin id (scope=team); default: yourself."),
+            OpenApiParameter("period", enum=rollups.PERIODS, default=rollups.WEEK),
+            OpenApiParameter("start", OpenApiTypes.DATE, description="Default: 12 periods before end."),
+            OpenApiParameter("end", OpenApiTypes.DATE, description="Default: today."),
+        ],
+        responses=HoursReportSerializer,
+    )
+    @action(detail=False, methods=["get"], pagination_class=None, filter_backends=[])
+    def hours(self, request):
+        """
+        GET /api/v1/tasks/hours/?scope=user|team|all&ref=<id>&period=day|week&start=&end=
+        Worked hours of completed tasks per day or week, read from the
+        HoursRollup table (a row per bucket and shard, never the tasks table).
+        """
+        user = request.user
+        params = request.query_params
+        default_scope = rollups.ALL if user.is_superadmin() else rollups.TEAM if user.is_admin() else rollups.USER
+        scope = params.get("scope") or default_scope
+        period = params.get("period") or rollups.WEEK
+        errors = {}
+        if scope not in rollups.SCOPES:
+            errors["scope"] = [f"Expected one of: {', '.join(rollups.SCOPES)}."]
+        if period not in rollups.PERIODS:
+            errors["period"] = [f"Expected one of: {', '.join(rollups.PERIODS)}."]
+        try:
+            ref = 0 if scope == rollups.ALL else int(params.get("ref") or user.id)
+        except ValueError:
+            errors["ref"] = ["Expected an integer id."]
+        dates = {}
+        for name in ("start", "end"):
+            raw = params.get(name)
+            dates[name] = parse_date(raw) if raw else None
+            if raw and dates[name] is None:
+                errors[name] = ["Expected a date (YYYY-MM-DD)."]
+        if errors:
+            raise serializers.ValidationError(errors)
+
+        end = dates["end"] or timezone.localdate()
+        step = 7 if period == rollups.WEEK else 1
+        start = dates["start"] or end - timedelta(days=step * 11)
+        buckets = ((rollups.bucket(end, period) - rollups.bucket(start, period)).days // step) + 1
+        if buckets < 1:
+            raise serializers.ValidationError({"start": ["Must not be after end."]})
+        if buckets > self.hours_max_buckets:
+            raise serializers.ValidationError(
+                {"start": [f"At most {self.hours_max_buckets} {period}s per request."]}
+            )
+
+        scope_check = TaskScope.for_request(request)
+        allowed = (
+            user.is_superadmin()
+            or (scope == rollups.USER and (ref == user.id or scope_check.manages(ref)))
+            or (scope == rollups.TEAM and user.is_admin() and ref == user.id)
+        )
+        if not allowed:
+            raise PermissionDenied("You may not view these hours.")
+
+        rows = rollups.read(scope, ref, period, start, end)
+        data = {
+            "scope": scope,
+            "ref": ref,
+            "period": period,
+            "total_hours": sum((row["hours"] for row in rows), start=Decimal(0)),
+            "total_tasks": sum(row["tasks"] for row in rows),
+            "buckets": rows,
+        }
+        return Response(HoursReportSerializer(data).data)
+
+    # ------------------------------
+    # Bulk endpoints
+    # ------------------------------
+    # Each batch is validated in full before anything is written: scope is
+    # resolved with one query, every item goes through TaskSerializer
+    # (including the COMPLETED -> report/hours rule), and writes happen in a
+    # single transaction that also locks the rows being changed. Any invalid
+    # item rejects the whole batch with a 400 whose body lists errors per
+    # item, aligned with the input ({} = ok).
+
+    @staticmethod
+    def _is_id(value):
+        # bool is an int subclass: True would otherwise find task 1.
+        return isinstance(value, int) and not isinstance(value, bool)
+
+    def _bulk_items(self, data):
+        if not isinstance(data, list) or not data:
+            raise serializers.ValidationError({"detail": "Expected a non-empty list of items."})
+        if len(data) > self.bulk_max_items:
+            raise serializers.ValidationError(
+                {"detail": f"At most {self.bulk_max_items} items per request."}
+            )
+        if not all(isinstance(item, dict) for item in data):
+            raise serializers.ValidationError({"detail": "Every item must be an object."})
+        return data
+
+    def _assignees(self, items):
+        """
+        Fetch every user referenced by ``assigned_to`` in one query, keeping
+        only those the requester may assign work to.
+        """
+        ids = set()
+        for item in items:
+            try:
+                ids.add(int(item["assigned_to"]))
+            except (KeyError, TypeError, ValueError):
+                pass  # reported per item by the serializer
+
+        return TaskScope.for_request(self.request).assignable(get_user_model().objects).in_bulk(ids)
+
+    @extend_schema(request=TaskSerializer(many=True), responses=TaskSerializer(many=True))
+    @action(detail=False, methods=["post"], url_path="bulk-create")
+    def bulk_create(self, request):
+        """
+        POST /api/v1/tasks/bulk-create/
+        Body: list of tasks, same fields as a single create.
+        """
+        items = self._bulk_items(request.data)
+        context = {**self.get_serializer_context(), "assignees": self._assignees(items)}
+        batch = [TaskSerializer(data=item, context=context) for item in items]
+        errors = [{} if serializer.is_valid() else serializer.errors for serializer in batch]
+        if any(errors):
+            return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+        tasks = [Task(**s.validated_data, created_by=request.user) for s in batch]
+        now = timezone.now()
+        for task in tasks:
+            task.stamp_completion(now)
+        with transaction.atomic():
+            Task.objects.bulk_create(tasks)
+            tasks_changed.send(sender=Task, changes=[(None, t.tracked_state()) for t in tasks])
+        return Response(TaskSerializer(tasks, many=True).data, status=status.HTTP_201_CREATED)
+
+    @extend_schema(
+        request=TaskSerializer(many=True, partial=True),
+        responses=inline_serializer("BulkUpdateResult", {"updated": serializers.ListField(child=serializers.IntegerField())}),
+    )
+    @action(detail=False, methods=["patch"], url_path="bulk-update")
+    def bulk_update(self, request):
+        """
+        PATCH /api/v1/tasks/bulk-update/
+        Body: list of partial tasks, each with its "id".
+        """
+        items = self._bulk_items(request.data)
+        ids = [item.get("id") for item in items]
+        context = {**self.get_serializer_context(), "assignees": self._assignees(items)}
+
+        # The rows stay locked from read to write, so a concurrent edit can
+        # neither be overwritten nor leave stale before-states for rollups.
+        with transaction.atomic():
+            self.lock_object = True
+            instances = self.get_queryset().in_bulk([pk for pk in ids if self._is_id(pk)])
+            batch, errors, seen = [], [], set()
+            for pk, item in zip(ids, items):
+                task = instances.get(pk) if self._is_id(pk) else None
+                if task is None:
+                    errors.append({"id": ["Not found."]})
+                    continue
+                # Two items for one task would share its instance (and its
+                # before-state for counters and rollups).
+                if pk in seen:
+                    errors.append({"id": ["Duplicate id."]})
+                    continue
+                seen.add(pk)
+                serializer = TaskSerializer(task, data=item, partial=True, context=context)
+                batch.append(serializer)
+                errors.append({} if serializer.is_valid() else serializer.errors)
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+            now = timezone.now()
+            fields = {"updated_at"}
+            changes = []
+            for serializer in batch:
+                task = serializer.instance
+                before = task.tracked_state()
+                for attr, value in serializer.validated_data.items():
+                    setattr(task, attr, value)
+                    fields.add(attr)
+                task.updated_at = now
+                task.stamp_completion(now)
+                changes.append((before, task.tracked_state()))
+            if "status" in fields:
+                fields.add("completed_at")
+            Task.objects.bulk_update([s.instance for s in batch], sorted(fields))
+            tasks_changed.send(sender=Task, changes=changes)
+        return Response({"updated": [s.instance.pk for s in batch]})
+
+    @extend_schema(
+        request=inline_serializer("BulkStatusRequest", {
+            "ids": serializers.ListField(child=serializers.IntegerField()),
+            "status": serializers.ChoiceField(choices=Task.Status.choices),
+            "completion_report": serializers.CharField(required=False),
+            "worked_hours": serializers.DecimalField(max_digits=5, decimal_places=2, required=False),
+        }),
+        responses=inline_serializer("BulkStatusResult", {"updated": serializers.ListField(child=serializers.IntegerField())}),
+    )
+    @action(detail=False, methods=["post"], url_path="bulk-status")
+    def bulk_status(self, request):
+        """
+        POST /api/v1/tasks/bulk-status/
+        Body: {"ids": [...], "status": "...", "completion_report"?, "worked_hours"?}
+        Moves every listed task to the same status in one UPDATE.
+        """
+        ids = request.data.get("ids") if isinstance(request.data, dict) else None
+        if not isinstance(ids, list) or not ids or not all(self._is_id(i) for i in ids):
+            raise serializers.ValidationError({"ids": ["Expected a non-empty list of task ids."]})
+        if len(ids) > self.bulk_max_items:
+            raise serializers.ValidationError({"ids": [f"At most {self.bulk_max_items} ids per request."]})
+
+        payload = {
+            key: request.data[key]
+            for key in ("status", "completion_report", "worked_hours")
+            if key in request.data
+        }
+        if "status" not in payload:
+            raise serializers.ValidationError({"status": ["This field is required."]})
+
+        with transaction.atomic():
+            self.lock_object = True
+            instances = self.get_queryset().in_bulk(ids)
+            batch, errors = [], []
+            for pk in ids:
+                task = instances.get(pk)
+                if task is None:
+                    errors.append({"id": ["Not found."]})
+                    continue
+                serializer = TaskSerializer(task, data=payload, partial=True)
+                batch.append(serializer)
+                errors.append({} if serializer.is_valid() else serializer.errors)
+            if any(errors):
+                return Response(errors, status=status.HTTP_400_BAD_REQUEST)
+
+            # Every serializer validated the same payload; take the coerced values once.
+            now = timezone.now()
+            values = dict(batch[0].validated_data, updated_at=now)
+            changes = []
+            for task in instances.values():
+                before = task.tracked_state()
+                for attr, value in values.items():
+                    setattr(task, attr, value)
+                task.stamp_completion(now)
+                changes.append((before, task.tracked_state()))
+            updated = Task.objects.filter(pk__in=list(instances))
+            if values["status"] == Task.Status.COMPLETED:
+                # Tasks that were already completed keep their completion time.
+                updated.update(**values)
+                updated.filter(completed_at__isnull=True).update(completed_at=now)
+            else:
+                updated.update(**values, completed_at=None)
+            tasks_changed.send(sender=Task, changes=changes)
+        return Response({"updated": list(instances)})